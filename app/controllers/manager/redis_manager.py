@@ -1,20 +1,21 @@
 import json
 from typing import Dict
 
-import redis
-
 from app.controllers.manager.base_manager import TaskManager
 from app.models.schema import VideoParams
 from app.services import task as tm
 
 FUNC_MAP = {
     "start": tm.start,
+    "edit": tm.edit,
     # 'start_test': tm.start_test
 }
 
 
 class RedisTaskManager(TaskManager):
     def __init__(self, max_concurrent_tasks: int, redis_url: str):
+        import redis
+
         self.redis_client = redis.Redis.from_url(redis_url)
         super().__init__(max_concurrent_tasks)
 
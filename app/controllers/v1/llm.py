@@ -25,6 +25,8 @@ def generate_video_script(request: Request, body: VideoScriptRequest):
         video_subject=body.video_subject,
         language=body.video_language,
         paragraph_number=body.paragraph_number,
+        # 主动请求生成时总是重新生成
+        use_cache=False,
     )
     response = {"video_script": video_script}
     return utils.get_response(200, response)
@@ -40,6 +42,7 @@ def generate_video_terms(request: Request, body: VideoTermsRequest):
         video_subject=body.video_subject,
         video_script=body.video_script,
         amount=body.amount,
+        use_cache=False,
     )
     response = {"video_terms": video_terms}
     return utils.get_response(200, response)
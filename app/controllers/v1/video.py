@@ -94,6 +94,38 @@ def create_task(
             task_id=task_id, status_code=400, message=f"{request_id}: {str(e)}"
         )
 
+
+@router.post(
+    "/tasks/{task_id}/edit",
+    response_model=TaskResponse,
+    summary="Re-render a finished task after changing subtitle style or audio mix only",
+)
+def edit_video(
+    request: Request,
+    body: TaskVideoRequest,
+    task_id: str = Path(..., description="Task ID"),
+):
+    request_id = base.get_task_id(request)
+    if not sm.state.get_task(task_id):
+        raise HttpException(
+            task_id=task_id, status_code=404, message=f"{request_id}: task not found"
+        )
+    error = tm.edit_error(task_id, body)
+    if error:
+        raise HttpException(
+            task_id=task_id, status_code=400, message=f"{request_id}: {error}"
+        )
+
+    task = {
+        "task_id": task_id,
+        "request_id": request_id,
+        "params": body.model_dump(),
+    }
+    task_manager.add_task(tm.edit, task_id=task_id, params=body)
+    logger.success(f"Task edit created: {utils.to_json(task)}")
+    return utils.get_response(200, task)
+
+
 from fastapi import Query
 
 @router.get("/tasks", response_model=TaskQueryResponse, summary="Get all tasks")
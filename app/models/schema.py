@@ -140,6 +140,12 @@ class VideoParams(BaseModel):
     
     # 快速生成模式（性能优化）
     enable_fast_mode: Optional[bool] = True  # 启用快速生成模式，速度提升10-20倍
+    # 最终输出的编码配置：draft / balanced / archive，为空时使用配置中的 encoder_profile
+    encoder_profile: Optional[str] = None
+    # 预览模式：降低分辨率和帧率、使用 draft 编码，只用于检查排版、时间轴和主题
+    preview: Optional[bool] = False
+    # 预览时只渲染前 N 秒，0 表示完整时长
+    preview_duration: Optional[int] = 0
 
 
 class SubtitleRequest(BaseModel):
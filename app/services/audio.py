@@ -0,0 +1,303 @@
+"""
+音频处理
+
+所有音频处理都交给一次 ffmpeg 调用完成，数据以流的方式经过滤镜，不需要把整段音频解码到内存：
+- postprocess_audio: 语速（atempo）、音量、响度归一化（loudnorm），并直接从编码输出中得到准确时长
+- mix_audio_track:   每个任务只混音一次（配音 + 循环背景音乐 + 淡出 + 闪避 + 响度归一化），
+                     各渲染路径把混好的音轨作为音频输入，用 -c:a copy 直接封装，不再重复混音
+"""
+import os
+import re
+import subprocess
+from typing import List, Optional
+
+from loguru import logger
+
+from app.config import config
+from app.services import media_probe
+
+# atempo 单级只支持 [0.5, 2.0]，超出范围时需要串联多级
+_ATEMPO_MIN = 0.5
+_ATEMPO_MAX = 2.0
+
+_AUDIO_CODECS = {
+    ".mp3": ["-c:a", "libmp3lame", "-q:a", "2"],
+    ".m4a": ["-c:a", "aac", "-b:a", "192k"],
+    ".aac": ["-c:a", "aac", "-b:a", "192k"],
+    ".wav": ["-c:a", "pcm_s16le"],
+}
+
+
+def atempo_filters(rate: float) -> List[str]:
+    """
+    把任意倍速拆成若干级 atempo，每级都在 [0.5, 2.0] 内
+    """
+    if rate <= 0:
+        raise ValueError(f"invalid audio rate: {rate}")
+    filters = []
+    while rate > _ATEMPO_MAX:
+        filters.append(f"atempo={_ATEMPO_MAX}")
+        rate /= _ATEMPO_MAX
+    while rate < _ATEMPO_MIN:
+        filters.append(f"atempo={_ATEMPO_MIN}")
+        rate /= _ATEMPO_MIN
+    if abs(rate - 1.0) > 0.001:
+        filters.append(f"atempo={rate:.6g}")
+    return filters
+
+
+def loudnorm_filter(target_lufs: float = 0) -> str:
+    """
+    EBU R128 响度归一化（单遍），target_lufs 为 0 时使用配置 loudnorm_target（默认 -16 LUFS）
+    """
+    if not target_lufs:
+        target_lufs = config.app.get("loudnorm_target", -16)
+    return f"loudnorm=I={target_lufs}:TP=-1.5:LRA=11"
+
+
+def build_filters(rate: float = 1.0, volume: float = 1.0, loudnorm: bool = False) -> List[str]:
+    filters = atempo_filters(rate)
+    if abs(volume - 1.0) > 0.001:
+        filters.append(f"volume={volume:.6g}")
+    if loudnorm:
+        filters.append(loudnorm_filter())
+    return filters
+
+
+def codec_args(output_file: str) -> List[str]:
+    ext = os.path.splitext(output_file)[1].lower()
+    return list(_AUDIO_CODECS.get(ext, _AUDIO_CODECS[".mp3"]))
+
+
+def _parse_out_time(progress: str) -> float:
+    """
+    从 -progress 输出中读取最后的 out_time_us（编码输出的实际时长）
+    """
+    values = re.findall(r"^out_time_us=(\d+)\s*$", progress, re.MULTILINE)
+    if not values:
+        return 0.0
+    return int(values[-1]) / 1000000
+
+
+def postprocess_audio(
+    input_file: str,
+    output_file: str = "",
+    rate: float = 1.0,
+    volume: float = 1.0,
+    loudnorm: Optional[bool] = None,
+) -> Optional[float]:
+    """
+    一次 ffmpeg 调用完成 语速 / 音量 / 响度归一化
+
+    Args:
+        input_file: 输入音频
+        output_file: 输出音频，为空时覆盖输入文件
+        rate: 语速倍数，不改变音调
+        volume: 音量倍数
+        loudnorm: 是否做响度归一化，None 时使用配置 voice_loudnorm
+
+    Returns:
+        输出音频的时长（秒），失败返回 None
+    """
+    from app.services.video_fast import find_ffmpeg
+
+    if loudnorm is None:
+        loudnorm = config.app.get("voice_loudnorm", False)
+    output_file = output_file or input_file
+
+    ffmpeg_path = find_ffmpeg()
+    if not ffmpeg_path:
+        logger.error("ffmpeg not found, unable to process audio")
+        return None
+
+    try:
+        filters = build_filters(rate, volume, loudnorm)
+    except ValueError as e:
+        logger.error(str(e))
+        return None
+
+    if not filters and output_file == input_file:
+        # 没有需要处理的内容，不重新编码
+        info = media_probe.probe(input_file, use_cache=False)
+        return info.duration if info else None
+
+    # 原地处理时先写到临时文件
+    base, ext = os.path.splitext(output_file)
+    temp_file = f"{base}.processing{ext}" if output_file == input_file else output_file
+
+    cmd = [
+        ffmpeg_path,
+        "-y",
+        "-loglevel", "error",
+        "-nostats",
+        "-progress", "pipe:1",
+        "-i", input_file,
+        "-vn",
+    ]
+    if filters:
+        cmd += ["-af", ",".join(filters)]
+    if loudnorm:
+        # loudnorm 内部会上采样到 192kHz，输出时恢复常用采样率
+        cmd += ["-ar", "48000"]
+    cmd += codec_args(temp_file) + [temp_file]
+
+    logger.debug(f"audio postprocess: {' '.join(cmd)}")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.error(f"failed to process audio: {input_file}, {result.stderr[-500:]}")
+        if temp_file != output_file and os.path.exists(temp_file):
+            os.remove(temp_file)
+        return None
+
+    if temp_file != output_file:
+        os.replace(temp_file, output_file)
+
+    duration = _parse_out_time(result.stdout)
+    logger.info(
+        f"audio processed: {os.path.basename(output_file)}, rate: {rate}, "
+        f"volume: {volume}, loudnorm: {loudnorm}, duration: {duration:.2f}s"
+    )
+    return duration
+
+
+def build_mix_graph(
+    duration: float,
+    has_bgm: bool,
+    voice_volume: float = 1.0,
+    bgm_volume: float = 0.2,
+    fade_out: float = 3.0,
+    ducking: bool = True,
+    loudnorm: bool = True,
+) -> str:
+    """
+    构建混音滤镜图：输入 0 为配音，输入 1 为（已循环的）背景音乐，输出标签为 [mix]
+    """
+    chains = []
+    voice = f"volume={voice_volume:.6g}" if abs(voice_volume - 1.0) > 0.001 else "anull"
+    mix_tail = f",{loudnorm_filter()}" if loudnorm else ""
+
+    if not has_bgm:
+        chains.append(f"[0:a]{voice}{mix_tail}[mix]")
+        return ";".join(chains)
+
+    fade_start = max(0.0, duration - fade_out)
+    bgm = (
+        f"[1:a]atrim=0:{duration:.3f},asetpts=PTS-STARTPTS,"
+        f"volume={bgm_volume:.6g},afade=t=out:st={fade_start:.3f}:d={fade_out:.3f}"
+    )
+    if ducking:
+        # 有人声时压低背景音乐（sidechain 为配音）
+        chains.append(f"[0:a]{voice},asplit=2[voice][sc]")
+        chains.append(f"{bgm}[bgm]")
+        chains.append(
+            "[bgm][sc]sidechaincompress=threshold=0.05:ratio=6:attack=20:release=400[ducked]"
+        )
+        bgm_label = "[ducked]"
+    else:
+        chains.append(f"[0:a]{voice}[voice]")
+        chains.append(f"{bgm}[bgm]")
+        bgm_label = "[bgm]"
+    # normalize=0：各路保持设定的音量，不按输入数量衰减
+    chains.append(
+        f"[voice]{bgm_label}amix=inputs=2:duration=first:dropout_transition=0:normalize=0{mix_tail}[mix]"
+    )
+    return ";".join(chains)
+
+
+def mix_audio_track(
+    voice_file: str,
+    output_file: str,
+    background_music: str = "",
+    voice_volume: float = 1.0,
+    bgm_volume: float = 0.2,
+    fade_out: float = 3.0,
+    ducking: Optional[bool] = None,
+    loudnorm: Optional[bool] = None,
+) -> Optional[float]:
+    """
+    生成最终音轨（AAC），所有渲染路径和 video_count 个视频共用
+
+    背景音乐通过 -stream_loop 循环，不需要把整首歌解码到内存
+
+    Args:
+        voice_file: 配音
+        output_file: 输出文件（.m4a）
+        background_music: 背景音乐，为空时只处理配音
+        voice_volume: 配音音量
+        bgm_volume: 背景音乐音量
+        fade_out: 背景音乐结尾淡出时长（秒）
+        ducking: 有人声时压低背景音乐，None 时使用配置 bgm_ducking
+        loudnorm: 对混音结果做响度归一化，None 时使用配置 mix_loudnorm
+
+    Returns:
+        音轨时长（秒），失败返回 None
+    """
+    from app.services.video_fast import find_ffmpeg
+
+    if ducking is None:
+        ducking = config.app.get("bgm_ducking", True)
+    if loudnorm is None:
+        loudnorm = config.app.get("mix_loudnorm", False)
+
+    ffmpeg_path = find_ffmpeg()
+    if not ffmpeg_path:
+        logger.error("ffmpeg not found, unable to mix audio")
+        return None
+
+    duration = media_probe.get_duration(voice_file)
+    if duration <= 0:
+        logger.error(f"failed to get audio duration: {voice_file}")
+        return None
+
+    has_bgm = bool(background_music) and os.path.exists(background_music)
+    cmd = [
+        ffmpeg_path,
+        "-y",
+        "-loglevel", "error",
+        "-nostats",
+        "-progress", "pipe:1",
+        "-i", voice_file,
+    ]
+    if has_bgm:
+        cmd += ["-stream_loop", "-1", "-i", background_music]
+    cmd += [
+        "-filter_complex",
+        build_mix_graph(
+            duration,
+            has_bgm,
+            voice_volume=voice_volume,
+            bgm_volume=bgm_volume,
+            fade_out=min(fade_out, duration),
+            ducking=ducking,
+            loudnorm=loudnorm,
+        ),
+        "-map", "[mix]",
+        "-vn",
+        "-ar", "48000",
+        *codec_args(output_file),
+        output_file,
+    ]
+
+    logger.debug(f"audio mix: {' '.join(cmd)}")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.error(f"failed to mix audio: {result.stderr[-500:]}")
+        return None
+
+    mixed_duration = _parse_out_time(result.stdout) or duration
+    logger.info(
+        f"audio mixed: {os.path.basename(output_file)}, bgm: {os.path.basename(background_music) if has_bgm else 'none'}, "
+        f"ducking: {ducking}, loudnorm: {loudnorm}, duration: {mixed_duration:.2f}s"
+    )
+    return mixed_duration
+
+
+def mux_codec_args(audio_file: str) -> List[str]:
+    """
+    封装到 mp4 时的音频编码参数：已经是 AAC 的音轨（mix_audio_track 的输出）直接复制
+    """
+    info = media_probe.probe(audio_file)
+    # 没有 ffprobe 时 media_probe 只能给出扩展名
+    if info and info.audio_codec in ("aac", "m4a"):
+        return ["-c:a", "copy"]
+    return ["-c:a", "aac", "-b:a", "192k"]
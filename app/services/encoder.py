@@ -0,0 +1,261 @@
+"""
+编码器配置（profile）注册表
+
+不同阶段对编码的要求不同：
+- intermediate: 流水线内部的临时文件，之后还会被解码，追求编码速度且不损失画质
+- draft:        快速预览，速度优先
+- balanced:     默认的最终输出，速度与体积平衡
+- archive:      归档输出，体积优先（H.265）
+
+所有 profile 都以 CPU 编码器（libx264/libx265）定义，draft/balanced 在检测到
+硬件编码器时会自动替换为对应档位的硬件编码参数（见 HARDWARE_PROFILES）。
+"""
+import os
+import subprocess
+import time
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import config
+
+DEFAULT_PROFILE = "balanced"
+INTERMEDIATE_PROFILE = "intermediate"
+
+PROFILES: Dict[str, dict] = {
+    "draft": {
+        "codec": "libx264",
+        "params": ["-preset", "ultrafast", "-crf", "28", "-pix_fmt", "yuv420p"],
+        "hardware": True,
+    },
+    "balanced": {
+        "codec": "libx264",
+        "params": ["-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p"],
+        "hardware": True,
+    },
+    "archive": {
+        "codec": "libx265",
+        "params": [
+            "-preset", "fast",
+            "-crf", "24",
+            "-pix_fmt", "yuv420p",
+            "-tag:v", "hvc1",  # 兼容苹果设备播放
+        ],
+        "hardware": False,
+    },
+    "intermediate": {
+        # 实际参数由配置 intermediate_codec 决定，见 INTERMEDIATE_CODECS
+        "codec": "libx264",
+        "params": ["-preset", "ultrafast", "-qp", "0", "-pix_fmt", "yuv420p"],
+        "hardware": False,
+    },
+}
+
+# 硬件编码器在各 profile 下的预设与码率控制，键为 detect_gpu_encoder 返回的编码器名
+# draft 速度优先、质量略低；balanced 与 libx264 veryfast/crf 23 的画质大致相当
+HARDWARE_PROFILES: Dict[str, Dict[str, List[str]]] = {
+    "h264_nvenc": {
+        "draft": ["-preset", "p1", "-rc", "vbr", "-cq", "30", "-b:v", "0"],
+        "balanced": ["-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "0"],
+    },
+    "h264_qsv": {
+        "draft": ["-preset", "veryfast", "-global_quality", "30"],
+        "balanced": ["-preset", "medium", "-global_quality", "23"],
+    },
+    "h264_videotoolbox": {
+        # VideoToolbox 没有 preset，只能通过码率和 realtime 控制速度
+        "draft": ["-allow_sw", "1", "-realtime", "1", "-b:v", "3M"],
+        "balanced": ["-allow_sw", "1", "-b:v", "6M"],
+    },
+    "h264_amf": {
+        "draft": ["-quality", "speed", "-rc", "cqp", "-qp_i", "30", "-qp_p", "30"],
+        "balanced": ["-quality", "balanced", "-rc", "cqp", "-qp_i", "23", "-qp_p", "23"],
+    },
+}
+
+# MoviePy 总会传入 -preset，profile 未指定时使用编码器自身的默认预设，不改变编码结果
+# （VideoToolbox/AMF 没有 preset 选项，ffmpeg 会忽略该参数）
+_DEFAULT_PRESETS = {
+    "libx264": "medium",
+    "libx265": "medium",
+    "h264_nvenc": "p4",
+    "h264_qsv": "medium",
+}
+
+# 中间文件编码方式（配置 intermediate_codec）
+INTERMEDIATE_CODECS: Dict[str, List[str]] = {
+    # qp 0 为无损编码，ultrafast 下编码几乎不占CPU，代价是文件更大
+    "lossless": ["-preset", "ultrafast", "-qp", "0", "-pix_fmt", "yuv420p"],
+    # 全I帧高码率，解码不依赖参考帧，适合需要频繁 seek/裁剪的中间文件
+    "intra": [
+        "-preset", "ultrafast",
+        "-tune", "fastdecode",
+        "-g", "1",
+        "-crf", "12",
+        "-pix_fmt", "yuv420p",
+    ],
+    # 旧版本行为：有损，文件最小
+    "lossy": ["-preset", "ultrafast", "-crf", "23", "-pix_fmt", "yuv420p"],
+}
+
+
+# 中间文件每像素每帧的大致字节数（yuv420p 原始数据为 1.5 字节），用于估算临时目录需要的空间
+_INTERMEDIATE_BYTES_PER_PIXEL = {"lossless": 0.6, "intra": 0.2, "lossy": 0.03}
+
+
+def estimate_intermediate_mb(width: int, height: int, fps: float, duration: float) -> float:
+    """
+    按配置的 intermediate_codec 估算一段中间文件的大小（MB）
+    """
+    intermediate_codec = config.app.get("intermediate_codec", "lossless")
+    bytes_per_pixel = _INTERMEDIATE_BYTES_PER_PIXEL.get(
+        intermediate_codec, _INTERMEDIATE_BYTES_PER_PIXEL["lossless"]
+    )
+    return width * height * fps * max(0.0, duration) * bytes_per_pixel / (1024 * 1024)
+
+
+def resolve_profile(profile: Optional[str] = None) -> str:
+    """
+    解析 profile 名称，未指定或无效时使用配置中的 encoder_profile（默认 balanced）
+    """
+    if profile in PROFILES:
+        return profile
+    if profile:
+        logger.warning(f"unknown encoder profile: {profile}, using default")
+    default = config.app.get("encoder_profile", DEFAULT_PROFILE)
+    return default if default in PROFILES else DEFAULT_PROFILE
+
+
+def get_encoder(
+    profile: Optional[str] = None, allow_hardware: bool = True
+) -> Tuple[str, List[str]]:
+    """
+    获取指定 profile 的编码器
+
+    Args:
+        profile: draft / balanced / archive / intermediate
+        allow_hardware: 是否允许替换为硬件编码器
+
+    Returns:
+        (video_codec, extra_ffmpeg_params)
+    """
+    name = resolve_profile(profile)
+    spec = PROFILES[name]
+
+    if name == INTERMEDIATE_PROFILE:
+        intermediate_codec = config.app.get("intermediate_codec", "lossless")
+        if intermediate_codec not in INTERMEDIATE_CODECS:
+            logger.warning(f"unknown intermediate codec: {intermediate_codec}, using lossless")
+            intermediate_codec = "lossless"
+        return spec["codec"], list(INTERMEDIATE_CODECS[intermediate_codec])
+
+    if (
+        allow_hardware
+        and spec["hardware"]
+        and config.app.get("hardware_encoder", True)
+    ):
+        from app.services.video import detect_gpu_encoder
+
+        gpu_codec, gpu_params = detect_gpu_encoder()
+        if gpu_codec not in ("libx264", "libx265"):
+            params = HARDWARE_PROFILES.get(gpu_codec, {}).get(name, gpu_params)
+            return gpu_codec, list(params)
+
+    return spec["codec"], list(spec["params"])
+
+
+def ffmpeg_args(
+    profile: Optional[str] = None, allow_hardware: bool = True
+) -> List[str]:
+    """
+    返回可直接拼接到 ffmpeg 命令中的视频编码参数
+    """
+    codec, params = get_encoder(profile, allow_hardware)
+    return ["-c:v", codec] + params
+
+
+def moviepy_args(
+    profile: Optional[str] = None, allow_hardware: bool = True
+) -> dict:
+    """
+    返回 write_videofile 使用的 codec / preset / ffmpeg_params
+
+    MoviePy 总会传入 -preset，这里从参数中取出 preset 单独传递，避免重复；
+    profile 没有 preset 时使用编码器的默认预设，见 _DEFAULT_PRESETS
+    """
+    codec, params = get_encoder(profile, allow_hardware)
+    preset = _DEFAULT_PRESETS.get(codec, "medium")
+    ffmpeg_params = []
+    i = 0
+    while i < len(params):
+        if params[i] == "-preset" and i + 1 < len(params):
+            preset = params[i + 1]
+            i += 2
+            continue
+        ffmpeg_params.append(params[i])
+        i += 1
+    return {"codec": codec, "preset": preset, "ffmpeg_params": ffmpeg_params}
+
+
+def benchmark(
+    profiles: Optional[List[str]] = None,
+    duration: int = 5,
+    width: int = 1080,
+    height: int = 1920,
+    allow_hardware: bool = False,
+) -> List[dict]:
+    """
+    使用 testsrc2 合成画面对各个 profile 做编码测速
+
+    Returns:
+        [{"profile", "codec", "seconds", "size", "speed"}]，speed 为实时倍速
+    """
+    from app.services.video_fast import find_ffmpeg
+    from app.utils import utils
+
+    ffmpeg_path = find_ffmpeg()
+    if not ffmpeg_path:
+        logger.error("ffmpeg not found, unable to run encoder benchmark")
+        return []
+
+    output_dir = utils.storage_dir("temp", create=True)
+    results = []
+    for name in profiles or list(PROFILES.keys()):
+        codec, params = get_encoder(name, allow_hardware)
+        output_file = os.path.join(output_dir, f"encoder-benchmark-{name}.mp4")
+        cmd = [
+            ffmpeg_path,
+            "-f", "lavfi",
+            "-i", f"testsrc2=size={width}x{height}:rate=30:duration={duration}",
+            "-c:v", codec,
+            *params,
+            "-an",
+            "-y",
+            output_file,
+        ]
+        start = time.time()
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        seconds = time.time() - start
+        if result.returncode != 0:
+            logger.error(f"benchmark failed: {name}, {result.stderr[-500:]}")
+            continue
+
+        size = os.path.getsize(output_file)
+        os.remove(output_file)
+        results.append(
+            {
+                "profile": name,
+                "codec": codec,
+                "seconds": round(seconds, 2),
+                "size": size,
+                "speed": round(duration / seconds, 2) if seconds else 0,
+            }
+        )
+        logger.info(
+            f"{name:<13} {codec:<12} {seconds:6.2f}s  {size / 1024 / 1024:7.2f}MB  {duration / seconds:5.2f}x"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
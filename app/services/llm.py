@@ -1,298 +1,614 @@
+import hashlib
 import json
 import logging
+import random
 import re
-import requests
-from typing import List
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-import g4f
+import requests
 from loguru import logger
-from openai import AzureOpenAI, OpenAI
-from openai.types.chat import ChatCompletion
 
 from app.config import config
+from app.utils import utils
+
+# 导入耗时较长，只在使用对应的提供商时才导入
+g4f = utils.lazy_import("g4f")
+openai = utils.lazy_import("openai")
+
+# 响应内容不可用（为空、不是 JSON 数组）时重新请求的次数；网络错误和限流由 complete 退避重试
+_max_content_retries = 2
+
+# LLM 响应缓存：同一 (provider, model, base_url, prompt) 在 llm_cache_ttl 秒内直接返回上次的结果；
+# 正在进行中的相同请求只发送一次，其余调用等待同一个结果
+_response_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+_inflight: Dict[str, Future] = {}
+_cache_lock = threading.Lock()
+
+
+def _cache_key(prompt: str, json_mode: bool = False) -> str:
+    llm_provider = config.app.get("llm_provider", "openai")
+    raw = json.dumps(
+        [
+            llm_provider,
+            config.app.get(f"{llm_provider}_model_name", ""),
+            config.app.get(f"{llm_provider}_base_url", ""),
+            hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+            json_mode,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _generate_response(prompt: str, use_cache: bool = True, json_mode: bool = False) -> str:
+    """
+    带缓存的 LLM 调用
+
+    Args:
+        use_cache: 为 False 时不读取缓存（例如上次的结果无法使用而重试），新结果仍会写入缓存
+        json_mode: 要求提供商返回 JSON 对象（见 complete）
+
+    Returns:
+        响应内容；失败时返回 "Error: ..."，失败的结果不会被缓存
+    """
+    ttl = float(config.app.get("llm_cache_ttl", 0))
+    if ttl <= 0:
+        return _request_response(prompt, json_mode)
+
+    key = _cache_key(prompt, json_mode)
+    with _cache_lock:
+        cached = _response_cache.get(key) if use_cache else None
+        if cached and cached[0] > time.monotonic():
+            _response_cache.move_to_end(key)
+            logger.info("llm response served from cache")
+            return cached[1]
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _inflight[key] = future
+
+    if not owner:
+        logger.info("waiting for an identical llm request in flight")
+        return future.result()
+
+    content = ""
+    try:
+        content = _request_response(prompt, json_mode)
+    finally:
+        with _cache_lock:
+            if content and not content.startswith("Error: "):
+                _response_cache[key] = (time.monotonic() + ttl, content)
+                _response_cache.move_to_end(key)
+                max_entries = max(1, int(config.app.get("llm_cache_max_entries", 256)))
+                while len(_response_cache) > max_entries:
+                    _response_cache.popitem(last=False)
+            _inflight.pop(key, None)
+        future.set_result(content)
+    return content
+
+
+def _request_response(prompt: str, json_mode: bool = False) -> str:
+    try:
+        return complete(prompt, json_mode=json_mode)
+    except Exception as e:
+        return f"Error: {str(e)}"
 
-_max_retries = 5
 
+class _TransientError(Exception):
+    """
+    服务端暂时不可用（例如 token 过期已刷新、限流），可以重试
+    """
+
+
+# 客户端（OpenAI / AzureOpenAI / requests.Session / Gemini 模型）按 (provider, base_url, key, ...) 只创建一次，
+# 复用底层的 keep-alive 连接，不再每次请求都重新建立连接
+_clients: Dict[tuple, object] = {}
+_clients_lock = threading.Lock()
+
+# ernie access_token 缓存：(api_key, secret_key) -> (access_token, 过期时间)
+_ernie_tokens: Dict[Tuple[str, str], Tuple[str, float]] = {}
+_ernie_tokens_lock = threading.Lock()
+
+# 重试的退避时间（秒）：base * 2^n，最长 max
+_backoff_base = 1.0
+_backoff_max = 16.0
+
+
+def _timeout() -> float:
+    return float(config.app.get("llm_timeout", 120))
+
+
+def _get_client(key: tuple, factory: Callable[[], object]):
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+        return client
+
+
+def _session(llm_provider: str, base_url: str, api_key: str = "") -> requests.Session:
+    return _get_client(("session", llm_provider, base_url, api_key), requests.Session)
+
+
+def _provider_settings(llm_provider: str) -> dict:
+    """
+    读取并校验提供商配置
+    """
+    api_key = ""
+    model_name = ""
+    base_url = ""
+    settings = {}
+    if llm_provider == "g4f":
+        return {"model_name": config.app.get("g4f_model_name", "") or "gpt-3.5-turbo-16k-0613"}
+    elif llm_provider == "moonshot":
+        api_key = config.app.get("moonshot_api_key")
+        model_name = config.app.get("moonshot_model_name")
+        base_url = "https://api.moonshot.cn/v1"
+    elif llm_provider == "ollama":
+        # api_key = config.app.get("openai_api_key")
+        api_key = "ollama"  # any string works but you are required to have one
+        model_name = config.app.get("ollama_model_name")
+        base_url = config.app.get("ollama_base_url", "")
+        if not base_url:
+            base_url = "http://localhost:11434/v1"
+    elif llm_provider == "openai":
+        api_key = config.app.get("openai_api_key")
+        model_name = config.app.get("openai_model_name")
+        base_url = config.app.get("openai_base_url", "")
+        if not base_url:
+            base_url = "https://api.openai.com/v1"
+    elif llm_provider == "oneapi":
+        api_key = config.app.get("oneapi_api_key")
+        model_name = config.app.get("oneapi_model_name")
+        base_url = config.app.get("oneapi_base_url", "")
+    elif llm_provider == "azure":
+        api_key = config.app.get("azure_api_key")
+        model_name = config.app.get("azure_model_name")
+        base_url = config.app.get("azure_base_url", "")
+        settings["api_version"] = config.app.get("azure_api_version", "2024-02-15-preview")
+    elif llm_provider == "gemini":
+        api_key = config.app.get("gemini_api_key")
+        model_name = config.app.get("gemini_model_name")
+        base_url = "***"
+    elif llm_provider == "qwen":
+        api_key = config.app.get("qwen_api_key")
+        model_name = config.app.get("qwen_model_name")
+        base_url = "***"
+    elif llm_provider == "cloudflare":
+        api_key = config.app.get("cloudflare_api_key")
+        model_name = config.app.get("cloudflare_model_name")
+        settings["account_id"] = config.app.get("cloudflare_account_id")
+        base_url = "***"
+    elif llm_provider == "deepseek":
+        api_key = config.app.get("deepseek_api_key")
+        model_name = config.app.get("deepseek_model_name")
+        base_url = config.app.get("deepseek_base_url")
+        if not base_url:
+            base_url = "https://api.deepseek.com"
+    elif llm_provider == "ernie":
+        api_key = config.app.get("ernie_api_key")
+        settings["secret_key"] = config.app.get("ernie_secret_key")
+        base_url = config.app.get("ernie_base_url")
+        model_name = "***"
+        if not settings["secret_key"]:
+            raise ValueError(
+                f"{llm_provider}: secret_key is not set, please set it in the config.toml file."
+            )
+    elif llm_provider == "pollinations":
+        base_url = config.app.get("pollinations_base_url", "")
+        if not base_url:
+            base_url = "https://text.pollinations.ai/openai"
+        model_name = config.app.get("pollinations_model_name", "openai-fast")
+
+    if llm_provider not in ["pollinations", "ollama"]:  # Skip validation for providers that don't require API key
+        if not api_key:
+            raise ValueError(
+                f"{llm_provider}: api_key is not set, please set it in the config.toml file."
+            )
+        if not model_name:
+            raise ValueError(
+                f"{llm_provider}: model_name is not set, please set it in the config.toml file."
+            )
+        if not base_url:
+            raise ValueError(
+                f"{llm_provider}: base_url is not set, please set it in the config.toml file."
+            )
 
-def _generate_response(prompt: str) -> str:
-    try:
-        content = ""
-        llm_provider = config.app.get("llm_provider", "openai")
-        logger.info(f"llm provider: {llm_provider}")
-        if llm_provider == "g4f":
-            model_name = config.app.get("g4f_model_name", "")
-            if not model_name:
-                model_name = "gpt-3.5-turbo-16k-0613"
-            content = g4f.ChatCompletion.create(
-                model=model_name,
-                messages=[{"role": "user", "content": prompt}],
+    settings.update(api_key=api_key, model_name=model_name, base_url=base_url)
+    return settings
+
+
+def _complete_g4f(llm_provider: str, prompt: str, settings: dict) -> str:
+    content = g4f.ChatCompletion.create(
+        model=settings["model_name"],
+        messages=[{"role": "user", "content": prompt}],
+    )
+    return content
+
+
+def _complete_pollinations(llm_provider: str, prompt: str, settings: dict) -> str:
+    # Prepare the payload
+    payload = {
+        "model": settings["model_name"],
+        "messages": [
+            {"role": "user", "content": prompt}
+        ],
+        "seed": 101  # Optional but helps with reproducibility
+    }
+
+    # Optional parameters if configured
+    if config.app.get("pollinations_private"):
+        payload["private"] = True
+    if config.app.get("pollinations_referrer"):
+        payload["referrer"] = config.app.get("pollinations_referrer")
+
+    session = _session(llm_provider, settings["base_url"])
+    response = session.post(
+        settings["base_url"],
+        headers={"Content-Type": "application/json"},
+        json=payload,
+        timeout=_timeout(),
+    )
+    response.raise_for_status()
+    result = response.json()
+
+    if result and "choices" in result and len(result["choices"]) > 0:
+        content = result["choices"][0]["message"]["content"]
+        return content
+    raise Exception(f"[{llm_provider}] returned an invalid response format")
+
+
+def _complete_qwen(llm_provider: str, prompt: str, settings: dict) -> str:
+    import dashscope
+    from dashscope.api_entities.dashscope_response import GenerationResponse
+
+    response = dashscope.Generation.call(
+        model=settings["model_name"],
+        messages=[{"role": "user", "content": prompt}],
+        api_key=settings["api_key"],
+    )
+    if not response:
+        raise Exception(f"[{llm_provider}] returned an empty response")
+    if not isinstance(response, GenerationResponse):
+        raise Exception(f'[{llm_provider}] returned an invalid response: "{response}"')
+    if response.status_code != 200:
+        if response.status_code == 429 or response.status_code >= 500:
+            raise _TransientError(f'[{llm_provider}] returned an error response: "{response}"')
+        raise Exception(f'[{llm_provider}] returned an error response: "{response}"')
+    return response["output"]["text"]
+
+
+def _gemini_model(llm_provider: str, settings: dict):
+    import google.generativeai as genai
+
+    def _create_model():
+        genai.configure(api_key=settings["api_key"], transport="rest")
+        generation_config = {
+            "temperature": 0.5,
+            "top_p": 1,
+            "top_k": 1,
+            "max_output_tokens": 2048,
+        }
+        safety_settings = [
+            {
+                "category": category,
+                "threshold": "BLOCK_ONLY_HIGH",
+            }
+            for category in (
+                "HARM_CATEGORY_HARASSMENT",
+                "HARM_CATEGORY_HATE_SPEECH",
+                "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+                "HARM_CATEGORY_DANGEROUS_CONTENT",
             )
-        else:
-            api_version = ""  # for azure
-            if llm_provider == "moonshot":
-                api_key = config.app.get("moonshot_api_key")
-                model_name = config.app.get("moonshot_model_name")
-                base_url = "https://api.moonshot.cn/v1"
-            elif llm_provider == "ollama":
-                # api_key = config.app.get("openai_api_key")
-                api_key = "ollama"  # any string works but you are required to have one
-                model_name = config.app.get("ollama_model_name")
-                base_url = config.app.get("ollama_base_url", "")
-                if not base_url:
-                    base_url = "http://localhost:11434/v1"
-            elif llm_provider == "openai":
-                api_key = config.app.get("openai_api_key")
-                model_name = config.app.get("openai_model_name")
-                base_url = config.app.get("openai_base_url", "")
-                if not base_url:
-                    base_url = "https://api.openai.com/v1"
-            elif llm_provider == "oneapi":
-                api_key = config.app.get("oneapi_api_key")
-                model_name = config.app.get("oneapi_model_name")
-                base_url = config.app.get("oneapi_base_url", "")
-            elif llm_provider == "azure":
-                api_key = config.app.get("azure_api_key")
-                model_name = config.app.get("azure_model_name")
-                base_url = config.app.get("azure_base_url", "")
-                api_version = config.app.get("azure_api_version", "2024-02-15-preview")
-            elif llm_provider == "gemini":
-                api_key = config.app.get("gemini_api_key")
-                model_name = config.app.get("gemini_model_name")
-                base_url = "***"
-            elif llm_provider == "qwen":
-                api_key = config.app.get("qwen_api_key")
-                model_name = config.app.get("qwen_model_name")
-                base_url = "***"
-            elif llm_provider == "cloudflare":
-                api_key = config.app.get("cloudflare_api_key")
-                model_name = config.app.get("cloudflare_model_name")
-                account_id = config.app.get("cloudflare_account_id")
-                base_url = "***"
-            elif llm_provider == "deepseek":
-                api_key = config.app.get("deepseek_api_key")
-                model_name = config.app.get("deepseek_model_name")
-                base_url = config.app.get("deepseek_base_url")
-                if not base_url:
-                    base_url = "https://api.deepseek.com"
-            elif llm_provider == "ernie":
-                api_key = config.app.get("ernie_api_key")
-                secret_key = config.app.get("ernie_secret_key")
-                base_url = config.app.get("ernie_base_url")
-                model_name = "***"
-                if not secret_key:
-                    raise ValueError(
-                        f"{llm_provider}: secret_key is not set, please set it in the config.toml file."
-                    )
-            elif llm_provider == "pollinations":
-                try:
-                    base_url = config.app.get("pollinations_base_url", "")
-                    if not base_url:
-                        base_url = "https://text.pollinations.ai/openai"
-                    model_name = config.app.get("pollinations_model_name", "openai-fast")
-                   
-                    # Prepare the payload
-                    payload = {
-                        "model": model_name,
-                        "messages": [
-                            {"role": "user", "content": prompt}
-                        ],
-                        "seed": 101  # Optional but helps with reproducibility
-                    }
-                    
-                    # Optional parameters if configured
-                    if config.app.get("pollinations_private"):
-                        payload["private"] = True
-                    if config.app.get("pollinations_referrer"):
-                        payload["referrer"] = config.app.get("pollinations_referrer")
-                    
-                    headers = {
-                        "Content-Type": "application/json"
-                    }
-                    
-                    # Make the API request
-                    response = requests.post(base_url, headers=headers, json=payload)
-                    response.raise_for_status()
-                    result = response.json()
-                    
-                    if result and "choices" in result and len(result["choices"]) > 0:
-                        content = result["choices"][0]["message"]["content"]
-                        return content.replace("\n", "")
-                    else:
-                        raise Exception(f"[{llm_provider}] returned an invalid response format")
-                        
-                except requests.exceptions.RequestException as e:
-                    raise Exception(f"[{llm_provider}] request failed: {str(e)}")
-                except Exception as e:
-                    raise Exception(f"[{llm_provider}] error: {str(e)}")
-
-            if llm_provider not in ["pollinations", "ollama"]:  # Skip validation for providers that don't require API key
-                if not api_key:
-                    raise ValueError(
-                        f"{llm_provider}: api_key is not set, please set it in the config.toml file."
-                    )
-                if not model_name:
-                    raise ValueError(
-                        f"{llm_provider}: model_name is not set, please set it in the config.toml file."
-                    )
-                if not base_url:
-                    raise ValueError(
-                        f"{llm_provider}: base_url is not set, please set it in the config.toml file."
-                    )
-
-            if llm_provider == "qwen":
-                import dashscope
-                from dashscope.api_entities.dashscope_response import GenerationResponse
-
-                dashscope.api_key = api_key
-                response = dashscope.Generation.call(
-                    model=model_name, messages=[{"role": "user", "content": prompt}]
-                )
-                if response:
-                    if isinstance(response, GenerationResponse):
-                        status_code = response.status_code
-                        if status_code != 200:
-                            raise Exception(
-                                f'[{llm_provider}] returned an error response: "{response}"'
-                            )
-
-                        content = response["output"]["text"]
-                        return content.replace("\n", "")
-                    else:
-                        raise Exception(
-                            f'[{llm_provider}] returned an invalid response: "{response}"'
-                        )
-                else:
-                    raise Exception(f"[{llm_provider}] returned an empty response")
-
-            if llm_provider == "gemini":
-                import google.generativeai as genai
-
-                genai.configure(api_key=api_key, transport="rest")
-
-                generation_config = {
-                    "temperature": 0.5,
-                    "top_p": 1,
-                    "top_k": 1,
-                    "max_output_tokens": 2048,
-                }
-
-                safety_settings = [
-                    {
-                        "category": "HARM_CATEGORY_HARASSMENT",
-                        "threshold": "BLOCK_ONLY_HIGH",
-                    },
-                    {
-                        "category": "HARM_CATEGORY_HATE_SPEECH",
-                        "threshold": "BLOCK_ONLY_HIGH",
-                    },
-                    {
-                        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                        "threshold": "BLOCK_ONLY_HIGH",
-                    },
-                    {
-                        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                        "threshold": "BLOCK_ONLY_HIGH",
-                    },
-                ]
-
-                model = genai.GenerativeModel(
-                    model_name=model_name,
-                    generation_config=generation_config,
-                    safety_settings=safety_settings,
-                )
-
-                try:
-                    response = model.generate_content(prompt)
-                    candidates = response.candidates
-                    generated_text = candidates[0].content.parts[0].text
-                except (AttributeError, IndexError) as e:
-                    print("Gemini Error:", e)
-
-                return generated_text
-
-            if llm_provider == "cloudflare":
-                response = requests.post(
-                    f"https://api.cloudflare.com/client/v4/accounts/{account_id}/ai/run/{model_name}",
-                    headers={"Authorization": f"Bearer {api_key}"},
-                    json={
-                        "messages": [
-                            {
-                                "role": "system",
-                                "content": "You are a friendly assistant",
-                            },
-                            {"role": "user", "content": prompt},
-                        ]
-                    },
-                )
-                result = response.json()
-                logger.info(result)
-                return result["result"]["response"]
-
-            if llm_provider == "ernie":
-                response = requests.post(
-                    "https://aip.baidubce.com/oauth/2.0/token", 
-                    params={
-                        "grant_type": "client_credentials",
-                        "client_id": api_key,
-                        "client_secret": secret_key,
-                    }
-                )
-                access_token = response.json().get("access_token")
-                url = f"{base_url}?access_token={access_token}"
-
-                payload = json.dumps(
-                    {
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.5,
-                        "top_p": 0.8,
-                        "penalty_score": 1,
-                        "disable_search": False,
-                        "enable_citation": False,
-                        "response_format": "text",
-                    }
-                )
-                headers = {"Content-Type": "application/json"}
-
-                response = requests.request(
-                    "POST", url, headers=headers, data=payload
-                ).json()
-                return response.get("result")
-
-            if llm_provider == "azure":
-                client = AzureOpenAI(
-                    api_key=api_key,
-                    api_version=api_version,
-                    azure_endpoint=base_url,
-                )
-            else:
-                client = OpenAI(
-                    api_key=api_key,
-                    base_url=base_url,
-                )
+        ]
+        return genai.GenerativeModel(
+            model_name=settings["model_name"],
+            generation_config=generation_config,
+            safety_settings=safety_settings,
+        )
+
+    return _get_client((llm_provider, settings["api_key"], settings["model_name"]), _create_model)
+
+
+def _complete_gemini(llm_provider: str, prompt: str, settings: dict) -> str:
+    response = _gemini_model(llm_provider, settings).generate_content(prompt)
+    try:
+        return response.candidates[0].content.parts[0].text
+    except (AttributeError, IndexError) as e:
+        raise Exception(f"[{llm_provider}] returned an invalid response: {e}")
+
+
+def _complete_gemini_json(llm_provider: str, prompt: str, settings: dict) -> str:
+    response = _gemini_model(llm_provider, settings).generate_content(
+        prompt, generation_config={"response_mime_type": "application/json"}
+    )
+    try:
+        return response.candidates[0].content.parts[0].text
+    except (AttributeError, IndexError) as e:
+        raise Exception(f"[{llm_provider}] returned an invalid response: {e}")
+
+
+def _complete_cloudflare(llm_provider: str, prompt: str, settings: dict) -> str:
+    session = _session(llm_provider, settings["account_id"], settings["api_key"])
+    response = session.post(
+        f"https://api.cloudflare.com/client/v4/accounts/{settings['account_id']}/ai/run/{settings['model_name']}",
+        headers={"Authorization": f"Bearer {settings['api_key']}"},
+        json={
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a friendly assistant",
+                },
+                {"role": "user", "content": prompt},
+            ]
+        },
+        timeout=_timeout(),
+    )
+    if response.status_code == 429 or response.status_code >= 500:
+        response.raise_for_status()
+    result = response.json()
+    logger.info(result)
+    return result["result"]["response"]
+
+
+def _ernie_access_token(session: requests.Session, api_key: str, secret_key: str) -> str:
+    """
+    access_token 有效期内复用（提前 60 秒刷新），不再每次请求都重新获取
+    """
+    key = (api_key, secret_key)
+    with _ernie_tokens_lock:
+        token = _ernie_tokens.get(key)
+        if token and token[1] > time.time():
+            return token[0]
+
+        response = session.post(
+            "https://aip.baidubce.com/oauth/2.0/token",
+            params={
+                "grant_type": "client_credentials",
+                "client_id": api_key,
+                "client_secret": secret_key,
+            },
+            timeout=_timeout(),
+        )
+        result = response.json()
+        access_token = result.get("access_token")
+        if not access_token:
+            raise Exception(f"[ernie] failed to get access token: {result}")
+        _ernie_tokens[key] = (access_token, time.time() + int(result.get("expires_in", 3600)) - 60)
+        return access_token
+
+
+def _complete_ernie(llm_provider: str, prompt: str, settings: dict) -> str:
+    session = _session(llm_provider, settings["base_url"], settings["api_key"])
+    access_token = _ernie_access_token(session, settings["api_key"], settings["secret_key"])
+    response = session.post(
+        settings["base_url"],
+        params={"access_token": access_token},
+        headers={"Content-Type": "application/json"},
+        data=json.dumps(
+            {
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": 0.5,
+                "top_p": 0.8,
+                "penalty_score": 1,
+                "disable_search": False,
+                "enable_citation": False,
+                "response_format": "text",
+            }
+        ),
+        timeout=_timeout(),
+    ).json()
+    if response.get("error_code") in (110, 111):
+        # access_token 失效或过期：丢弃缓存，重试时重新获取
+        with _ernie_tokens_lock:
+            _ernie_tokens.pop((settings["api_key"], settings["secret_key"]), None)
+        raise _TransientError(f"[{llm_provider}] {response.get('error_msg')}")
+    return response.get("result")
+
+
+def _openai_client(llm_provider: str, settings: dict):
+    api_key, base_url = settings["api_key"], settings["base_url"]
+    if llm_provider == "azure":
+        return _get_client(
+            (llm_provider, base_url, api_key, settings["api_version"]),
+            lambda: openai.AzureOpenAI(
+                api_key=api_key,
+                api_version=settings["api_version"],
+                azure_endpoint=base_url,
+                timeout=_timeout(),
+                # 重试由 complete 统一处理
+                max_retries=0,
+            ),
+        )
+    return _get_client(
+        (llm_provider, base_url, api_key),
+        lambda: openai.OpenAI(api_key=api_key, base_url=base_url, timeout=_timeout(), max_retries=0),
+    )
+
+
+def _complete_openai(llm_provider: str, prompt: str, settings: dict) -> str:
+    client = _openai_client(llm_provider, settings)
+    response = client.chat.completions.create(
+        model=settings["model_name"], messages=[{"role": "user", "content": prompt}]
+    )
+    if not response:
+        raise Exception(
+            f"[{llm_provider}] returned an empty response, please check your network connection and try again."
+        )
+    if not isinstance(response, openai.types.chat.ChatCompletion):
+        raise Exception(
+            f'[{llm_provider}] returned an invalid response: "{response}", please check your network '
+            f"connection and try again."
+        )
+    return response.choices[0].message.content or ""
+
+
+def _complete_openai_json(llm_provider: str, prompt: str, settings: dict) -> str:
+    client = _openai_client(llm_provider, settings)
+    response = client.chat.completions.create(
+        model=settings["model_name"],
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"},
+    )
+    if not response or not response.choices:
+        raise Exception(f"[{llm_provider}] returned an empty response")
+    # JSON 字符串中的换行是转义后的 \n，保留原始内容以免破坏结构
+    return response.choices[0].message.content or ""
+
+
+def _stream_openai(llm_provider: str, prompt: str, settings: dict) -> Iterator[str]:
+    client = _openai_client(llm_provider, settings)
+    stream = client.chat.completions.create(
+        model=settings["model_name"],
+        messages=[{"role": "user", "content": prompt}],
+        stream=True,
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+# 提供商 -> 请求函数，未列出的提供商都走 OpenAI 兼容接口
+_COMPLETIONS: Dict[str, Callable[[str, str, dict], str]] = {
+    "g4f": _complete_g4f,
+    "pollinations": _complete_pollinations,
+    "qwen": _complete_qwen,
+    "gemini": _complete_gemini,
+    "cloudflare": _complete_cloudflare,
+    "ernie": _complete_ernie,
+}
+
+# 支持 JSON 输出的提供商 -> 请求函数；_COMPLETIONS 中的其它提供商不支持，OpenAI 兼容接口使用 response_format
+_JSON_COMPLETIONS: Dict[str, Callable[[str, str, dict], str]] = {
+    "gemini": _complete_gemini_json,
+}
+
+
+def supports_json_mode(llm_provider: str = "") -> bool:
+    """
+    当前（或指定的）提供商能否保证返回 JSON 对象
+    """
+    llm_provider = llm_provider or config.app.get("llm_provider", "openai")
+    return llm_provider in _JSON_COMPLETIONS or llm_provider not in _COMPLETIONS
+
+
+def _is_openai_error(e: Exception, *names: str) -> bool:
+    # openai 尚未导入时异常不可能来自 openai，不为判断异常类型而导入它
+    module = sys.modules.get("openai")
+    return module is not None and isinstance(e, tuple(getattr(module, name) for name in names))
+
+
+def _retry_delay(e: Exception, attempt: int) -> Optional[float]:
+    """
+    可以重试时返回等待的秒数（优先使用服务端的 Retry-After），不可重试时返回 None
+    """
+    response = None
+    if isinstance(e, requests.HTTPError):
+        response = e.response
+        if response is None or (response.status_code != 429 and response.status_code < 500):
+            return None
+    elif _is_openai_error(e, "RateLimitError", "InternalServerError"):
+        response = e.response
+    elif not isinstance(
+        e, (requests.ConnectionError, requests.Timeout, _TransientError)
+    ) and not _is_openai_error(e, "APIConnectionError"):
+        return None
+
+    delay = min(_backoff_max, _backoff_base * 2 ** attempt)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after:
+            return min(_backoff_max, max(0.0, float(retry_after)))
+    except ValueError:
+        pass
+    # 加入抖动，避免并发任务同时重试
+    return delay * random.uniform(0.5, 1.0)
+
+
+def complete(prompt: str, json_mode: bool = False) -> str:
+    """
+    调用当前配置的 LLM 提供商
+
+    网络错误、限流和服务端错误按指数退避重试 llm_max_retries 次，配置错误、鉴权失败等直接抛出
+
+    Args:
+        json_mode: 要求返回 JSON 对象（OpenAI 兼容接口的 JSON mode、Gemini 的 response_mime_type），
+            提供商不支持时抛出 NotImplementedError（见 supports_json_mode）
+
+    Returns:
+        响应内容
+    """
+    llm_provider = config.app.get("llm_provider", "openai")
+    logger.info(f"llm provider: {llm_provider}")
+    if json_mode and not supports_json_mode(llm_provider):
+        raise NotImplementedError(f"[{llm_provider}] does not support json output")
+    settings = _provider_settings(llm_provider)
+    if json_mode:
+        completion = _JSON_COMPLETIONS.get(llm_provider, _complete_openai_json)
+    else:
+        completion = _COMPLETIONS.get(llm_provider, _complete_openai)
 
-            response = client.chat.completions.create(
-                model=model_name, messages=[{"role": "user", "content": prompt}]
+    retries = max(0, int(config.app.get("llm_max_retries", 3)))
+    for attempt in range(retries + 1):
+        try:
+            return completion(llm_provider, prompt, settings)
+        except Exception as e:
+            delay = _retry_delay(e, attempt) if attempt < retries else None
+            if delay is None:
+                raise
+            logger.warning(
+                f"[{llm_provider}] request failed: {str(e)}, retrying in {delay:.1f}s ({attempt + 1}/{retries})"
             )
-            if response:
-                if isinstance(response, ChatCompletion):
-                    content = response.choices[0].message.content
-                else:
-                    raise Exception(
-                        f'[{llm_provider}] returned an invalid response: "{response}", please check your network '
-                        f"connection and try again."
-                    )
-            else:
-                raise Exception(
-                    f"[{llm_provider}] returned an empty response, please check your network connection and try again."
-                )
+            time.sleep(delay)
+
+
+def complete_stream(prompt: str) -> Iterator[str]:
+    """
+    流式调用当前配置的 LLM 提供商，逐块产出响应内容
+
+    只有 OpenAI 兼容接口支持流式返回，其它提供商一次性产出完整内容；
+    收到第一块内容之前的失败按 complete 的规则重试，之后的失败直接抛出（已产出的内容无法撤回）
+    """
+    llm_provider = config.app.get("llm_provider", "openai")
+    if llm_provider in _COMPLETIONS:
+        yield complete(prompt)
+        return
+
+    logger.info(f"llm provider: {llm_provider} (streaming)")
+    settings = _provider_settings(llm_provider)
+    retries = max(0, int(config.app.get("llm_max_retries", 3)))
+    for attempt in range(retries + 1):
+        stream = _stream_openai(llm_provider, prompt, settings)
+        try:
+            first = next(stream, None)
+            break
+        except Exception as e:
+            delay = _retry_delay(e, attempt) if attempt < retries else None
+            if delay is None:
+                raise
+            logger.warning(
+                f"[{llm_provider}] request failed: {str(e)}, retrying in {delay:.1f}s ({attempt + 1}/{retries})"
+            )
+            time.sleep(delay)
 
-        return content.replace("\n", "")
-    except Exception as e:
-        return f"Error: {str(e)}"
+    if first is None:
+        return
+    yield first
+    yield from stream
 
 
-def generate_script(
-    video_subject: str, language: str = "", paragraph_number: int = 1, video_duration: int = 60
+def _script_prompt(
+    video_subject: str, language: str, paragraph_number: int, video_duration: int
 ) -> str:
     # 根据时长计算建议字数（中文按每秒3-4字，英文按每秒2-3词）
     suggested_words = video_duration * 3
@@ -377,34 +693,68 @@ Generate a script for a video of EXACTLY {video_duration} seconds.
 """.strip()
     if language:
         prompt += f"\n- language: {language}"
+    return prompt
 
-    final_script = ""
-    logger.info(f"subject: {video_subject}")
 
-    def format_response(response):
-        # Clean the script
-        # Remove asterisks, hashes
-        response = response.replace("*", "")
-        response = response.replace("#", "")
+def _format_response(response: str) -> str:
+    # Clean the script
+    # Remove asterisks, hashes
+    response = response.replace("*", "")
+    response = response.replace("#", "")
+
+    # Remove markdown syntax
+    response = re.sub(r"\[.*\]", "", response)
+    response = re.sub(r"\(.*\)", "", response)
+
+    # Split the script into paragraphs
+    paragraphs = response.split("\n\n")
+
+    # Select the specified number of paragraphs
+    # selected_paragraphs = paragraphs[:paragraph_number]
 
-        # Remove markdown syntax
-        response = re.sub(r"\[.*\]", "", response)
-        response = re.sub(r"\(.*\)", "", response)
+    # Join the selected paragraphs into a single string
+    return "\n\n".join(paragraphs)
 
-        # Split the script into paragraphs
-        paragraphs = response.split("\n\n")
 
-        # Select the specified number of paragraphs
-        # selected_paragraphs = paragraphs[:paragraph_number]
+def _split_paragraphs(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    把流式返回的内容块重新切分为段落：遇到换行即产出之前的完整段落，空行被跳过
+    """
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            paragraph = _format_response(line).strip()
+            if paragraph:
+                yield paragraph
+    paragraph = _format_response(buffer).strip()
+    if paragraph:
+        yield paragraph
 
-        # Join the selected paragraphs into a single string
-        return "\n\n".join(paragraphs)
 
-    for i in range(_max_retries):
+def generate_script(
+    video_subject: str,
+    language: str = "",
+    paragraph_number: int = 1,
+    video_duration: int = 60,
+    use_cache: bool = True,
+) -> str:
+    """
+    Args:
+        use_cache: 为 False 时不读取缓存（用户主动要求重新生成时），新结果仍会写入缓存
+    """
+    prompt = _script_prompt(video_subject, language, paragraph_number, video_duration)
+    final_script = ""
+    logger.info(f"subject: {video_subject}")
+
+    for i in range(_max_content_retries):
         try:
-            response = _generate_response(prompt=prompt)
+            # 重试时不再使用缓存的结果
+            response = _generate_response(prompt=prompt, use_cache=use_cache and i == 0)
             if response:
-                final_script = format_response(response)
+                # 与 generate_script_stream 相同的分段方式，两种调用方式得到相同的文案
+                final_script = "\n\n".join(_split_paragraphs([response]))
             else:
                 logging.error("gpt returned an empty response")
 
@@ -417,7 +767,7 @@ Generate a script for a video of EXACTLY {video_duration} seconds.
         except Exception as e:
             logger.error(f"failed to generate script: {e}")
 
-        if i < _max_retries:
+        if i + 1 < _max_content_retries:
             logger.warning(f"failed to generate video script, trying again... {i + 1}")
     if "Error: " in final_script:
         logger.error(f"failed to generate video script: {final_script}")
@@ -426,7 +776,35 @@ Generate a script for a video of EXACTLY {video_duration} seconds.
     return final_script.strip()
 
 
-def generate_terms(video_subject: str, video_script: str, amount: int = 5) -> List[str]:
+def generate_script_stream(
+    video_subject: str, language: str = "", paragraph_number: int = 1, video_duration: int = 60
+) -> Iterator[str]:
+    """
+    与 generate_script 相同，但逐段产出文案：提供商每返回一个完整段落就立即产出，
+    调用方可以在文案生成的同时开始合成语音（见 tts_engine.tts_stream）
+
+    流式结果不读写响应缓存；生成失败时抛出异常
+    """
+    prompt = _script_prompt(video_subject, language, paragraph_number, video_duration)
+    logger.info(f"subject: {video_subject}")
+
+    paragraphs = []
+    for paragraph in _split_paragraphs(complete_stream(prompt)):
+        # g4f may return an error message
+        if "当日额度已消耗完" in paragraph or paragraph.startswith("Error: "):
+            raise ValueError(paragraph)
+        paragraphs.append(paragraph)
+        yield paragraph
+
+    if not paragraphs:
+        raise ValueError("llm returned an empty script")
+    video_script = "\n\n".join(paragraphs)
+    logger.success(f"completed: \n{video_script}")
+
+
+def generate_terms(
+    video_subject: str, video_script: str, amount: int = 5, use_cache: bool = True
+) -> List[str]:
     prompt = f"""
 # Role: Video Search Terms Generator
 
@@ -457,9 +835,9 @@ Please note that you must use English for generating video search terms; Chinese
 
     search_terms = []
     response = ""
-    for i in range(_max_retries):
+    for i in range(_max_content_retries):
         try:
-            response = _generate_response(prompt)
+            response = _generate_response(prompt, use_cache=use_cache and i == 0)
             if "Error: " in response:
                 logger.error(f"failed to generate video script: {response}")
                 return response
@@ -473,7 +851,7 @@ Please note that you must use English for generating video search terms; Chinese
         except Exception as e:
             logger.warning(f"failed to generate video terms: {str(e)}")
             if response:
-                match = re.search(r"\[.*]", response)
+                match = re.search(r"\[.*]", response, re.DOTALL)
                 if match:
                     try:
                         search_terms = json.loads(match.group())
@@ -483,13 +861,70 @@ Please note that you must use English for generating video search terms; Chinese
 
         if search_terms and len(search_terms) > 0:
             break
-        if i < _max_retries:
+        if i + 1 < _max_content_retries:
             logger.warning(f"failed to generate video terms, trying again... {i + 1}")
 
     logger.success(f"completed: \n{search_terms}")
     return search_terms
 
 
+def generate_script_and_terms(
+    video_subject: str,
+    language: str = "",
+    paragraph_number: int = 1,
+    video_duration: int = 60,
+    amount: int = 5,
+) -> Optional[Tuple[str, List[str]]]:
+    """
+    一次结构化输出（JSON mode）同时生成文案和搜索关键词，不需要再把整篇文案发送给 generate_terms
+
+    Returns:
+        (script, search_terms)；提供商不支持 JSON 输出、请求失败或返回内容不符合要求时返回 None，
+        由调用方回退到 generate_script + generate_terms
+    """
+    llm_provider = config.app.get("llm_provider", "openai")
+    if not supports_json_mode(llm_provider):
+        logger.info(f"[{llm_provider}] does not support json output")
+        return None
+
+    prompt = _script_prompt(video_subject, language, paragraph_number, video_duration)
+    prompt += f"""
+
+## Output Format:
+Respond with a JSON object with exactly two keys, and nothing else:
+- "script": the script described above as a single string, paragraphs separated by "\\n\\n".
+- "search_terms": a JSON array of {amount} search terms for stock videos. Each search term consists of 1-3 English words \
+and always includes the main subject of the video. Chinese is not accepted.
+
+## Output Example:
+{{"script": "...", "search_terms": ["search term 1", "search term 2", "search term 3"]}}"""
+    logger.info(f"subject: {video_subject}")
+
+    response = _generate_response(prompt, json_mode=True)
+    if response.startswith("Error: "):
+        logger.warning(f"failed to generate video script and terms: {response}")
+        return None
+    try:
+        result = json.loads(response)
+    except ValueError as e:
+        logger.warning(f"failed to generate video script and terms: {str(e)}")
+        return None
+
+    script = result.get("script") if isinstance(result, dict) else None
+    search_terms = result.get("search_terms") if isinstance(result, dict) else None
+    if not isinstance(script, str) or not isinstance(search_terms, list):
+        logger.warning("response is not an object with script and search_terms")
+        return None
+    script = _format_response(script).strip()
+    search_terms = [term.strip() for term in search_terms if isinstance(term, str) and term.strip()]
+    if not script or not search_terms:
+        logger.warning("response contains an empty script or no search terms")
+        return None
+
+    logger.success(f"completed: \n{script}\n{search_terms}")
+    return script, search_terms[:amount]
+
+
 if __name__ == "__main__":
     video_subject = "生命的意义是什么"
     script = generate_script(
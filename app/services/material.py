@@ -5,10 +5,10 @@ from urllib.parse import urlencode
 
 import requests
 from loguru import logger
-from moviepy.video.io.VideoFileClip import VideoFileClip
 
 from app.config import config
 from app.models.schema import MaterialInfo, VideoAspect, VideoConcatMode
+from app.services import media_probe
 from app.utils import utils
 
 requested_count = 0
@@ -223,19 +223,14 @@ def save_video(video_url: str, save_dir: str = "") -> str:
         )
 
     if os.path.exists(video_path) and os.path.getsize(video_path) > 0:
+        info = media_probe.probe(video_path)
+        if info and info.duration > 0 and info.fps > 0:
+            return video_path
         try:
-            clip = VideoFileClip(video_path)
-            duration = clip.duration
-            fps = clip.fps
-            clip.close()
-            if duration > 0 and fps > 0:
-                return video_path
-        except Exception as e:
-            try:
-                os.remove(video_path)
-            except Exception:
-                pass
-            logger.warning(f"invalid video file: {video_path} => {str(e)}")
+            os.remove(video_path)
+        except Exception:
+            pass
+        logger.warning(f"invalid video file: {video_path}")
     return ""
 
 
@@ -0,0 +1,350 @@
+"""
+媒体元数据探测服务 - 单次ffprobe调用 + 磁盘缓存
+
+所有素材/音频的时长、分辨率、帧率、编码等信息都通过这里获取：
+1. 一次 ffprobe JSON 调用同时拿到容器、视频流、音频流信息
+2. 结果按 (路径, 文件大小, 修改时间) 缓存到磁盘，文件未变化时不再启动子进程
+3. 缓存文件批量写入：与磁盘上的内容合并后写入临时文件再原子替换，多进程共用时不会互相覆盖
+"""
+import atexit
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from typing import Optional
+
+from loguru import logger
+
+from app.utils import utils
+
+# 缓存条目上限，超出后淘汰最早写入的条目
+_max_cache_entries = 5000
+# 两次写缓存文件的最小间隔（秒），期间的新条目在下次写入或进程退出时一起保存
+_save_interval = 5.0
+
+_cache = None
+_cache_lock = threading.Lock()
+# 写缓存文件的锁，写文件期间不阻塞 _cache_lock 上的读取
+_save_lock = threading.Lock()
+_dirty = False
+_last_save = 0.0
+_ffprobe_path = None
+
+
+@dataclass
+class MediaInfo:
+    path: str = ""
+    duration: float = 0.0
+    format_name: str = ""
+    video_codec: str = ""
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    pix_fmt: str = ""
+    sar: str = ""  # 像素宽高比（sample_aspect_ratio），如 "1:1"，未标注时为空
+    profile: str = ""  # 编码 profile，如 H.264 的 "High"
+    level: int = 0  # 编码 level，如 H.264 的 40（4.0）
+    audio_codec: str = ""
+    audio_channels: int = 0
+    channel_layout: str = ""
+    sample_rate: int = 0
+    stream_count: int = 0
+
+    @property
+    def has_video(self) -> bool:
+        return bool(self.video_codec)
+
+    @property
+    def has_audio(self) -> bool:
+        return bool(self.audio_codec)
+
+
+def find_ffprobe() -> Optional[str]:
+    """
+    查找ffprobe可执行文件：优先系统PATH，其次与ffmpeg同目录
+    """
+    global _ffprobe_path
+    if _ffprobe_path:
+        return _ffprobe_path
+
+    ffprobe_path = shutil.which("ffprobe")
+    if not ffprobe_path:
+        from app.services.video_fast import find_ffmpeg
+
+        ffmpeg_path = find_ffmpeg()
+        if ffmpeg_path and os.path.isabs(ffmpeg_path):
+            name = "ffprobe.exe" if os.name == "nt" else "ffprobe"
+            candidate = os.path.join(os.path.dirname(ffmpeg_path), name)
+            if os.path.isfile(candidate):
+                ffprobe_path = candidate
+
+    _ffprobe_path = ffprobe_path
+    return ffprobe_path
+
+
+_INFO_FIELDS = {f.name for f in fields(MediaInfo)}
+
+
+def _parse_rate(rate: str) -> float:
+    # r_frame_rate 形如 "30000/1001"
+    if not rate:
+        return 0.0
+    try:
+        if "/" in rate:
+            num, den = rate.split("/", 1)
+            den = float(den)
+            return float(num) / den if den else 0.0
+        return float(rate)
+    except ValueError:
+        return 0.0
+
+
+def parse_probe_output(path: str, output: str) -> MediaInfo:
+    """
+    解析 ffprobe -show_format -show_streams -of json 的输出
+    """
+    data = json.loads(output or "{}")
+    info = MediaInfo(path=path)
+
+    fmt = data.get("format", {})
+    info.format_name = fmt.get("format_name", "")
+    try:
+        info.duration = float(fmt.get("duration", 0) or 0)
+    except ValueError:
+        info.duration = 0.0
+
+    streams = data.get("streams", [])
+    info.stream_count = len(streams)
+    for stream in streams:
+        codec_type = stream.get("codec_type")
+        if codec_type == "video" and not info.video_codec:
+            # 封面图（attached_pic）不是真正的视频流
+            if stream.get("disposition", {}).get("attached_pic"):
+                continue
+            info.video_codec = stream.get("codec_name", "")
+            info.width = int(stream.get("width", 0) or 0)
+            info.height = int(stream.get("height", 0) or 0)
+            info.pix_fmt = stream.get("pix_fmt", "")
+            sar = stream.get("sample_aspect_ratio", "")
+            info.sar = "" if sar in ("0:1", "N/A") else sar
+            info.profile = stream.get("profile", "")
+            try:
+                info.level = int(stream.get("level", 0) or 0)
+            except (TypeError, ValueError):
+                info.level = 0
+            info.fps = _parse_rate(stream.get("avg_frame_rate", "")) or _parse_rate(
+                stream.get("r_frame_rate", "")
+            )
+            if not info.duration:
+                try:
+                    info.duration = float(stream.get("duration", 0) or 0)
+                except ValueError:
+                    pass
+        elif codec_type == "audio" and not info.audio_codec:
+            info.audio_codec = stream.get("codec_name", "")
+            info.audio_channels = int(stream.get("channels", 0) or 0)
+            info.channel_layout = stream.get("channel_layout", "")
+            info.sample_rate = int(stream.get("sample_rate", 0) or 0)
+            if not info.duration:
+                try:
+                    info.duration = float(stream.get("duration", 0) or 0)
+                except ValueError:
+                    pass
+    return info
+
+
+def _cache_file() -> str:
+    return os.path.join(utils.storage_dir("cache", create=True), "media_probe.json")
+
+
+def _read_cache_file(cache_file: str) -> dict:
+    if not os.path.isfile(cache_file):
+        return {}
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception as e:
+        logger.warning(f"failed to load media probe cache: {str(e)}")
+        return {}
+
+
+def _load_cache() -> dict:
+    global _cache
+    if _cache is None:
+        _cache = _read_cache_file(_cache_file())
+    return _cache
+
+
+def _save_cache(force: bool = False):
+    """
+    把内存中的缓存写入磁盘（调用时不能持有 _cache_lock）
+
+    距离上次写入不足 _save_interval 秒时跳过（force=True 除外），新条目留到下次写入；
+    写入前与磁盘上的内容合并，保留其他进程写入的条目
+    """
+    global _dirty, _last_save
+    with _save_lock:
+        with _cache_lock:
+            if not _dirty or (not force and time.monotonic() - _last_save < _save_interval):
+                return
+            snapshot = dict(_cache)
+            _dirty = False
+            _last_save = time.monotonic()
+
+        cache_file = _cache_file()
+        merged = {
+            k: v for k, v in _read_cache_file(cache_file).items() if k not in snapshot
+        }
+        merged.update(snapshot)
+        while len(merged) > _max_cache_entries:
+            merged.pop(next(iter(merged)))
+
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(temp_file, "w", encoding="utf-8") as f:
+                json.dump(merged, f, ensure_ascii=False)
+            os.replace(temp_file, cache_file)
+        except Exception as e:
+            logger.warning(f"failed to save media probe cache: {str(e)}")
+            with _cache_lock:
+                _dirty = True
+            return
+
+        # 其他进程写入的条目也加入内存缓存
+        with _cache_lock:
+            for k, v in merged.items():
+                _cache.setdefault(k, v)
+
+
+atexit.register(_save_cache, force=True)
+
+
+def _run_ffprobe(path: str) -> Optional[MediaInfo]:
+    ffprobe_path = find_ffprobe()
+    if not ffprobe_path:
+        return None
+
+    cmd = [
+        ffprobe_path,
+        "-v", "error",
+        "-show_format",
+        "-show_streams",
+        "-of", "json",
+        path,
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        logger.warning(f"ffprobe failed: {path} => {str(e)}")
+        return None
+
+    if result.returncode != 0:
+        logger.warning(f"ffprobe failed: {path} => {result.stderr.strip()}")
+        return None
+    return parse_probe_output(path, result.stdout)
+
+
+def _probe_with_moviepy(path: str) -> Optional[MediaInfo]:
+    """
+    没有ffprobe时的回退方案（只能拿到部分信息）
+    """
+    ext = utils.parse_extension(path)
+    try:
+        if ext in ("mp3", "wav", "m4a", "aac", "flac", "ogg"):
+            from moviepy import AudioFileClip
+
+            clip = AudioFileClip(path)
+            info = MediaInfo(
+                path=path,
+                duration=clip.duration or 0.0,
+                audio_codec=ext,
+                audio_channels=clip.nchannels,
+                sample_rate=clip.fps,
+            )
+            clip.close()
+            return info
+
+        from moviepy import VideoFileClip
+
+        clip = VideoFileClip(path)
+        info = MediaInfo(
+            path=path,
+            duration=clip.duration or 0.0,
+            video_codec=clip.reader.infos.get("video_codec_name", "") or "unknown",
+            width=clip.w,
+            height=clip.h,
+            fps=clip.fps or 0.0,
+            audio_codec="unknown" if clip.audio is not None else "",
+        )
+        clip.close()
+        return info
+    except Exception as e:
+        logger.warning(f"failed to probe media: {path} => {str(e)}")
+        return None
+
+
+def probe(path: str, use_cache: bool = True) -> Optional[MediaInfo]:
+    """
+    获取媒体文件的元数据
+
+    Args:
+        path: 媒体文件路径
+        use_cache: 是否使用磁盘缓存
+
+    Returns:
+        MediaInfo，文件不存在或无法解析时返回None
+    """
+    global _dirty
+    if not path or not os.path.isfile(path):
+        return None
+
+    abs_path = os.path.abspath(path)
+    stat = os.stat(abs_path)
+
+    if use_cache:
+        with _cache_lock:
+            entry = _load_cache().get(abs_path)
+        if (
+            entry
+            and entry.get("size") == stat.st_size
+            and entry.get("mtime") == stat.st_mtime_ns
+            # 旧版本写入的条目缺少新增字段，需要重新探测
+            and set(entry.get("info", {})) == _INFO_FIELDS
+        ):
+            return MediaInfo(**entry["info"])
+
+    info = _run_ffprobe(abs_path)
+    if info is None:
+        # 回退方案的结果不完整，不写入缓存
+        return _probe_with_moviepy(abs_path)
+
+    if use_cache:
+        with _cache_lock:
+            cache = _load_cache()
+            cache.pop(abs_path, None)
+            cache[abs_path] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "info": asdict(info),
+            }
+            while len(cache) > _max_cache_entries:
+                cache.pop(next(iter(cache)))
+            _dirty = True
+        _save_cache()
+    return info
+
+
+def get_duration(path: str) -> float:
+    info = probe(path)
+    return info.duration if info else 0.0
+
+
+if __name__ == "__main__":
+    import sys
+
+    for _path in sys.argv[1:]:
+        print(probe(_path))
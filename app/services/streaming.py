@@ -0,0 +1,189 @@
+"""
+帧流式传输 - 把一个阶段产生的帧直接通过管道送给下一个阶段的 ffmpeg 编码器
+
+相比 "写临时文件 -> 再读回来"：
+1. 中间视频不落盘，减少磁盘（尤其是网络存储）读写
+2. 帧的生成（MoviePy 合成）与编码并行进行，缩短端到端耗时
+3. 使用有界队列缓冲，生产者过快时会阻塞，内存占用可控
+"""
+import queue
+import subprocess
+import threading
+from typing import List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import config
+
+_SENTINEL = None
+
+
+class FrameSink:
+    """
+    ffmpeg rawvideo 管道：write() 写入 RGB(A) 帧，后台线程负责把帧写入 ffmpeg stdin
+
+    用法：
+        with FrameSink(output, (w, h), fps, video_args) as sink:
+            for frame in clip.iter_frames(fps=fps, dtype="uint8"):
+                sink.write(frame)
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        size: Tuple[int, int],
+        fps: float,
+        video_args: List[str],
+        inputs: Optional[List[str]] = None,
+        output_args: Optional[List[str]] = None,
+        buffer_frames: int = 0,
+        pix_fmt: str = "rgb24",
+    ):
+        """
+        Args:
+            output_path: 输出文件
+            size: (width, height)
+            fps: 帧率
+            video_args: 视频编码参数，如 encoder.ffmpeg_args()
+            inputs: 额外的输入（音频等），如 ['-i', 'audio.mp3']，管道固定为第 0 路输入
+            output_args: 其他输出参数（-map、音频编码、-shortest 等）
+            buffer_frames: 队列中最多缓冲的帧数，0 表示使用配置 stream_buffer_frames
+            pix_fmt: 写入帧的像素格式，rgb24 或带透明通道的 rgba
+        """
+        from app.services.video_fast import find_ffmpeg
+
+        ffmpeg_path = find_ffmpeg()
+        if not ffmpeg_path:
+            raise RuntimeError("ffmpeg not found")
+
+        width, height = size
+        self.output_path = output_path
+        self.frame_count = 0
+        self._error = None
+        self._closed = False
+        if buffer_frames <= 0:
+            buffer_frames = config.app.get("stream_buffer_frames", 16)
+        self._queue = queue.Queue(maxsize=max(1, buffer_frames))
+
+        cmd = [
+            ffmpeg_path,
+            "-y",
+            "-loglevel", "error",
+            "-f", "rawvideo",
+            "-pix_fmt", pix_fmt,
+            "-s", f"{width}x{height}",
+            "-r", str(fps),
+            "-i", "-",
+            *(inputs or []),
+            *video_args,
+            *(output_args or []),
+            output_path,
+        ]
+        logger.debug(f"frame sink: {' '.join(cmd)}")
+        self._proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        # stderr 需要持续读取，否则缓冲区写满会阻塞 ffmpeg
+        self._stderr = []
+        self._stderr_thread = threading.Thread(target=self._read_stderr, daemon=True)
+        self._stderr_thread.start()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _read_stderr(self):
+        for line in iter(self._proc.stderr.readline, b""):
+            self._stderr.append(line.decode("utf-8", errors="ignore"))
+
+    def _write_loop(self):
+        while True:
+            frame = self._queue.get()
+            if frame is _SENTINEL:
+                break
+            if self._error is not None:
+                # 出错后继续消费队列，避免生产者阻塞
+                continue
+            try:
+                self._proc.stdin.write(frame.tobytes())
+            except Exception as e:
+                self._error = e
+        try:
+            self._proc.stdin.close()
+        except Exception:
+            pass
+
+    def write(self, frame):
+        if self._error is not None:
+            raise RuntimeError(f"ffmpeg pipe closed: {self.stderr or self._error}")
+        self._queue.put(frame)
+        self.frame_count += 1
+
+    @property
+    def stderr(self) -> str:
+        return "".join(self._stderr[-20:]).strip()
+
+    def close(self) -> bool:
+        """
+        结束写入并等待 ffmpeg 退出
+
+        Returns:
+            是否成功生成输出文件
+        """
+        if self._closed:
+            return self._proc.returncode == 0 and self._error is None
+        self._closed = True
+        self._queue.put(_SENTINEL)
+        self._writer.join()
+        self._proc.wait()
+        self._stderr_thread.join(timeout=5)
+        if self._proc.returncode != 0 or self._error is not None:
+            logger.error(f"frame sink failed: {self.output_path}, {self.stderr or self._error}")
+            return False
+        return True
+
+    def abort(self):
+        if not self._closed:
+            self._proc.kill()
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.abort()
+            return False
+        self.close()
+        return False
+
+
+def write_clip(
+    clip,
+    output_path: str,
+    fps: float,
+    video_args: List[str],
+    inputs: Optional[List[str]] = None,
+    output_args: Optional[List[str]] = None,
+) -> bool:
+    """
+    把 MoviePy clip 的画面通过管道直接编码输出（不经过临时文件）
+
+    音频不从 clip 读取，需要时通过 inputs/output_args 交给 ffmpeg 直接处理
+
+    Returns:
+        是否成功
+    """
+    width, height = clip.size
+    with FrameSink(
+        output_path,
+        (width, height),
+        fps,
+        video_args,
+        inputs=inputs,
+        output_args=output_args,
+    ) as sink:
+        for frame in clip.iter_frames(fps=fps, dtype="uint8"):
+            sink.write(frame[:, :, :3])
+    return sink.close()
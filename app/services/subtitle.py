@@ -1,63 +1,40 @@
+import difflib
 import json
-import os.path
 import re
 from timeit import default_timer as timer
+from typing import List, Optional, Tuple
 
-from faster_whisper import WhisperModel
 from loguru import logger
 
-from app.config import config
+from app.services import subtitle_model, whisper_engine
 from app.utils import utils
 
-model_size = config.whisper.get("model_size", "large-v3")
-device = config.whisper.get("device", "cpu")
-compute_type = config.whisper.get("compute_type", "int8")
-model = None
-
-
-def create(audio_file, subtitle_file: str = ""):
-    global model
-    if not model:
-        model_path = f"{utils.root_dir()}/models/whisper-{model_size}"
-        model_bin_file = f"{model_path}/model.bin"
-        if not os.path.isdir(model_path) or not os.path.isfile(model_bin_file):
-            model_path = model_size
-
-        logger.info(
-            f"loading model: {model_path}, device: {device}, compute_type: {compute_type}"
-        )
-        try:
-            model = WhisperModel(
-                model_size_or_path=model_path, device=device, compute_type=compute_type
-            )
-        except Exception as e:
-            logger.error(
-                f"failed to load model: {e} \n\n"
-                f"********************************************\n"
-                f"this may be caused by network issue. \n"
-                f"please download the model manually and put it in the 'models' folder. \n"
-                f"see [README.md FAQ](https://github.com/harry0703/MoneyPrinterTurbo) for more details.\n"
-                f"********************************************\n\n"
-            )
-            return None
 
+def create(
+    audio_file,
+    subtitle_file: str = "",
+    beam_size: int = None,
+    compute_type: str = None,
+    batch_size: int = None,
+):
+    """
+    使用 whisper 识别音频生成字幕，beam_size / compute_type / batch_size 为空时使用配置 [whisper]
+    """
     logger.info(f"start, output file: {subtitle_file}")
     if not subtitle_file:
         subtitle_file = f"{audio_file}.srt"
 
-    segments, info = model.transcribe(
+    start = timer()
+    result = whisper_engine.transcribe(
         audio_file,
-        beam_size=5,
-        word_timestamps=True,
-        vad_filter=True,
-        vad_parameters=dict(min_silence_duration_ms=500),
+        beam_size=beam_size,
+        compute_type=compute_type,
+        batch_size=batch_size,
     )
+    if result is None:
+        return None
+    segments, info = result
 
-    logger.info(
-        f"detected language: '{info.language}', probability: {info.language_probability:.2f}"
-    )
-
-    start = timer()
     subtitles = []
 
     def recognized(seg_text, seg_start, seg_end):
@@ -136,138 +113,325 @@ def create(audio_file, subtitle_file: str = ""):
     logger.info(f"subtitle file created: {subtitle_file}")
 
 
-def file_to_subtitles(filename):
-    if not filename or not os.path.isfile(filename):
-        return []
-
-    times_texts = []
-    current_times = None
-    current_text = ""
-    index = 0
-    with open(filename, "r", encoding="utf-8") as f:
-        for line in f:
-            times = re.findall("([0-9]*:[0-9]*:[0-9]*,[0-9]*)", line)
-            if times:
-                current_times = line
-            elif line.strip() == "" and current_times:
-                index += 1
-                times_texts.append((index, current_times.strip(), current_text.strip()))
-                current_times, current_text = None, ""
-            elif current_times:
-                current_text += line
-    return times_texts
-
-
-def levenshtein_distance(s1, s2):
-    if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
+# 对齐时的最小比较单位：中日韩文字逐字比较，其他语言按单词比较
+_CJK = "\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af"
+_TOKEN_PATTERN = re.compile(f"[{_CJK}]|[^\\W_{_CJK}]+")
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def align_words(
+    script_lines: List[str], words: List[Tuple[str, float, float]]
+) -> List[Tuple[float, float]]:
+    """
+    把已知的文案对齐到识别出的逐词时间戳上
+
+    文案和识别结果都切成比较单位后做一次全局序列匹配（difflib），每行文案的时间取其匹配上的第一个和最后一个单位；
+    整行都没有匹配上（例如数字读法不同）时，按字数在相邻两行之间插值
+
+    Args:
+        script_lines: 文案（已按标点分行）
+        words: 识别结果 [(word, start, end)]
+
+    Returns:
+        每行文案的 (start, end)，单位秒
+    """
+    # 识别结果：一个词包含多个单位时按单位数平分词的时长
+    rec_tokens, rec_times = [], []
+    for word, start, end in words:
+        tokens = _tokens(word)
+        for k, token in enumerate(tokens):
+            step = (end - start) / len(tokens)
+            rec_tokens.append(token)
+            rec_times.append((start + step * k, start + step * (k + 1)))
+
+    script_tokens, line_ranges = [], []
+    for line in script_lines:
+        tokens = _tokens(line)
+        line_ranges.append((len(script_tokens), len(script_tokens) + len(tokens)))
+        script_tokens.extend(tokens)
+
+    mapped = [None] * len(script_tokens)
+    matcher = difflib.SequenceMatcher(None, script_tokens, rec_tokens, autojunk=False)
+    for a, b, size in matcher.get_matching_blocks():
+        for i in range(size):
+            mapped[a + i] = b + i
+
+    timings: List[Optional[Tuple[float, float]]] = []
+    for first, last in line_ranges:
+        matched = [mapped[i] for i in range(first, last) if mapped[i] is not None]
+        if matched:
+            timings.append((rec_times[matched[0]][0], rec_times[matched[-1]][1]))
+        else:
+            timings.append(None)
+
+    # 没有匹配上的行：在前后两行之间按字数分配时间
+    total_end = rec_times[-1][1] if rec_times else 0.0
+    i = 0
+    while i < len(timings):
+        if timings[i] is not None:
+            i += 1
+            continue
+        j = i
+        while j < len(timings) and timings[j] is None:
+            j += 1
+        gap_start = timings[i - 1][1] if i > 0 else 0.0
+        gap_end = timings[j][0] if j < len(timings) else total_end
+        gap_end = max(gap_start, gap_end)
+        lengths = [max(1, line_ranges[k][1] - line_ranges[k][0]) for k in range(i, j)]
+        cursor = gap_start
+        for k, length in zip(range(i, j), lengths):
+            span = (gap_end - gap_start) * length / sum(lengths)
+            timings[k] = (cursor, cursor + span)
+            cursor += span
+        i = j
+
+    # 保证时间轴单调不重叠
+    result = []
+    previous_end = 0.0
+    for start, end in timings:
+        start = max(start, previous_end)
+        end = max(end, start)
+        result.append((start, end))
+        previous_end = end
+    return result
+
+
+def align(
+    audio_file: str, video_script: str, subtitle_file: str = "", language: str = None
+):
+    """
+    已知文案时生成字幕：用 whisper 的逐词时间戳（贪心解码，不做束搜索）把文案对齐到音频上，
+    字幕文本直接使用文案，不需要再做识别结果的校正
+
+    Returns:
+        字幕文件路径，识别失败返回 None
+    """
+    if not subtitle_file:
+        subtitle_file = f"{audio_file}.srt"
+    script_lines = [
+        line for line in utils.split_string_by_punctuations(video_script) if _tokens(line)
+    ]
+    if not script_lines:
+        logger.error("failed to align subtitle, video script is empty")
+        return None
 
-    if len(s2) == 0:
-        return len(s1)
+    start = timer()
+    result = whisper_engine.transcribe(
+        audio_file, beam_size=1, language=whisper_engine.language_code(language)
+    )
+    if result is None:
+        return None
+    segments, _ = result
+    words = [
+        (word.word, word.start, word.end)
+        for segment in segments
+        for word in (segment.words or [])
+    ]
+    if not words:
+        logger.error(f"failed to align subtitle, no speech recognized: {audio_file}")
+        return None
+
+    timings = align_words(script_lines, words)
+    lines = [
+        utils.text_to_srt(idx, line, line_start, line_end)
+        for idx, (line, (line_start, line_end)) in enumerate(
+            zip(script_lines, timings), start=1
+        )
+    ]
+    with open(subtitle_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    logger.info(
+        f"subtitle aligned: {subtitle_file}, lines: {len(lines)}, elapsed: {timer() - start:.2f}s"
+    )
+    return subtitle_file
 
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
 
-    return previous_row[-1]
+def file_to_subtitles(filename):
+    """
+    [(序号, "00:00:01,000 --> 00:00:02,000", 文本), ...]，解析结果与各渲染路径共用（见 subtitle_model）
+    """
+    track = subtitle_model.load(filename)
+    return [
+        (
+            i,
+            f"{subtitle_model.format_timestamp(start)} --> {subtitle_model.format_timestamp(end)}",
+            text,
+        )
+        for i, (start, end, text) in enumerate(
+            zip(track.starts.tolist(), track.ends.tolist(), track.texts), start=1
+        )
+    ]
+
 
+def levenshtein_distance(s1, s2, max_distance: Optional[int] = None) -> int:
+    """
+    编辑距离，使用位并行算法（Myers / Hyyrö）：较短的字符串作为位向量，每个字符只需常数次整数运算
 
-def similarity(a, b):
-    distance = levenshtein_distance(a.lower(), b.lower())
+    Args:
+        max_distance: 距离上限，确定超过上限时提前结束并返回 max_distance + 1
+    """
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if max_distance is not None and len(s1) - len(s2) > max_distance:
+        return max_distance + 1
+    if not s2:
+        return len(s1)
+
+    m = len(s2)
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    peq = {}
+    for i, c in enumerate(s2):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    pv, mv, score = mask, 0, m
+    remaining = len(s1)
+    for c in s1:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        remaining -= 1
+        # 之后每个字符最多使距离减 1
+        if max_distance is not None and score - remaining > max_distance:
+            return max_distance + 1
+    return score
+
+
+def similarity(a, b, threshold: float = 0) -> float:
+    """
+    相似度 1 - 编辑距离 / 较长字符串长度；指定 threshold 时，低于阈值的结果不精确计算（返回 0）
+    """
     max_length = max(len(a), len(b))
+    if max_length == 0:
+        return 1.0
+    # 加上微小的容差，避免 (1 - 0.8) * 5 这类浮点误差把边界值舍掉
+    max_distance = int((1 - threshold) * max_length + 1e-9) if threshold > 0 else None
+    distance = levenshtein_distance(a.lower(), b.lower(), max_distance)
+    if max_distance is not None and distance > max_distance:
+        return 0.0
     return 1 - (distance / max_length)
 
 
+def align_lines(
+    script_lines: List[str],
+    subtitle_lines: List[str],
+    threshold: float = 0.8,
+    max_merge: int = 4,
+) -> List[Optional[Tuple[int, int]]]:
+    """
+    文案各行与识别出的字幕行做一次全局序列对齐（动态规划，只计算对角线附近的带状区域）
+
+    每行文案可以对应连续的 1~max_merge 条字幕（合并），也可以没有对应的字幕；多余的字幕被丢弃。
+    代价：相似度不低于 threshold 时为 1 - 相似度，否则按不匹配计 1；文案行没有对应字幕计 1，
+    丢弃一条字幕计 0.5（低于不匹配的代价，识别出的杂音不会被合并进相邻的行）
+
+    Returns:
+        每行文案对应的字幕区间 [start, end)，没有对应字幕时为 None
+    """
+    n, m = len(script_lines), len(subtitle_lines)
+    band = max(8, abs(n - m) + 4)
+
+    def in_band(i, j):
+        center = i * m / n if n else 0
+        return abs(j - center) <= band
+
+    def pair_cost(i, j, k):
+        merged = " ".join(subtitle_lines[j:k])
+        score = similarity(script_lines[i], merged, threshold)
+        return 1 - score if score >= threshold else 1.0
+
+    # best[(i, j)] = (代价, 上一个状态, 当前行对应的字幕区间)
+    best = {(0, 0): (0.0, None, None)}
+    for i in range(n + 1):
+        for j in range(m + 1):
+            state = best.get((i, j))
+            if state is None or not in_band(i, j):
+                continue
+            cost = state[0]
+            moves = []
+            if i < n:
+                # 文案行没有对应的字幕
+                moves.append(((i + 1, j), cost + 1, None))
+            if j < m:
+                # 丢弃多余的字幕
+                moves.append(((i, j + 1), cost + 0.5, None))
+            if i < n:
+                for k in range(j + 1, min(m, j + max_merge) + 1):
+                    moves.append(((i + 1, k), cost + pair_cost(i, j, k), (j, k)))
+            for target, target_cost, span in moves:
+                current = best.get(target)
+                if current is None or target_cost < current[0]:
+                    best[target] = (target_cost, (i, j), span)
+
+    spans: List[Optional[Tuple[int, int]]] = [None] * n
+    state = (n, m)
+    if state not in best:
+        return spans
+    while best[state][1] is not None:
+        _, previous, span = best[state]
+        if previous[0] != state[0]:
+            spans[previous[0]] = span
+        state = previous
+    return spans
+
+
 def correct(subtitle_file, video_script):
     subtitle_items = file_to_subtitles(subtitle_file)
-    script_lines = utils.split_string_by_punctuations(video_script)
+    script_lines = [
+        line.strip() for line in utils.split_string_by_punctuations(video_script) if line.strip()
+    ]
+    if not subtitle_items or not script_lines:
+        logger.warning("subtitle or script is empty, skip correction")
+        return
 
-    corrected = False
-    new_subtitle_items = []
-    script_index = 0
-    subtitle_index = 0
+    subtitle_lines = [item[2].strip() for item in subtitle_items]
+    spans = align_lines(script_lines, subtitle_lines)
 
-    while script_index < len(script_lines) and subtitle_index < len(subtitle_items):
-        script_line = script_lines[script_index].strip()
-        subtitle_line = subtitle_items[subtitle_index][2].strip()
+    def _times(index):
+        start_time, end_time = subtitle_items[index][1].split(" --> ")
+        return start_time.strip(), end_time.strip()
 
-        if script_line == subtitle_line:
-            new_subtitle_items.append(subtitle_items[subtitle_index])
-            script_index += 1
-            subtitle_index += 1
-        else:
-            combined_subtitle = subtitle_line
-            start_time = subtitle_items[subtitle_index][1].split(" --> ")[0]
-            end_time = subtitle_items[subtitle_index][1].split(" --> ")[1]
-            next_subtitle_index = subtitle_index + 1
-
-            while next_subtitle_index < len(subtitle_items):
-                next_subtitle = subtitle_items[next_subtitle_index][2].strip()
-                if similarity(
-                    script_line, combined_subtitle + " " + next_subtitle
-                ) > similarity(script_line, combined_subtitle):
-                    combined_subtitle += " " + next_subtitle
-                    end_time = subtitle_items[next_subtitle_index][1].split(" --> ")[1]
-                    next_subtitle_index += 1
-                else:
-                    break
-
-            if similarity(script_line, combined_subtitle) > 0.8:
-                logger.warning(
-                    f"Merged/Corrected - Script: {script_line}, Subtitle: {combined_subtitle}"
-                )
-                new_subtitle_items.append(
-                    (
-                        len(new_subtitle_items) + 1,
-                        f"{start_time} --> {end_time}",
-                        script_line,
-                    )
-                )
-                corrected = True
-            else:
-                logger.warning(
-                    f"Mismatch - Script: {script_line}, Subtitle: {combined_subtitle}"
-                )
-                new_subtitle_items.append(
-                    (
-                        len(new_subtitle_items) + 1,
-                        f"{start_time} --> {end_time}",
-                        script_line,
-                    )
-                )
-                corrected = True
-
-            script_index += 1
-            subtitle_index = next_subtitle_index
-
-    # Process the remaining lines of the script.
-    while script_index < len(script_lines):
-        logger.warning(f"Extra script line: {script_lines[script_index]}")
-        if subtitle_index < len(subtitle_items):
-            new_subtitle_items.append(
-                (
-                    len(new_subtitle_items) + 1,
-                    subtitle_items[subtitle_index][1],
-                    script_lines[script_index],
-                )
+    corrected = len(script_lines) != len(subtitle_items)
+    new_subtitle_items = []
+    previous_end = "00:00:00,000"
+    for i, (script_line, span) in enumerate(zip(script_lines, spans)):
+        if span is None:
+            # 没有对应的字幕：放在前一行结束到下一条对应字幕开始之间
+            next_start = next(
+                (_times(s[0])[0] for s in spans[i + 1:] if s is not None), previous_end
             )
-            subtitle_index += 1
-        else:
+            logger.warning(f"Extra script line: {script_line}")
             new_subtitle_items.append(
-                (
-                    len(new_subtitle_items) + 1,
-                    "00:00:00,000 --> 00:00:00,000",
-                    script_lines[script_index],
-                )
+                (len(new_subtitle_items) + 1, f"{previous_end} --> {next_start}", script_line)
             )
-        script_index += 1
-        corrected = True
+            corrected = True
+            continue
+
+        start_time, end_time = _times(span[0])[0], _times(span[1] - 1)[1]
+        merged = " ".join(subtitle_lines[span[0]:span[1]])
+        if merged != script_line:
+            if similarity(script_line, merged, 0.8) > 0.8:
+                logger.warning(f"Merged/Corrected - Script: {script_line}, Subtitle: {merged}")
+            else:
+                logger.warning(f"Mismatch - Script: {script_line}, Subtitle: {merged}")
+            corrected = True
+        new_subtitle_items.append(
+            (len(new_subtitle_items) + 1, f"{start_time} --> {end_time}", script_line)
+        )
+        previous_end = end_time
 
     if corrected:
         with open(subtitle_file, "w", encoding="utf-8") as fd:
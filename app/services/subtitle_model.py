@@ -0,0 +1,262 @@
+"""
+字幕数据模型
+
+同一个字幕文件会被多处使用（校正、各个渲染路径、古书卷轴的 drawtext 字幕），这里统一解析一次：
+- 时间以整数毫秒保存在两个 NumPy 数组（starts / ends）中，文本单独保存在列表里，
+  往返 SRT 时间戳不会产生浮点误差
+- 按时间查找当前字幕使用二分查找（O(log n)），不需要每帧遍历全部字幕
+- 可以输出 SRT / WebVTT / ASS
+- 解析结果按文件内容的哈希缓存，文件未变化时直接复用；缓存的 track 只读，可以在多个渲染任务间共享
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# 00:00:01,000 --> 00:00:02,500（兼容 WebVTT 的 "." 和省略小时的写法）
+_TIME_LINE_PATTERN = re.compile(
+    r"(?:(\d+):)?(\d+):(\d+)[,.](\d+)\s*-->\s*(?:(\d+):)?(\d+):(\d+)[,.](\d+)"
+)
+_BLOCK_SEPARATOR_PATTERN = re.compile(r"\n[ \t]*\n")
+
+# 缓存的 track 数量上限，超出后淘汰最久未使用的
+_max_cache_entries = 32
+
+_cache: "OrderedDict[str, SubtitleTrack]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _to_ms(hours, minutes, seconds, fraction) -> int:
+    # 小数部分按实际位数换算成毫秒（"5" 表示 500ms）
+    fraction = (fraction + "000")[:3]
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction)
+
+
+def format_timestamp(ms: int, separator: str = ",") -> str:
+    """
+    毫秒 -> 00:00:01,000（WebVTT 使用 "." 作为分隔符）
+    """
+    seconds, ms = divmod(int(ms), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{ms:03d}"
+
+
+def _ass_timestamp(ms: int) -> str:
+    # ASS 时间精度为百分之一秒：0:00:01.00
+    centiseconds = int(ms) // 10
+    seconds, centiseconds = divmod(centiseconds, 100)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}.{centiseconds:02d}"
+
+
+def _ass_color(color: str) -> str:
+    # "#RRGGBB" -> "&H00BBGGRR"
+    color = color.lstrip("#")
+    if len(color) != 6:
+        return "&H00FFFFFF"
+    return f"&H00{color[4:6]}{color[2:4]}{color[0:2]}".upper()
+
+
+class SubtitleTrack:
+    """
+    一条字幕轨道：第 i 条字幕为 (starts[i], ends[i], texts[i])，时间单位毫秒，按开始时间排序
+    """
+
+    def __init__(self, starts: Sequence[int], ends: Sequence[int], texts: Sequence[str]):
+        if not (len(starts) == len(ends) == len(texts)):
+            raise ValueError("starts, ends and texts must have the same length")
+        order = np.argsort(np.asarray(starts, dtype=np.int64), kind="stable")
+        self.starts = np.asarray(starts, dtype=np.int64)[order]
+        self.ends = np.asarray(ends, dtype=np.int64)[order]
+        self.texts: List[str] = [texts[i] for i in order]
+        # 前缀最大结束时间：字幕有重叠时，向前查找到它不大于 t 即可停止
+        self._max_ends = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+        for array in (self.starts, self.ends, self._max_ends):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_items(cls, items: Sequence[Tuple[Tuple[float, float], str]]) -> "SubtitleTrack":
+        """
+        从 MoviePy 格式 [((开始秒, 结束秒), 文本), ...] 创建
+        """
+        return cls(
+            [round(start * 1000) for (start, _), _ in items],
+            [round(end * 1000) for (_, end), _ in items],
+            [text for _, text in items],
+        )
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __bool__(self) -> bool:
+        return bool(self.texts)
+
+    @property
+    def duration(self) -> float:
+        """
+        最后一条字幕的结束时间（秒）
+        """
+        return float(self.ends.max()) / 1000 if len(self.ends) else 0.0
+
+    def items(self) -> List[Tuple[Tuple[float, float], str]]:
+        """
+        MoviePy SubtitlesClip.subtitles 的格式：[((开始秒, 结束秒), 文本), ...]
+        """
+        return [
+            ((start / 1000, end / 1000), text)
+            for start, end, text in zip(self.starts.tolist(), self.ends.tolist(), self.texts)
+        ]
+
+    def active(self, t: float) -> List[int]:
+        """
+        时间 t（秒）正在显示的字幕序号，二分查找后只向前检查可能重叠的字幕
+        """
+        ms = t * 1000
+        index = int(np.searchsorted(self.starts, ms, side="right")) - 1
+        result = []
+        while index >= 0 and self._max_ends[index] > ms:
+            if self.ends[index] > ms:
+                result.append(index)
+            index -= 1
+        result.reverse()
+        return result
+
+    def index_at(self, t: float) -> int:
+        """
+        时间 t（秒）显示的第一条字幕序号，没有字幕时返回 -1
+        """
+        active = self.active(t)
+        return active[0] if active else -1
+
+    def text_at(self, t: float) -> str:
+        index = self.index_at(t)
+        return self.texts[index] if index >= 0 else ""
+
+    def to_srt(self) -> str:
+        # 每条字幕后都有空行，最后一条也一样（SubtitlesClip 依赖结尾的空行）
+        return "".join(
+            f"{i}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n\n"
+            for i, (start, end, text) in enumerate(
+                zip(self.starts.tolist(), self.ends.tolist(), self.texts), start=1
+            )
+        )
+
+    def to_vtt(self) -> str:
+        return "WEBVTT\n\n" + "".join(
+            f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n\n"
+            for start, end, text in zip(self.starts.tolist(), self.ends.tolist(), self.texts)
+        )
+
+    def to_ass(
+        self,
+        font_name: str = "Arial",
+        font_size: int = 48,
+        color: str = "#FFFFFF",
+        stroke_color: str = "#000000",
+        stroke_width: float = 1.5,
+        play_res: Tuple[int, int] = (1080, 1920),
+        alignment: int = 2,
+        margin_v: int = 50,
+    ) -> str:
+        """
+        ASS 字幕（可以交给 ffmpeg 的 subtitles / ass 滤镜直接烧录）
+
+        Args:
+            play_res: 参考分辨率，通常与视频尺寸一致
+            alignment: 小键盘方位，2 为底部居中，5 为正中，8 为顶部居中
+        """
+        header = (
+            "[Script Info]\n"
+            "ScriptType: v4.00+\n"
+            f"PlayResX: {play_res[0]}\n"
+            f"PlayResY: {play_res[1]}\n"
+            "WrapStyle: 0\n"
+            "\n"
+            "[V4+ Styles]\n"
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+            "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, "
+            "BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+            f"Style: Default,{font_name},{font_size},{_ass_color(color)},&H000000FF,"
+            f"{_ass_color(stroke_color)},&H00000000,0,0,0,0,100,100,0,0,1,{stroke_width:g},0,"
+            f"{alignment},20,20,{margin_v},1\n"
+            "\n"
+            "[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+        )
+        events = "".join(
+            f"Dialogue: 0,{_ass_timestamp(start)},{_ass_timestamp(end)},Default,,0,0,0,,"
+            + text.replace("\n", "\\N")
+            + "\n"
+            for start, end, text in zip(self.starts.tolist(), self.ends.tolist(), self.texts)
+        )
+        return header + events
+
+    def write(self, subtitle_file: str, **ass_options) -> str:
+        """
+        按扩展名（.srt / .vtt / .ass）写入文件
+        """
+        ext = os.path.splitext(subtitle_file)[1].lower()
+        if ext == ".vtt":
+            content = self.to_vtt()
+        elif ext == ".ass":
+            content = self.to_ass(**ass_options)
+        else:
+            content = self.to_srt()
+        with open(subtitle_file, "w", encoding="utf-8") as f:
+            f.write(content)
+        return subtitle_file
+
+
+def parse(content: str) -> SubtitleTrack:
+    """
+    解析 SRT / WebVTT 文本；序号行可有可无，缺少时间行的块会被忽略
+    """
+    content = content.lstrip("\ufeff").replace("\r\n", "\n").replace("\r", "\n")
+    starts, ends, texts = [], [], []
+    for block in _BLOCK_SEPARATOR_PATTERN.split(content):
+        lines = block.strip("\n").split("\n")
+        for i, line in enumerate(lines):
+            match = _TIME_LINE_PATTERN.search(line)
+            if match:
+                groups = match.groups()
+                starts.append(_to_ms(*groups[:4]))
+                ends.append(_to_ms(*groups[4:]))
+                texts.append("\n".join(lines[i + 1:]).strip())
+                break
+    return SubtitleTrack(starts, ends, texts)
+
+
+def load(subtitle_file: str) -> SubtitleTrack:
+    """
+    读取字幕文件，按文件内容的哈希缓存解析结果；文件不存在时返回空 track
+    """
+    if not subtitle_file or not os.path.isfile(subtitle_file):
+        return SubtitleTrack([], [], [])
+
+    with open(subtitle_file, "rb") as f:
+        data = f.read()
+    key = hashlib.md5(data).hexdigest()
+
+    with _cache_lock:
+        track = _cache.get(key)
+        if track is not None:
+            _cache.move_to_end(key)
+            return track
+
+    track = parse(data.decode("utf-8", errors="replace"))
+    with _cache_lock:
+        _cache[key] = track
+        while len(_cache) > _max_cache_entries:
+            _cache.popitem(last=False)
+    return track
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
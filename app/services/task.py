@@ -1,18 +1,26 @@
+import json
 import math
 import os.path
+import random
 import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from os import path
 
 from loguru import logger
 
 from app.config import config
 from app.models import const
-from app.models.schema import VideoConcatMode, VideoParams
-from app.services import llm, material, subtitle, video, voice
+from app.models.schema import VideoAspect, VideoConcatMode, VideoParams
+from app.services import audio, encoder, llm, material, media_probe, subtitle, tts_engine, voice
 from app.services import video_fast  # 快速视频生成模式
 from app.services import state as sm
 from app.utils import utils
 
+# MoviePy 渲染路径导入耗时较长，第一次渲染时才导入
+video = utils.lazy_import("app.services.video")
+
 
 def generate_script(task_id, params):
     logger.info("\n\n## generating video script")
@@ -34,6 +42,23 @@ def generate_script(task_id, params):
     return video_script
 
 
+def generate_script_and_terms(task_id, params):
+    """
+    一次结构化输出同时生成文案和关键词（llm_structured_output），提供商不支持或失败时返回 (None, None)
+    """
+    logger.info("\n\n## generating video script and terms")
+    result = llm.generate_script_and_terms(
+        video_subject=params.video_subject,
+        language=params.video_language,
+        paragraph_number=params.paragraph_number,
+        amount=5,
+    )
+    if not result:
+        logger.warning("structured output unavailable, falling back to separate requests")
+        return None, None
+    return result
+
+
 def generate_terms(task_id, params, video_script):
     logger.info("\n\n## generating video terms")
     video_terms = params.video_terms
@@ -59,6 +84,30 @@ def generate_terms(task_id, params, video_script):
     return video_terms
 
 
+# 只影响字幕/标题叠加层和最终编码的参数：修改后复用拼接好的画面、配音和字幕，只重新叠加、编码
+OVERLAY_PARAMS = {
+    "video_subject",
+    "subtitle_enabled",
+    "subtitle_position",
+    "custom_position",
+    "font_name",
+    "text_fore_color",
+    "text_background_color",
+    "font_size",
+    "stroke_color",
+    "stroke_width",
+    "video_theme",
+    "subtitle_color_theme",
+    "encoder_profile",
+}
+# 只影响混音的参数：修改后重新混音，画面直接复制（不重新编码）
+AUDIO_MIX_PARAMS = {"voice_volume", "bgm_type", "bgm_file", "bgm_volume"}
+# 预览/最终渲染切换：按保存的片段计划重新拼接画面，再重新叠加
+RENDER_PARAMS = {"preview", "preview_duration"}
+# 不影响输出内容的参数
+_IGNORED_EDIT_PARAMS = {"n_threads", "enable_fast_mode"}
+
+
 def save_script_data(task_id, video_script, video_terms, params):
     script_file = path.join(utils.task_dir(task_id), "script.json")
     script_data = {
@@ -71,10 +120,42 @@ def save_script_data(task_id, video_script, video_terms, params):
         f.write(utils.to_json(script_data))
 
 
+def load_script_data(task_id) -> dict:
+    script_file = path.join(utils.task_dir(task_id), "script.json")
+    if not path.isfile(script_file):
+        return {}
+    try:
+        with open(script_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"failed to load script data: {script_file}, {str(e)}")
+        return {}
+
+
+def changed_params(old_params: dict, params: VideoParams) -> set:
+    """
+    与 script.json 中保存的参数比较，返回发生变化的参数名（与保存时使用相同的序列化方式）
+
+    旧版本保存的 script.json 缺少之后新增的参数，这些参数仍为默认值时不算变化
+    """
+    new_params = json.loads(utils.to_json(params))
+    default_params = json.loads(utils.to_json(type(params).model_construct()))
+    return {
+        key
+        for key in set(old_params) | set(new_params)
+        if old_params.get(key) != new_params.get(key)
+        and not (
+            key not in old_params
+            and key in default_params
+            and new_params.get(key) == default_params[key]
+        )
+    }
+
+
 def generate_audio(task_id, params, video_script):
     logger.info("\n\n## generating audio")
     audio_file = path.join(utils.task_dir(task_id), "audio.mp3")
-    sub_maker = voice.tts(
+    sub_maker = tts_engine.tts(
         text=video_script,
         voice_name=voice.parse_voice_name(params.voice_name),
         voice_rate=params.voice_rate,
@@ -94,6 +175,56 @@ def generate_audio(task_id, params, video_script):
     return audio_file, audio_duration, sub_maker
 
 
+def generate_script_audio_stream(task_id, params):
+    """
+    流式生成文案，每收到一个完整段落就开始合成语音（llm_stream_script）
+
+    失败时返回 (None, None, None, None)，由调用方回退到先生成文案、再合成语音
+    """
+    logger.info("\n\n## generating video script and audio (streaming)")
+    audio_file = path.join(utils.task_dir(task_id), "audio.mp3")
+    result = tts_engine.tts_stream(
+        llm.generate_script_stream(
+            video_subject=params.video_subject,
+            language=params.video_language,
+            paragraph_number=params.paragraph_number,
+        ),
+        voice_name=voice.parse_voice_name(params.voice_name),
+        voice_rate=params.voice_rate,
+        voice_file=audio_file,
+    )
+    if result is None:
+        logger.warning("streaming generation failed, falling back to sequential generation")
+        return None, None, None, None
+
+    sub_maker, video_script = result
+    audio_duration = math.ceil(voice.get_audio_duration(sub_maker))
+    return video_script, audio_file, audio_duration, sub_maker
+
+
+def generate_audio_mix(task_id, params, audio_file):
+    """
+    配音与背景音乐只混音一次，所有渲染路径和 video_count 个视频共用同一条音轨
+
+    Returns:
+        混好的音轨路径，失败时返回空字符串（由各渲染路径自行混音）
+    """
+    logger.info("\n\n## mixing audio")
+    bgm_file = video.get_bgm_file(params.bgm_type, params.bgm_file)
+    mixed_audio_file = path.join(utils.task_dir(task_id), "mixed-audio.m4a")
+    duration = audio.mix_audio_track(
+        voice_file=audio_file,
+        output_file=mixed_audio_file,
+        background_music=bgm_file,
+        voice_volume=params.voice_volume if params.voice_volume else 1.0,
+        bgm_volume=params.bgm_volume if params.bgm_volume else 0.2,
+    )
+    if duration is None:
+        logger.warning("failed to mix audio, falling back to mixing in each render")
+        return ""
+    return mixed_audio_file
+
+
 def generate_subtitle(task_id, params, video_script, sub_maker, audio_file):
     if not params.subtitle_enabled:
         return ""
@@ -112,9 +243,24 @@ def generate_subtitle(task_id, params, video_script, sub_maker, audio_file):
             logger.warning("subtitle file not found, fallback to whisper")
 
     if subtitle_provider == "whisper" or subtitle_fallback:
-        subtitle.create(audio_file=audio_file, subtitle_file=subtitle_path)
-        logger.info("\n\n## correcting subtitle")
-        subtitle.correct(subtitle_file=subtitle_path, video_script=video_script)
+        aligned = False
+        if config.app.get("subtitle_align", True):
+            # 文案已知，直接把文案对齐到音频上，不需要识别后再校正
+            try:
+                aligned = bool(
+                    subtitle.align(
+                        audio_file=audio_file,
+                        video_script=video_script,
+                        subtitle_file=subtitle_path,
+                        language=params.video_language or None,
+                    )
+                )
+            except Exception as e:
+                logger.warning(f"failed to align subtitle, fallback to recognition: {str(e)}")
+        if not aligned:
+            subtitle.create(audio_file=audio_file, subtitle_file=subtitle_path)
+            logger.info("\n\n## correcting subtitle")
+            subtitle.correct(subtitle_file=subtitle_path, video_script=video_script)
 
     subtitle_lines = subtitle.file_to_subtitles(subtitle_path)
     if not subtitle_lines:
@@ -157,6 +303,136 @@ def get_video_materials(task_id, params, video_terms, audio_duration):
         return downloaded_videos
 
 
+def _combine_options(task_id, params, index) -> dict:
+    """
+    combine_videos 的渲染参数：预览时缩小尺寸、降低帧率、只拼接前 N 秒；
+    片段计划保存在任务目录，预览与之后的最终渲染使用相同的片段
+    """
+    return {
+        "video_size": video.render_size(params),
+        "video_fps": video.render_fps(params),
+        "max_duration": params.preview_duration if params.preview else 0,
+        "clip_plan_file": path.join(utils.task_dir(task_id), f"clip-plan-{index}.json"),
+    }
+
+
+def _combined_size_mb(params, duration: float) -> float:
+    """
+    一个拼接视频（中间编码）的估算大小，用于选择临时目录
+    """
+    video_width, video_height = VideoAspect(params.video_aspect).to_resolution()
+    return encoder.estimate_intermediate_mb(video_width, video_height, video.fps, duration)
+
+
+def generate_variants(
+    task_id, params, downloaded_videos, audio_file, subtitle_path, mixed_audio_file
+):
+    """
+    生成多个视频（video_count > 1）或预览：字幕/标题叠加层和混好的音轨只生成一次，
+    每个视频只需按各自的随机顺序拼接素材，再用 ffmpeg 叠加，各视频并行生成
+
+    快速模式（无转场，非预览）下素材只规范化一次，各视频直接 -c copy 拼接，不再逐个片段重新编码
+
+    Returns:
+        (final_video_paths, combined_video_paths)，不保留拼接视频时 combined_video_paths 为空，
+        失败返回 None（回退为逐个完整生成）
+    """
+    duration = media_probe.get_duration(mixed_audio_file)
+    if duration <= 0:
+        return None
+
+    keep_combined_video = config.app.get("keep_combined_video", True)
+    workers = max(1, min(params.video_count, config.app.get("variant_workers", 2)))
+    # 叠加层，以及不保留拼接视频时各个并行视频的拼接结果
+    work_dir = utils.temp_dir(
+        f"variants-{task_id}",
+        size_hint_mb=_combined_size_mb(params, duration)
+        * (1 + (0 if keep_combined_video else workers)),
+    )
+    logger.info(f"\n\n## rendering shared overlay for {params.video_count} videos")
+    overlay_file = video.render_overlay(
+        subtitle_path, params, duration, path.join(work_dir, "overlay.mov")
+    )
+    if overlay_file is None:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return None
+
+    video_concat_mode = (
+        params.video_concat_mode if params.video_count == 1 else VideoConcatMode.random
+    )
+    fast_materials = []
+    transition = params.video_transition_mode
+    if (
+        getattr(params, "enable_fast_mode", True)
+        and not params.preview
+        and (not transition or transition.value in (None, "None"))
+    ):
+        logger.info("\n\n## normalizing materials for fast concat")
+        video_width, video_height = VideoAspect(params.video_aspect).to_resolution()
+        materials, compatible = video_fast.normalize_video_materials(
+            downloaded_videos, work_dir, video_width, video_height
+        )
+        if compatible:
+            fast_materials = materials
+    progress = {"value": 50}
+    progress_lock = threading.Lock()
+
+    def _render(index):
+        combined_video_path = path.join(
+            utils.task_dir(task_id) if keep_combined_video else work_dir,
+            f"combined-{index}.mp4",
+        )
+        logger.info(f"\n\n## combining video: {index} => {combined_video_path}")
+        concatenated = False
+        if fast_materials:
+            # 多个视频时各自随机打乱素材顺序，素材不够长时循环使用
+            order = random.sample(fast_materials, len(fast_materials))
+            concat_dir = path.join(work_dir, f"concat-{index}")
+            os.makedirs(concat_dir, exist_ok=True)
+            try:
+                concatenated = video.concat_copy(
+                    video_fast.loop_to_duration(order, duration), combined_video_path, concat_dir
+                )
+            except Exception as e:
+                logger.warning(f"fast concat failed: {str(e)}")
+        if not concatenated:
+            video.combine_videos(
+                combined_video_path=combined_video_path,
+                video_paths=downloaded_videos,
+                audio_file=audio_file,
+                video_aspect=params.video_aspect,
+                video_concat_mode=video_concat_mode,
+                video_transition_mode=params.video_transition_mode,
+                max_clip_duration=params.video_clip_duration,
+                threads=params.n_threads,
+                enable_animation=params.enable_video_animation,
+                **_combine_options(task_id, params, index),
+            )
+
+        final_video_path = path.join(utils.task_dir(task_id), f"final-{index}.mp4")
+        logger.info(f"\n\n## composing video: {index} => {final_video_path}")
+        if not video.compose_video(
+            combined_video_path, overlay_file, mixed_audio_file, final_video_path, params
+        ):
+            return None
+
+        with progress_lock:
+            progress["value"] += 50 / params.video_count
+            sm.state.update_task(task_id, progress=progress["value"])
+        return final_video_path, combined_video_path
+
+    logger.info(f"rendering {params.video_count} videos, workers: {workers}")
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_render, range(1, params.video_count + 1)))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if any(result is None for result in results):
+        return None
+    return [r[0] for r in results], [r[1] for r in results] if keep_combined_video else []
+
+
 def generate_final_videos(
     task_id, params, downloaded_videos, audio_file, subtitle_path
 ):
@@ -167,12 +443,43 @@ def generate_final_videos(
     )
     video_transition_mode = params.video_transition_mode
 
+    mixed_audio_file = generate_audio_mix(task_id, params, audio_file)
+
+    # 预览总是走叠加层 + ffmpeg 合成的路径（最快，且与之后 edit 生成最终视频的方式一致）；
+    # 多个视频时叠加层共用（快速模式下各视频的素材直接 -c copy 拼接），单张图片的快速模式仍逐个走图片快速路径
+    enable_fast_mode = getattr(params, "enable_fast_mode", True)
+    single_image = len(downloaded_videos) == 1 and (
+        utils.parse_extension(downloaded_videos[0]) in const.FILE_TYPE_IMAGES
+    )
+    if mixed_audio_file and (
+        params.preview
+        or (
+            params.video_count > 1
+            and not (enable_fast_mode and single_image)
+            and config.app.get("shared_variant_render", True)
+        )
+    ):
+        result = generate_variants(
+            task_id, params, downloaded_videos, audio_file, subtitle_path, mixed_audio_file
+        )
+        if result:
+            return result
+        logger.warning("failed to render videos from shared layers, rendering each video separately")
+
     _progress = 50
+    # 不保留拼接视频时，拼接结果只作为中间文件放在临时目录（优先内存文件系统），渲染完即删除
+    keep_combined_video = config.app.get("keep_combined_video", True)
+    combined_dir = (
+        utils.task_dir(task_id)
+        if keep_combined_video
+        else utils.temp_dir(
+            task_id,
+            size_hint_mb=_combined_size_mb(params, media_probe.get_duration(audio_file)),
+        )
+    )
     for i in range(params.video_count):
         index = i + 1
-        combined_video_path = path.join(
-            utils.task_dir(task_id), f"combined-{index}.mp4"
-        )
+        combined_video_path = path.join(combined_dir, f"combined-{index}.mp4")
         logger.info(f"\n\n## combining video: {index} => {combined_video_path}")
         
         # 检查是否启用快速模式
@@ -190,6 +497,7 @@ def generate_final_videos(
         # 注意：VideoTransitionMode 继承 str，所以 none.value 是字符串 "None" 而不是 Python 的 None
         use_fast_generation = (
             enable_fast_mode and 
+            not params.preview and  # 快速模式始终按完整分辨率渲染
             subtitle_path and 
             (not video_transition_mode or video_transition_mode.value is None or video_transition_mode.value == "None")  # 快速模式不支持过渡效果
             # 注意：单张图片也支持快速模式（使用专门的图片快速生成函数）
@@ -255,7 +563,9 @@ def generate_final_videos(
             logger.info("="*60 + "\n")
             
             final_video_path = path.join(utils.task_dir(task_id), f"final-{index}.mp4")
-            bgm_file = video.get_bgm_file(params.bgm_type, params.bgm_file)
+            # 已有混好的音轨时直接使用，不再单独混入背景音乐
+            render_audio_file = mixed_audio_file or audio_file
+            bgm_file = "" if mixed_audio_file else video.get_bgm_file(params.bgm_type, params.bgm_file)
             
             # 根据是否为单张图片选择不同的快速生成方法
             if is_single_image:
@@ -268,7 +578,7 @@ def generate_final_videos(
                 
                 result = video_fast.generate_video_from_image_fast(
                     image_path=downloaded_videos[0],
-                    audio_file=audio_file,
+                    audio_file=render_audio_file,
                     subtitle_file=subtitle_path,
                     output_path=final_video_path,
                     video_width=video_width,
@@ -279,18 +589,23 @@ def generate_final_videos(
                     video_theme=params.video_theme if hasattr(params, 'video_theme') else None,
                     subtitle_color_theme=params.subtitle_color_theme if hasattr(params, 'subtitle_color_theme') else "classic_gold",
                     font_size=params.font_size if hasattr(params, 'font_size') else 60,
+                    encoder_profile=params.encoder_profile,
+                    combined_video_path=combined_video_path if keep_combined_video else None,
                 )
             else:
                 # 多视频素材使用普通的快速拼接
                 result = video_fast.generate_video_fast(
                     video_paths=downloaded_videos,
-                    audio_file=audio_file,
+                    audio_file=render_audio_file,
                     subtitle_file=subtitle_path,
                     output_path=final_video_path,
                     video_aspect=params.video_aspect,
                     background_music=bgm_file,
                     bgm_volume=params.bgm_volume if params.bgm_volume else 0.2,
                     auto_normalize=True,  # 自动规范化素材
+                    encoder_profile=params.encoder_profile,
+                    # 保留拼接好的画面，之后只修改字幕样式时（edit）可以直接复用
+                    combined_video_path=combined_video_path if keep_combined_video else None,
                 )
             
             if result:
@@ -299,7 +614,8 @@ def generate_final_videos(
                 logger.info(f"🎬 输出文件: {path.basename(final_video_path)}")
                 logger.info("✅"*20 + "\n")
                 final_video_paths.append(final_video_path)
-                combined_video_paths.append(final_video_path)  # 快速模式不需要combined文件
+                if keep_combined_video and path.isfile(combined_video_path):
+                    combined_video_paths.append(combined_video_path)
             else:
                 logger.warning("\n" + "⚠️ "*15)
                 logger.warning("⚠️  快速模式失败，自动回退到标准模式...")
@@ -335,6 +651,7 @@ def generate_final_videos(
                 max_clip_duration=params.video_clip_duration,
                 threads=params.n_threads,
                 enable_animation=params.enable_video_animation,
+                **_combine_options(task_id, params, index),
             )
 
             _progress += 50 / params.video_count / 2
@@ -349,14 +666,21 @@ def generate_final_videos(
                 subtitle_path=subtitle_path,
                 output_file=final_video_path,
                 params=params,
+                mixed_audio_path=mixed_audio_file,
             )
             
             final_video_paths.append(final_video_path)
-            combined_video_paths.append(combined_video_path)
+            if keep_combined_video:
+                combined_video_paths.append(combined_video_path)
+            else:
+                video.delete_files(combined_video_path)
 
         _progress += 50 / params.video_count / 2
         sm.state.update_task(task_id, progress=_progress)
 
+    if not keep_combined_video:
+        shutil.rmtree(combined_dir, ignore_errors=True)
+
     return final_video_paths, combined_video_paths
 
 
@@ -367,8 +691,29 @@ def start(task_id, params: VideoParams, stop_at: str = "video"):
     if type(params.video_concat_mode) is str:
         params.video_concat_mode = VideoConcatMode(params.video_concat_mode)
 
+    # 文案需要由 LLM 生成且后续要合成语音时，可以边生成文案边合成语音
+    video_script = video_terms = audio_file = audio_duration = sub_maker = None
+    if (
+        config.app.get("llm_stream_script", False)
+        and not params.video_script.strip()
+        and stop_at not in ("script", "terms")
+    ):
+        video_script, audio_file, audio_duration, sub_maker = generate_script_audio_stream(
+            task_id, params
+        )
+    elif (
+        config.app.get("llm_structured_output", False)
+        and not params.video_script.strip()
+        and not params.video_terms
+        and params.video_source != "local"
+        and stop_at != "script"
+    ):
+        # 文案和关键词都需要生成时，一次请求同时返回两者
+        video_script, video_terms = generate_script_and_terms(task_id, params)
+
     # 1. Generate script
-    video_script = generate_script(task_id, params)
+    if not video_script:
+        video_script = generate_script(task_id, params)
     if not video_script or "Error: " in video_script:
         sm.state.update_task(task_id, state=const.TASK_STATE_FAILED)
         return
@@ -382,8 +727,9 @@ def start(task_id, params: VideoParams, stop_at: str = "video"):
         return {"script": video_script}
 
     # 2. Generate terms
-    video_terms = ""
-    if params.video_source != "local":
+    if params.video_source == "local":
+        video_terms = ""
+    elif not video_terms:
         video_terms = generate_terms(task_id, params, video_script)
         if not video_terms:
             sm.state.update_task(task_id, state=const.TASK_STATE_FAILED)
@@ -400,9 +746,10 @@ def start(task_id, params: VideoParams, stop_at: str = "video"):
     sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=20)
 
     # 3. Generate audio
-    audio_file, audio_duration, sub_maker = generate_audio(
-        task_id, params, video_script
-    )
+    if not audio_file:
+        audio_file, audio_duration, sub_maker = generate_audio(
+            task_id, params, video_script
+        )
     if not audio_file:
         sm.state.update_task(task_id, state=const.TASK_STATE_FAILED)
         return
@@ -482,6 +829,171 @@ def start(task_id, params: VideoParams, stop_at: str = "video"):
     return kwargs
 
 
+def edit_error(task_id, params: VideoParams) -> str:
+    """
+    检查任务能否用 edit 只重新渲染，返回不能编辑的原因，可以编辑时返回空字符串
+    """
+    script_data = load_script_data(task_id)
+    if not script_data:
+        return f"script data not found, unable to edit task: {task_id}"
+
+    changed = changed_params(script_data.get("params") or {}, params) - _IGNORED_EDIT_PARAMS
+    unsupported = changed - OVERLAY_PARAMS - AUDIO_MIX_PARAMS - RENDER_PARAMS
+    if unsupported:
+        return f"parameters {sorted(unsupported)} changed, the video needs to be regenerated"
+
+    task_dir = utils.task_dir(task_id)
+    if params.subtitle_enabled and not path.isfile(path.join(task_dir, "subtitle.srt")):
+        return "subtitle not found, the video needs to be regenerated"
+    if not path.isfile(path.join(task_dir, "audio.mp3")):
+        return "audio not found, the video needs to be regenerated"
+    missing = [
+        f"combined-{index}.mp4"
+        for index in range(1, params.video_count + 1)
+        if not path.isfile(path.join(task_dir, f"combined-{index}.mp4"))
+    ]
+    if missing:
+        return (
+            f"combined videos {missing} not found (not kept when keep_combined_video is false), "
+            "the video needs to be regenerated"
+        )
+    if changed & RENDER_PARAMS:
+        for index in range(1, params.video_count + 1):
+            clip_plan_file = _combine_options(task_id, params, index)["clip_plan_file"]
+            if video.load_clip_plan(clip_plan_file) is None:
+                return f"clip plan not found, the video needs to be regenerated: {clip_plan_file}"
+    return ""
+
+
+def edit(task_id, params: VideoParams):
+    """
+    只修改了样式（字幕、标题、主题、编码）或混音参数时，复用任务目录中已有的拼接画面（combined-N.mp4）、
+    配音和字幕重新生成最终视频，不再重新生成文案、配音和下载素材：
+    - 叠加层参数变化：重新渲染一次叠加层，各视频用 ffmpeg 叠加后编码
+    - 只有混音参数变化：重新混音，画面直接复制（-c:v copy）
+    - 预览参数变化（例如预览确认后生成最终视频）：按保存的片段计划重新拼接画面，再叠加
+
+    其他参数（文案、配音、素材、比例等）变化时需要重新调用 start，能否编辑见 edit_error
+    """
+    logger.info(f"edit task: {task_id}")
+    task = sm.state.get_task(task_id) or {}
+    sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=5)
+
+    if type(params.video_concat_mode) is str:
+        params.video_concat_mode = VideoConcatMode(params.video_concat_mode)
+
+    def _fail(message):
+        logger.error(message)
+        sm.state.update_task(task_id, state=const.TASK_STATE_FAILED)
+
+    error = edit_error(task_id, params)
+    if error:
+        return _fail(error)
+
+    script_data = load_script_data(task_id)
+    changed = changed_params(script_data.get("params") or {}, params) - _IGNORED_EDIT_PARAMS
+    task_dir = utils.task_dir(task_id)
+    audio_file = path.join(task_dir, "audio.mp3")
+    subtitle_path = path.join(task_dir, "subtitle.srt") if params.subtitle_enabled else ""
+    combined_video_paths = [
+        path.join(task_dir, f"combined-{index}.mp4")
+        for index in range(1, params.video_count + 1)
+    ]
+
+    logger.info(f"changed parameters: {sorted(changed) or 'none'}")
+    if changed & RENDER_PARAMS:
+        # 预览 <-> 最终渲染：按原片段计划以新的尺寸、帧率重新拼接画面
+        for index, combined_video_path in enumerate(combined_video_paths, start=1):
+            options = _combine_options(task_id, params, index)
+            clip_plan = video.load_clip_plan(options["clip_plan_file"])
+            logger.info(f"\n\n## combining video: {index} => {combined_video_path}")
+            video.combine_videos(
+                combined_video_path=combined_video_path,
+                video_paths=clip_plan["materials"],
+                audio_file=audio_file,
+                video_aspect=params.video_aspect,
+                video_concat_mode=params.video_concat_mode,
+                video_transition_mode=params.video_transition_mode,
+                max_clip_duration=params.video_clip_duration,
+                threads=params.n_threads,
+                enable_animation=params.enable_video_animation,
+                **options,
+            )
+    mixed_audio_file = path.join(task_dir, "mixed-audio.m4a")
+    if changed & AUDIO_MIX_PARAMS or not path.isfile(mixed_audio_file):
+        mixed_audio_file = generate_audio_mix(task_id, params, audio_file)
+    sm.state.update_task(task_id, state=const.TASK_STATE_PROCESSING, progress=20)
+
+    final_video_paths = [
+        path.join(task_dir, f"final-{index}.mp4")
+        for index in range(1, params.video_count + 1)
+    ]
+    remux_only = (
+        mixed_audio_file
+        and not changed & (OVERLAY_PARAMS | RENDER_PARAMS)
+        and all(path.isfile(p) for p in final_video_paths)
+    )
+    if remux_only:
+        logger.info("\n\n## replacing audio track")
+        for final_video_path in final_video_paths:
+            if not video.replace_audio(final_video_path, mixed_audio_file):
+                return _fail(f"failed to replace audio: {final_video_path}")
+    else:
+        work_dir = utils.temp_dir(f"edit-{task_id}")
+        overlay_file = None
+        if mixed_audio_file:
+            logger.info("\n\n## rendering overlay")
+            overlay_file = video.render_overlay(
+                subtitle_path,
+                params,
+                media_probe.get_duration(mixed_audio_file),
+                path.join(work_dir, "overlay.mov"),
+            )
+        try:
+            for i, (combined_video_path, final_video_path) in enumerate(
+                zip(combined_video_paths, final_video_paths)
+            ):
+                logger.info(f"\n\n## composing video: {i + 1} => {final_video_path}")
+                if overlay_file is None or not video.compose_video(
+                    combined_video_path, overlay_file, mixed_audio_file, final_video_path, params
+                ):
+                    video.generate_video(
+                        video_path=combined_video_path,
+                        audio_path=audio_file,
+                        subtitle_path=subtitle_path,
+                        output_file=final_video_path,
+                        params=params,
+                        mixed_audio_path=mixed_audio_file,
+                    )
+                sm.state.update_task(
+                    task_id,
+                    state=const.TASK_STATE_PROCESSING,
+                    progress=20 + 80 * (i + 1) / params.video_count,
+                )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    save_script_data(
+        task_id, script_data.get("script", ""), script_data.get("search_terms", ""), params
+    )
+    logger.success(f"task {task_id} edited, {len(final_video_paths)} videos updated.")
+
+    kwargs = {
+        k: v for k, v in task.items() if k not in ("task_id", "state", "progress")
+    }
+    kwargs.update(
+        {
+            "videos": final_video_paths,
+            "combined_videos": combined_video_paths,
+            "subtitle_path": subtitle_path,
+        }
+    )
+    sm.state.update_task(
+        task_id, state=const.TASK_STATE_COMPLETE, progress=100, **kwargs
+    )
+    return kwargs
+
+
 if __name__ == "__main__":
     task_id = "task_id"
     params = VideoParams(
@@ -0,0 +1,159 @@
+"""
+语音合成缓存
+
+以 (服务商, 声音, 语速, 音量, 规范化后的文本) 为键，缓存合成的音频和字幕时间轴（SubMaker），
+同一段文案重复生成（例如只修改主题、背景音乐）时不再重复请求 TTS 服务。
+
+缓存文件保存在 storage/tts_cache 下，每条缓存对应 <key>.mp3 + <key>.json，
+总大小超过 tts_cache_max_mb 时按最近使用时间淘汰。
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from loguru import logger
+
+from app.config import config
+from app.services import voice_catalog
+from app.utils import utils
+
+if TYPE_CHECKING:
+    from edge_tts import SubMaker
+
+edge_tts = utils.lazy_import("edge_tts")
+
+_evict_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return config.app.get("tts_cache_enabled", True)
+
+
+def _cache_dir() -> str:
+    return utils.storage_dir("tts_cache", create=True)
+
+
+def provider_of(voice_name: str) -> str:
+    return voice_catalog.provider_of(voice_name)
+
+
+def normalize_text(text: str) -> str:
+    # 空白差异不影响合成结果
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_key(voice_name: str, voice_rate: float, voice_volume: float, text: str) -> str:
+    raw = json.dumps(
+        [
+            provider_of(voice_name),
+            voice_name,
+            round(float(voice_rate or 1.0), 3),
+            round(float(voice_volume or 1.0), 3),
+            normalize_text(text),
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _paths(key: str) -> Tuple[str, str]:
+    d = _cache_dir()
+    return os.path.join(d, f"{key}.mp3"), os.path.join(d, f"{key}.json")
+
+
+def get(key: str, voice_file: str) -> Optional[Tuple["SubMaker", float]]:
+    """
+    命中缓存时把音频复制到 voice_file
+
+    Returns:
+        (sub_maker, 音频时长秒数)，未命中返回 None
+    """
+    if not enabled():
+        return None
+
+    audio_path, meta_path = _paths(key)
+    if not os.path.isfile(audio_path) or not os.path.isfile(meta_path):
+        return None
+
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        shutil.copyfile(audio_path, voice_file)
+        # 更新访问时间，用于淘汰最久未使用的条目
+        now = time.time()
+        os.utime(audio_path, (now, now))
+        os.utime(meta_path, (now, now))
+    except Exception as e:
+        logger.warning(f"failed to read tts cache: {key}, {str(e)}")
+        return None
+
+    sub_maker = edge_tts.SubMaker()
+    sub_maker.subs = list(meta.get("subs", []))
+    sub_maker.offset = [tuple(offset) for offset in meta.get("offset", [])]
+    return sub_maker, float(meta.get("duration", 0.0))
+
+
+def put(key: str, voice_file: str, sub_maker: "SubMaker", duration: float):
+    if not enabled() or not os.path.isfile(voice_file):
+        return
+
+    audio_path, meta_path = _paths(key)
+    meta = {
+        "subs": list(sub_maker.subs),
+        "offset": [list(offset) for offset in sub_maker.offset],
+        "duration": duration,
+    }
+    try:
+        # 先写临时文件再替换，避免并发读到不完整的缓存
+        temp_audio = f"{audio_path}.{threading.get_ident()}.tmp"
+        shutil.copyfile(voice_file, temp_audio)
+        os.replace(temp_audio, audio_path)
+        temp_meta = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(temp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temp_meta, meta_path)
+    except Exception as e:
+        logger.warning(f"failed to write tts cache: {key}, {str(e)}")
+        return
+
+    evict()
+
+
+def evict(max_mb: float = 0):
+    """
+    缓存总大小超过上限时，按最近使用时间从旧到新删除
+    """
+    if max_mb <= 0:
+        max_mb = config.app.get("tts_cache_max_mb", 500)
+    max_bytes = int(max_mb * 1024 * 1024)
+
+    with _evict_lock:
+        entries = {}
+        total = 0
+        for entry in os.scandir(_cache_dir()):
+            if not entry.is_file() or entry.name.endswith(".tmp"):
+                continue
+            key = os.path.splitext(entry.name)[0]
+            stat = entry.stat()
+            size, mtime = entries.get(key, (0, 0.0))
+            entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+            total += stat.st_size
+
+        if total <= max_bytes:
+            return
+
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= max_bytes:
+                break
+            for path in _paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+        logger.info(f"tts cache evicted, current size: {total / 1024 / 1024:.1f}MB")
@@ -0,0 +1,319 @@
+"""
+分段并行语音合成
+
+长文本一次性交给 TTS 服务耗时很长，且任何一次失败都要整篇重来：
+1. 在句子边界把文本切成若干段（保留标点，保证语气自然）
+2. 各段并行合成，每段独立重试（由 voice.tts 内部的重试完成）
+3. 音频直接按流拼接（不重新编码），字幕时间轴按各段实际时长平移后合并
+
+返回的 SubMaker 与 voice.tts 一致，create_subtitle / get_audio_duration 无需改动
+
+每一段的合成结果都会写入 tts_cache，文案修改后只有变化的段落需要重新合成
+
+tts_stream 接收逐段产出的文案（流式生成），每收到一段就开始合成，文案生成与语音合成同时进行
+"""
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from app.config import config
+from app.services import audio, media_probe, tts_cache, voice
+from app.utils import utils
+
+if TYPE_CHECKING:
+    from edge_tts import SubMaker
+
+edge_tts = utils.lazy_import("edge_tts")
+
+# 句末标点：在这些字符之后切分
+_SENTENCE_ENDINGS = "。！？；!?;…\n"
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    按句末标点切分句子，标点保留在句子末尾
+    """
+    sentences = []
+    current = ""
+    for i, char in enumerate(text):
+        current += char
+        is_end = char in _SENTENCE_ENDINGS
+        if char == ".":
+            # 2.5 这类小数不切分，英文句号后需跟空白或文本结尾
+            next_char = text[i + 1] if i + 1 < len(text) else ""
+            is_end = not next_char or next_char.isspace()
+        if is_end:
+            if current.strip():
+                sentences.append(current.strip())
+            current = ""
+    if current.strip():
+        sentences.append(current.strip())
+    return sentences
+
+
+def split_text(text: str, max_chars: int = 0) -> List[str]:
+    """
+    把文本切成不超过 max_chars 的若干段（单句超长时该句独立成段）
+
+    段与段之间先按自然段切开，修改某一自然段不会改变其他自然段的分段结果（缓存仍可命中）
+    """
+    if max_chars <= 0:
+        max_chars = config.app.get("tts_chunk_chars", 400)
+
+    chunks = []
+    for paragraph in text.split("\n"):
+        current = ""
+        for sentence in split_sentences(paragraph):
+            if not current:
+                current = sentence
+                continue
+            joined = f"{current} {sentence}" if _need_space(current) else current + sentence
+            if len(joined) > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = joined
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def _need_space(text: str) -> bool:
+    # 英文等以空格分词的语言，拼接句子时补回空格
+    return text[-1].isascii()
+
+
+def merge_sub_makers(sub_makers: List["SubMaker"], durations: List[float]) -> "SubMaker":
+    """
+    合并各段的 SubMaker，后一段的时间轴按前面各段音频的实际时长平移
+
+    Args:
+        sub_makers: 各段的 SubMaker
+        durations: 各段音频时长（秒）
+    """
+    merged = edge_tts.SubMaker()
+    shift = 0
+    for sub_maker, duration in zip(sub_makers, durations):
+        for (start, end), sub in zip(sub_maker.offset, sub_maker.subs):
+            merged.offset.append((start + shift, end + shift))
+            merged.subs.append(sub)
+        # 时间单位为100纳秒，与 edge_tts 保持一致
+        chunk_length = int(duration * 10000000)
+        if sub_maker.offset:
+            chunk_length = max(chunk_length, sub_maker.offset[-1][1])
+        shift += chunk_length
+    return merged
+
+
+def concat_audio(audio_files: List[str], output_file: str, work_dir: str) -> bool:
+    """
+    拼接音频：优先 -c copy 直接拼接，格式不一致时重新编码，没有ffmpeg时直接拼接mp3字节流
+    """
+    from app.services.video_fast import find_ffmpeg
+
+    ffmpeg_path = find_ffmpeg()
+    if not ffmpeg_path:
+        with open(output_file, "wb") as out:
+            for audio_file in audio_files:
+                with open(audio_file, "rb") as f:
+                    shutil.copyfileobj(f, out)
+        return True
+
+    concat_file = os.path.join(work_dir, "concat_list.txt")
+    with open(concat_file, "w", encoding="utf-8") as f:
+        for audio_file in audio_files:
+            safe_path = audio_file.replace("\\", "/").replace("'", "\\'")
+            f.write(f"file '{safe_path}'\n")
+
+    base_cmd = [ffmpeg_path, "-y", "-f", "concat", "-safe", "0", "-i", concat_file]
+    for codec_args in (["-c", "copy"], ["-c:a", "libmp3lame", "-q:a", "2"]):
+        result = subprocess.run(
+            base_cmd + codec_args + [output_file], capture_output=True, text=True
+        )
+        if result.returncode == 0:
+            return True
+        logger.warning(f"failed to concat audio ({codec_args[1]}): {result.stderr[-300:]}")
+    return False
+
+
+def _max_workers(voice_name: str) -> int:
+    # pyttsx3 使用本地系统引擎，不支持多线程并发
+    if voice.is_pyttsx3_voice(voice_name):
+        return 1
+    return max(1, int(config.app.get("tts_workers", 4)))
+
+
+def _synthesize_chunk(
+    text: str,
+    voice_name: str,
+    voice_rate: float,
+    voice_volume: float,
+    chunk_file: str,
+    cache_key: str = "",
+) -> Optional[Tuple["SubMaker", float]]:
+    """
+    合成一段文本并写入 tts_cache，返回 (SubMaker, 音频时长)，失败返回 None
+    """
+    sub_maker = voice.tts(text, voice_name, voice_rate, chunk_file, voice_volume)
+    if sub_maker is None or not os.path.exists(chunk_file):
+        logger.error(f"tts chunk failed: {os.path.basename(chunk_file)}")
+        return None
+    info = media_probe.probe(chunk_file, use_cache=False)
+    duration = info.duration if info else 0.0
+    cache_key = cache_key or tts_cache.make_key(voice_name, voice_rate, voice_volume, text)
+    tts_cache.put(cache_key, chunk_file, sub_maker, duration)
+    return sub_maker, duration
+
+
+def _assemble(
+    results: List[Tuple["SubMaker", float]], chunk_files: List[str], voice_file: str, work_dir: str
+) -> Union["SubMaker", None]:
+    """
+    拼接各段音频并合并时间轴
+    """
+    if len(chunk_files) == 1:
+        shutil.copyfile(chunk_files[0], voice_file)
+    elif not concat_audio(chunk_files, voice_file, work_dir):
+        return None
+
+    if config.app.get("voice_loudnorm", False):
+        # 整段统一做响度归一化，避免各段音量忽大忽小
+        audio.postprocess_audio(voice_file, loudnorm=True)
+
+    sub_maker = merge_sub_makers(
+        [result[0] for result in results], [result[1] for result in results]
+    )
+    logger.success(
+        f"tts completed: {voice_file}, duration: {voice.get_audio_duration(sub_maker):.2f}s"
+    )
+    return sub_maker
+
+
+def tts(
+    text: str,
+    voice_name: str,
+    voice_rate: float,
+    voice_file: str,
+    voice_volume: float = 1.0,
+) -> Union["SubMaker", None]:
+    """
+    分段并行合成语音，参数与返回值同 voice.tts
+    """
+    chunks = split_text(text.strip())
+    if not chunks:
+        logger.error("tts failed, text is empty")
+        return None
+
+    work_dir = utils.temp_dir(f"tts-{utils.md5(voice_file)}")
+    chunk_files = [
+        os.path.join(work_dir, f"chunk-{i + 1}.mp3") for i in range(len(chunks))
+    ]
+    cache_keys = [
+        tts_cache.make_key(voice_name, voice_rate, voice_volume, chunk)
+        for chunk in chunks
+    ]
+
+    def _synthesize(index: int) -> Optional[Tuple["SubMaker", float]]:
+        return _synthesize_chunk(
+            chunks[index], voice_name, voice_rate, voice_volume, chunk_files[index], cache_keys[index]
+        )
+
+    try:
+        results = [
+            tts_cache.get(key, chunk_file)
+            for key, chunk_file in zip(cache_keys, chunk_files)
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        workers = max(1, min(_max_workers(voice_name), len(pending)))
+        logger.info(
+            f"tts in {len(chunks)} chunks, cached: {len(chunks) - len(pending)}, "
+            f"workers: {workers}, total chars: {len(text)}"
+        )
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for index, result in zip(pending, executor.map(_synthesize, pending)):
+                    results[index] = result
+        if any(result is None for result in results):
+            return None
+
+        return _assemble(results, chunk_files, voice_file, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def tts_stream(
+    paragraphs: Iterable[str],
+    voice_name: str,
+    voice_rate: float,
+    voice_file: str,
+    voice_volume: float = 1.0,
+) -> Optional[Tuple["SubMaker", str]]:
+    """
+    边接收文案边合成：每收到一个完整的段落就立即切分并提交合成，不等待整篇文案生成完毕
+
+    Args:
+        paragraphs: 逐段产出的文案（例如 llm.generate_script_stream）
+
+    Returns:
+        (SubMaker, 完整文案)，文案生成或任一段合成失败时返回 None
+    """
+    start = time.time()
+    work_dir = utils.temp_dir(f"tts-{utils.md5(voice_file)}")
+    texts = []
+    chunk_files = []
+    futures = []
+
+    def _synthesize(chunk: str, chunk_file: str) -> Optional[Tuple["SubMaker", float]]:
+        cache_key = tts_cache.make_key(voice_name, voice_rate, voice_volume, chunk)
+        cached = tts_cache.get(cache_key, chunk_file)
+        if cached is not None:
+            return cached
+        return _synthesize_chunk(chunk, voice_name, voice_rate, voice_volume, chunk_file, cache_key)
+
+    def _first_audio(future):
+        if future.result() is not None:
+            logger.info(f"first tts chunk ready after {time.time() - start:.2f}s")
+
+    try:
+        with ThreadPoolExecutor(max_workers=_max_workers(voice_name)) as executor:
+            try:
+                for paragraph in paragraphs:
+                    paragraph = paragraph.strip()
+                    if not paragraph:
+                        continue
+                    texts.append(paragraph)
+                    for chunk in split_text(paragraph):
+                        chunk_file = os.path.join(work_dir, f"chunk-{len(chunk_files) + 1}.mp3")
+                        chunk_files.append(chunk_file)
+                        futures.append(executor.submit(_synthesize, chunk, chunk_file))
+                        if len(futures) == 1:
+                            futures[0].add_done_callback(_first_audio)
+                    logger.info(
+                        f"paragraph {len(texts)} received after {time.time() - start:.2f}s, "
+                        f"tts chunks submitted: {len(futures)}"
+                    )
+            except Exception as e:
+                logger.error(f"failed to receive script: {str(e)}")
+                for future in futures:
+                    future.cancel()
+                return None
+            results = [future.result() for future in futures]
+
+        if not results:
+            logger.error("tts failed, text is empty")
+            return None
+        if any(result is None for result in results):
+            return None
+
+        sub_maker = _assemble(results, chunk_files, voice_file, work_dir)
+        if sub_maker is None:
+            return None
+        return sub_maker, "\n\n".join(texts)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,177 @@
+"""
+按时间索引的叠加层合成
+
+MoviePy 的 CompositeVideoClip 每一帧都会遍历全部叠加层判断是否在显示，并用 Pillow 逐层
+alpha_composite（每层都新建一张整帧大小的画布）。古书卷轴主题会生成上千个逐字的叠加层，
+合成耗时与叠加层总数成正比。
+
+IndexedCompositeVideoClip 与 CompositeVideoClip 用法相同：
+- 按固定时长把时间轴分桶，每个桶记录与之重叠的叠加层，查找当前显示的叠加层只看一个桶
+- 直接用 NumPy 在复用的整帧缓冲区上做预乘 alpha 混合，只处理叠加层覆盖的区域，
+  每帧耗时与当前可见的叠加层数量成正比
+- 返回的画面与遮罩也是复用的缓冲区，在下一次取帧前有效（写视频时逐帧立即编码，不受影响）
+"""
+import math
+from typing import List
+
+import numpy as np
+from moviepy import CompositeVideoClip
+from moviepy.tools import compute_position
+
+# 时间索引每个桶的时长（秒）
+_BUCKET_SECONDS = 0.5
+
+
+class IndexedCompositeVideoClip(CompositeVideoClip):
+    def __init__(
+        self, clips, size=None, bg_color=None, use_bgclip=False, is_mask=False
+    ):
+        super().__init__(
+            clips, size=size, bg_color=bg_color, use_bgclip=use_bgclip, is_mask=is_mask
+        )
+        if isinstance(self.mask, CompositeVideoClip) and not isinstance(
+            self.mask, IndexedCompositeVideoClip
+        ):
+            # 父类用普通 CompositeVideoClip 合成遮罩，换成带索引的版本
+            self.mask = IndexedCompositeVideoClip(
+                self.mask.clips, self.size, is_mask=True, bg_color=0.0
+            )
+
+        self._starts = [clip.start for clip in self.clips]
+        self._ends = [math.inf if clip.end is None else clip.end for clip in self.clips]
+        # 没有结束时间的叠加层在每个桶中都要检查
+        self._unbounded = [i for i, end in enumerate(self._ends) if end == math.inf]
+        self._buckets: List[List[int]] = []
+        for i, (start, end) in enumerate(zip(self._starts, self._ends)):
+            if end == math.inf:
+                continue
+            first = max(0, int(start // _BUCKET_SECONDS))
+            last = max(first, int(math.ceil(end / _BUCKET_SECONDS)) - 1)
+            if last >= len(self._buckets):
+                self._buckets.extend([] for _ in range(last + 1 - len(self._buckets)))
+            for bucket in range(first, last + 1):
+                # 按 i 递增加入，桶内保持叠加顺序
+                self._buckets[bucket].append(i)
+
+        width, height = self.size
+        self._alpha = np.zeros((height, width), dtype=np.float32)
+        self._premultiplied = None if is_mask else np.zeros((height, width, 3), dtype=np.float32)
+        self._result = None if is_mask else np.zeros((height, width, 3), dtype=np.float32)
+        self._frame = None if is_mask else np.zeros((height, width, 3), dtype=np.uint8)
+        self._bg_cache = None
+
+    def playing_clips(self, t=0):
+        """
+        当前显示的叠加层（按叠加顺序），只检查 t 所在桶中的叠加层
+        """
+        if isinstance(t, np.ndarray):
+            return super().playing_clips(t)
+        bucket = int(t // _BUCKET_SECONDS)
+        candidates = self._buckets[bucket] if 0 <= bucket < len(self._buckets) else []
+        if self._unbounded:
+            candidates = sorted(candidates + self._unbounded)
+        return [
+            self.clips[i]
+            for i in candidates
+            if self._starts[i] <= t < self._ends[i]
+        ]
+
+    def _background(self, t):
+        """
+        背景的 (预乘颜色, 透明度)；自动生成的纯色背景不随时间变化，只计算一次
+        """
+        if self.created_bg and self._bg_cache is not None:
+            return self._bg_cache
+
+        frame = self.bg.get_frame(t - self.bg.start)
+        if self.bg.mask is not None:
+            alpha = _fit_mask(self.bg.mask.get_frame(t - self.bg.mask.start), frame.shape[:2])
+        else:
+            alpha = np.ones(frame.shape[:2], dtype=np.float32)
+        alpha = alpha.astype(np.float32)
+        background = (frame[:, :, :3].astype(np.float32) * alpha[:, :, None], alpha)
+
+        if self.created_bg:
+            self._bg_cache = background
+        return background
+
+    def frame_function(self, t):
+        premultiplied, alpha = self._premultiplied, self._alpha
+        height, width = alpha.shape
+
+        if self.is_mask:
+            # 与 MoviePy 相同，遮罩从全透明开始合成（背景的遮罩已作为第一个叠加层）
+            alpha.fill(0)
+        else:
+            bg_premultiplied, bg_alpha = self._background(t)
+            premultiplied.fill(0)
+            alpha.fill(0)
+            _paste(premultiplied, bg_premultiplied, 0, 0)
+            _paste(alpha, bg_alpha, 0, 0)
+
+        for clip in self.playing_clips(t):
+            ct = t - clip.start
+            frame = clip.get_frame(ct)
+            clip_h, clip_w = frame.shape[:2]
+            x, y = compute_position((clip_w, clip_h), (width, height), clip.pos(ct), clip.relative_pos)
+
+            # 叠加层与画面重叠的区域
+            x0, y0 = max(x, 0), max(y, 0)
+            x1, y1 = min(x + clip_w, width), min(y + clip_h, height)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            clip_region = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+            region = (slice(y0, y1), slice(x0, x1))
+
+            if self.is_mask:
+                # 与 CompositeVideoClip.compose_mask 相同：base + clip * (1 - base)
+                source = frame[clip_region]
+                alpha[region] += source * (1 - alpha[region])
+                continue
+
+            if clip.mask is not None:
+                source_alpha = _fit_mask(clip.mask.get_frame(ct), (clip_h, clip_w))[clip_region]
+            elif frame.shape[2] == 4:
+                source_alpha = frame[clip_region][:, :, 3] / 255.0
+            else:
+                # 不透明的叠加层直接覆盖
+                premultiplied[region] = frame[clip_region][:, :, :3]
+                alpha[region] = 1.0
+                continue
+
+            source_alpha = source_alpha.astype(np.float32)
+            inverse = 1 - source_alpha
+            premultiplied[region] *= inverse[:, :, None]
+            premultiplied[region] += frame[clip_region][:, :, :3] * source_alpha[:, :, None]
+            alpha[region] *= inverse
+            alpha[region] += source_alpha
+
+        if self.is_mask:
+            return alpha
+
+        # 还原为非预乘的颜色（与 Pillow alpha_composite 的结果一致），透明度由遮罩负责
+        result = self._result
+        result.fill(0)
+        np.divide(premultiplied, alpha[:, :, None], out=result, where=alpha[:, :, None] > 0)
+        result += 0.5
+        np.clip(result, 0, 255, out=result)
+        np.copyto(self._frame, result, casting="unsafe")
+        return self._frame
+
+
+def _fit_mask(mask: np.ndarray, shape) -> np.ndarray:
+    """
+    遮罩与画面尺寸不一致时按左上角对齐裁剪或补零（与 MoviePy 的处理一致）
+    """
+    if mask.shape[:2] == tuple(shape):
+        return mask
+    fitted = np.zeros(shape, dtype=np.float32)
+    h, w = min(shape[0], mask.shape[0]), min(shape[1], mask.shape[1])
+    fitted[:h, :w] = mask[:h, :w]
+    return fitted
+
+
+def _paste(target: np.ndarray, source: np.ndarray, x: int, y: int):
+    h = min(target.shape[0] - y, source.shape[0])
+    w = min(target.shape[1] - x, source.shape[1])
+    target[y:y + h, x:x + w] = source[:h, :w]
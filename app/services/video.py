@@ -1,10 +1,11 @@
 import glob
 import itertools
+import json
 import os
 import random
 import gc
 import shutil
-from typing import List
+from typing import List, Optional, Tuple
 from loguru import logger
 from moviepy import (
     AudioFileClip,
@@ -17,9 +18,9 @@ from moviepy import (
     afx,
     concatenate_videoclips,
 )
-from moviepy.video.tools.subtitles import SubtitlesClip
 from PIL import ImageFont
 
+from app.config import config
 from app.models import const
 from app.models.schema import (
     MaterialInfo,
@@ -29,7 +30,9 @@ from app.models.schema import (
     VideoTransitionMode,
     VideoTheme,
 )
+from app.services import audio, encoder, media_probe, streaming, subtitle_model
 from app.services.utils import video_effects
+from app.services.utils.compositor import IndexedCompositeVideoClip
 from app.utils import utils
 
 # GPU编码器缓存（避免重复检测）
@@ -150,6 +153,59 @@ audio_codec = "aac"
 video_codec = "libx264"
 fps = 30
 
+
+def preview_scale(params: VideoParams) -> float:
+    """
+    预览模式下画面的缩放比例（配置 preview_scale，默认 0.5），非预览时为 1
+    """
+    if not params.preview:
+        return 1.0
+    return min(1.0, max(0.1, float(config.app.get("preview_scale", 0.5))))
+
+
+def render_size(params: VideoParams) -> Tuple[int, int]:
+    """
+    最终画面尺寸：预览模式按 preview_scale 缩小，保持偶数（yuv420p 要求）
+    """
+    video_width, video_height = VideoAspect(params.video_aspect).to_resolution()
+    scale = preview_scale(params)
+    if scale >= 1.0:
+        return video_width, video_height
+    return int(video_width * scale) // 2 * 2, int(video_height * scale) // 2 * 2
+
+
+def render_fps(params: VideoParams) -> int:
+    return int(config.app.get("preview_fps", 15)) if params.preview else fps
+
+
+def render_profile(params: VideoParams) -> Optional[str]:
+    # 预览统一使用 draft 编码
+    return "draft" if params.preview else params.encoder_profile
+
+
+def render_duration(params: VideoParams, duration: float) -> float:
+    """
+    实际渲染时长：预览模式且设置了 preview_duration 时只渲染前 N 秒
+    """
+    if params.preview and params.preview_duration and params.preview_duration > 0:
+        return min(duration, float(params.preview_duration))
+    return duration
+
+
+def _scaled_params(params: VideoParams) -> VideoParams:
+    """
+    预览时按比例缩小字号和描边，排版与最终画面一致
+    """
+    scale = preview_scale(params)
+    if scale >= 1.0:
+        return params
+    return params.model_copy(
+        update={
+            "font_size": max(1, round(params.font_size * scale)),
+            "stroke_width": params.stroke_width * scale,
+        }
+    )
+
 def close_clip(clip):
     if clip is None:
         return
@@ -205,7 +261,8 @@ def _generate_video_from_single_image(
     video_width: int,
     video_height: int,
     threads: int = 2,
-    enable_animation: bool = False
+    enable_animation: bool = False,
+    video_fps: int = 0,
 ) -> str:
     """
     从单一图片直接生成视频，可选缩放动画效果
@@ -266,26 +323,19 @@ def _generate_video_from_single_image(
         # 优化编码参数以提升速度
         logger.info(f"  - writing video file (optimized encoding)...")
         
-        # 检测GPU编码器
-        gpu_codec, gpu_params = detect_gpu_encoder()
+        # 拼接结果还会被最终渲染再次解码，使用中间文件编码
+        encode_args = encoder.moviepy_args(encoder.INTERMEDIATE_PROFILE)
         
-        # 使用更快的编码预设
         output_dir = os.path.dirname(output_path)
         
-        # 构建完整的ffmpeg参数
-        ffmpeg_params = gpu_params + [
-            '-movflags', '+faststart',  # 优化web播放
-        ]
-        
         final_clip.write_videofile(
             output_path,
-            fps=fps,
-            codec=gpu_codec,  # 使用GPU编码器
+            fps=video_fps or fps,
             threads=threads,
             logger=None,
             audio=False,  # 不包含音频
             temp_audiofile_path=output_dir,
-            ffmpeg_params=ffmpeg_params
+            **encode_args
         )
         
         close_clip(clip)
@@ -367,6 +417,85 @@ def _generate_white_noise(duration=60, sample_rate=44100):
         return ""
 
 
+def concat_copy(clip_files: List[str], output_file: str, work_dir: str) -> bool:
+    """
+    使用 ffmpeg concat demuxer 直接复制视频流合并片段（要求所有片段编码参数一致）
+    """
+    import subprocess
+    from app.services.video_fast import find_ffmpeg
+
+    ffmpeg_path = find_ffmpeg()
+    if not ffmpeg_path:
+        return False
+
+    concat_file = os.path.join(work_dir, "concat_list.txt")
+    with open(concat_file, "w", encoding="utf-8") as f:
+        for clip_file in clip_files:
+            safe_path = clip_file.replace("\\", "/").replace("'", "\\'")
+            f.write(f"file '{safe_path}'\n")
+
+    cmd = [
+        ffmpeg_path,
+        "-f", "concat",
+        "-safe", "0",
+        "-i", concat_file,
+        "-map", "0:v:0",
+        "-c", "copy",
+        "-an",
+        "-y",
+        output_file,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        utils.raise_for_no_space(result.stderr)
+        logger.warning(f"failed to concat clips: {result.stderr[-500:]}")
+        return False
+    return True
+
+
+def save_clip_plan(
+    clip_plan_file: str, video_paths: List[str], items: List[SubClippedVideoClip]
+):
+    plan = {
+        "materials": list(video_paths),
+        "clips": [
+            {
+                "file_path": item.file_path,
+                "start_time": item.start_time,
+                "end_time": item.end_time,
+                "width": item.width,
+                "height": item.height,
+            }
+            for item in items
+        ],
+    }
+    with open(clip_plan_file, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+
+
+def load_clip_plan(clip_plan_file: str, video_paths: List[str] = None) -> Optional[dict]:
+    """
+    读取片段计划：{"materials": 素材路径, "clips": SubClippedVideoClip 列表}
+
+    文件不存在、无效、素材已被删除或与 video_paths 不一致时返回 None（重新生成计划）
+    """
+    if not clip_plan_file or not os.path.isfile(clip_plan_file):
+        return None
+    try:
+        with open(clip_plan_file, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+        plan["clips"] = [SubClippedVideoClip(**item) for item in plan["clips"]]
+    except Exception as e:
+        logger.warning(f"invalid clip plan: {clip_plan_file}, {str(e)}")
+        return None
+    if video_paths is not None and plan["materials"] != list(video_paths):
+        return None
+    if not all(os.path.isfile(p) for p in plan["materials"]):
+        logger.warning(f"materials in clip plan not found: {clip_plan_file}")
+        return None
+    return plan
+
+
 def combine_videos(
     combined_video_path: str,
     video_paths: List[str],
@@ -377,26 +506,42 @@ def combine_videos(
     max_clip_duration: int = 5,
     threads: int = 2,
     enable_animation: bool = False,
+    video_size: Tuple[int, int] = None,
+    video_fps: int = 0,
+    max_duration: float = 0,
+    clip_plan_file: str = "",
 ) -> str:
-    audio_clip = AudioFileClip(audio_file)
-    audio_duration = audio_clip.duration
+    """
+    按音频时长裁剪、拼接素材
+
+    Args:
+        video_size: 输出尺寸，为空时使用 video_aspect 对应的分辨率（预览时传入缩小后的尺寸）
+        video_fps: 输出帧率，为 0 时使用默认帧率
+        max_duration: 只生成前 N 秒（预览），0 表示与音频等长
+        clip_plan_file: 片段计划（素材及裁剪区间、顺序）文件，已存在时按计划拼接，否则生成后写入，
+                        保证预览与最终渲染使用完全相同的片段
+    """
+    audio_duration = media_probe.get_duration(audio_file)
     logger.info(f"audio duration: {audio_duration} seconds")
+    if max_duration and max_duration > 0:
+        audio_duration = min(audio_duration, max_duration)
+    video_fps = video_fps or fps
+    clip_plan = load_clip_plan(clip_plan_file, video_paths)
     # Required duration of each clip
     req_dur = audio_duration / len(video_paths)
     req_dur = max_clip_duration
     logger.info(f"maximum clip duration: {req_dur} seconds")
-    output_dir = os.path.dirname(combined_video_path)
-
     aspect = VideoAspect(video_aspect)
-    video_width, video_height = aspect.to_resolution()
-    
+    video_width, video_height = video_size or aspect.to_resolution()
+
     # 优化：检测到单一静态图片资源时，直接生成视频而不走复杂拼接流程
     if len(video_paths) == 1:
         single_path = video_paths[0]
         ext = utils.parse_extension(single_path)
         if ext in const.FILE_TYPE_IMAGES:
             logger.info(f"detected single image material, using fast generation path")
-            close_clip(audio_clip)
+            if clip_plan_file and clip_plan is None:
+                save_clip_plan(clip_plan_file, video_paths, [])
             return _generate_video_from_single_image(
                 image_path=single_path,
                 audio_duration=audio_duration,
@@ -404,17 +549,63 @@ def combine_videos(
                 video_width=video_width,
                 video_height=video_height,
                 threads=threads,
-                enable_animation=enable_animation
+                enable_animation=enable_animation,
+                video_fps=video_fps,
             )
 
+    # 临时片段写入临时目录（可能位于内存文件系统），最终只把结果移动到任务目录；
+    # 按片段总大小的估算值选择目录，写入时空间不足则整个阶段改用磁盘上的目录重新执行
+    return utils.run_in_temp_dir(
+        f"combine-{utils.md5(combined_video_path)}",
+        lambda output_dir: _combine_clips(
+            output_dir,
+            combined_video_path=combined_video_path,
+            video_paths=video_paths,
+            clip_plan=clip_plan,
+            clip_plan_file=clip_plan_file,
+            audio_duration=audio_duration,
+            video_concat_mode=video_concat_mode,
+            video_transition_mode=video_transition_mode,
+            max_clip_duration=max_clip_duration,
+            video_width=video_width,
+            video_height=video_height,
+            video_fps=video_fps,
+            threads=threads,
+        ),
+        size_hint_mb=encoder.estimate_intermediate_mb(
+            video_width, video_height, video_fps, audio_duration
+        ),
+    )
+
+
+def _combine_clips(
+    output_dir: str,
+    combined_video_path: str,
+    video_paths: List[str],
+    clip_plan: Optional[dict],
+    clip_plan_file: str,
+    audio_duration: float,
+    video_concat_mode: VideoConcatMode,
+    video_transition_mode: VideoTransitionMode,
+    max_clip_duration: int,
+    video_width: int,
+    video_height: int,
+    video_fps: int,
+    threads: int,
+) -> str:
+    """
+    裁剪素材写入 output_dir 下的临时片段，再合并为 combined_video_path（目录由调用方清理）
+    """
     processed_clips = []
-    subclipped_items = []
+    subclipped_items = clip_plan["clips"] if clip_plan is not None else []
     video_duration = 0
-    for video_path in video_paths:
-        clip = VideoFileClip(video_path)
-        clip_duration = clip.duration
-        clip_w, clip_h = clip.size
-        close_clip(clip)
+    for video_path in video_paths if clip_plan is None else []:
+        info = media_probe.probe(video_path)
+        if not info or not info.has_video:
+            logger.warning(f"invalid video material, skipped: {video_path}")
+            continue
+        clip_duration = info.duration
+        clip_w, clip_h = info.width, info.height
         
         start_time = 0
 
@@ -426,9 +617,14 @@ def combine_videos(
             if video_concat_mode.value == VideoConcatMode.sequential.value:
                 break
 
-    # random subclipped_items order
-    if video_concat_mode.value == VideoConcatMode.random.value:
-        random.shuffle(subclipped_items)
+    if clip_plan is not None:
+        logger.info(f"using clip plan: {clip_plan_file}")
+    else:
+        # random subclipped_items order
+        if video_concat_mode.value == VideoConcatMode.random.value:
+            random.shuffle(subclipped_items)
+        if clip_plan_file:
+            save_clip_plan(clip_plan_file, video_paths, subclipped_items)
         
     logger.debug(f"total subclipped items: {len(subclipped_items)}")
     
@@ -491,15 +687,13 @@ def combine_videos(
             # wirte clip to temp file
             clip_file = f"{output_dir}/temp-clip-{i+1}.mp4"
             
-            # 检测GPU编码器
-            gpu_codec, gpu_params = detect_gpu_encoder()
-            
+            # 最终渲染不使用素材原声，片段只保留画面，便于直接 concat 合并
             clip.write_videofile(
                 clip_file, 
                 logger=None, 
-                fps=fps, 
-                codec=gpu_codec,
-                ffmpeg_params=gpu_params
+                fps=video_fps, 
+                audio=False,
+                **encoder.moviepy_args(encoder.INTERMEDIATE_PROFILE)
             )
             
             close_clip(clip)
@@ -508,6 +702,8 @@ def combine_videos(
             video_duration += clip.duration
             
         except Exception as e:
+            if utils.is_no_space_error(e):
+                raise
             logger.error(f"failed to process clip: {str(e)}")
     
     # loop processed clips until the video duration matches or exceeds the audio duration.
@@ -531,10 +727,15 @@ def combine_videos(
     if len(processed_clips) == 1:
         logger.info("using single clip directly")
         shutil.copy(processed_clips[0].file_path, combined_video_path)
-        delete_files(processed_clips)
         logger.info("video combining completed")
         return combined_video_path
     
+    # all clips are written with the same intermediate encoding, so they can be joined by stream copy
+    if concat_copy([clip.file_path for clip in processed_clips], combined_video_path, output_dir):
+        logger.info("video combining completed (stream copy)")
+        return combined_video_path
+    logger.warning("stream copy merge failed, merging clips progressively")
+    
     # create initial video file as base
     base_clip_path = processed_clips[0].file_path
     temp_merged_video = f"{output_dir}/temp-merged-video.mp4"
@@ -555,9 +756,6 @@ def combine_videos(
             # merge these two clips
             merged_clip = concatenate_videoclips([base_clip, next_clip])
 
-            # 检测GPU编码器
-            gpu_codec, gpu_params = detect_gpu_encoder()
-            
             # save merged result to temp file
             merged_clip.write_videofile(
                 filename=temp_merged_next,
@@ -565,9 +763,8 @@ def combine_videos(
                 logger=None,
                 temp_audiofile_path=output_dir,
                 audio_codec=audio_codec,
-                fps=fps,
-                codec=gpu_codec,
-                ffmpeg_params=gpu_params
+                fps=video_fps,
+                **encoder.moviepy_args(encoder.INTERMEDIATE_PROFILE)
             )
             close_clip(base_clip)
             close_clip(next_clip)
@@ -578,15 +775,13 @@ def combine_videos(
             os.rename(temp_merged_next, temp_merged_video)
             
         except Exception as e:
+            if utils.is_no_space_error(e):
+                raise
             logger.error(f"failed to merge clip: {str(e)}")
             continue
     
-    # after merging, rename final result to target file name
-    os.rename(temp_merged_video, combined_video_path)
-    
-    # clean temp files
-    clip_files = [clip.file_path for clip in processed_clips]
-    delete_files(clip_files)
+    # after merging, move final result to target file name (temp dir may be on another filesystem)
+    shutil.move(temp_merged_video, combined_video_path)
             
     logger.info("video combining completed")
     return combined_video_path
@@ -1121,27 +1316,7 @@ def create_title_clips_for_theme(theme, title_text, font_path, video_width, vide
         return [title_clip]
 
 
-def generate_video(
-    video_path: str,
-    audio_path: str,
-    subtitle_path: str,
-    output_file: str,
-    params: VideoParams,
-):
-    aspect = VideoAspect(params.video_aspect)
-    video_width, video_height = aspect.to_resolution()
-
-    logger.info(f"generating video: {video_width} x {video_height}")
-    logger.info(f"  ① video: {video_path}")
-    logger.info(f"  ② audio: {audio_path}")
-    logger.info(f"  ③ subtitle: {subtitle_path}")
-    logger.info(f"  ④ output: {output_file}")
-
-    # https://github.com/harry0703/MoneyPrinterTurbo/issues/217
-    # PermissionError: [WinError 32] The process cannot access the file because it is being used by another process: 'final-1.mp4.tempTEMP_MPY_wvf_snd.mp3'
-    # write into the same directory as the output file
-    output_dir = os.path.dirname(output_file)
-
+def _resolve_font_path(params: VideoParams) -> str:
     font_path = ""
     if params.subtitle_enabled:
         if not params.font_name:
@@ -1187,6 +1362,32 @@ def generate_video(
         if os.name == "nt":
             font_path = font_path.replace("\\", "/")
 
+    return font_path
+
+
+def build_overlay_layers(
+    subtitle_path: str,
+    params: VideoParams,
+    video_duration: float,
+    audio_duration: float = 0,
+) -> list:
+    """
+    生成叠加在画面上的字幕和标题图层（位置、时间都相对于最终画面）
+
+    图层只与字幕、标题和主题有关，与素材画面无关，同一任务的多个视频可以共用
+
+    Args:
+        subtitle_path: 字幕文件
+        params: 视频参数
+        video_duration: 画面时长
+        audio_duration: 音频时长（书本类主题按两者中较长的时长排版字幕）
+    """
+    video_width, video_height = render_size(params)
+    # 在副本上调整字号、描边和回退字体，调用方的参数（之后会保存到 script.json）保持不变
+    params = _scaled_params(params.model_copy())
+    font_path = _resolve_font_path(params)
+    layers = []
+
     def create_text_clip(subtitle_item):
         params.font_size = int(params.font_size)
         params.stroke_width = int(params.stroke_width)
@@ -1234,23 +1435,9 @@ def generate_video(
             _clip = _clip.with_position(("center", "center"))
         return _clip
 
-    video_clip = VideoFileClip(video_path).without_audio()
-    audio_clip = AudioFileClip(audio_path).with_effects(
-        [afx.MultiplyVolume(params.voice_volume)]
-    )
-
-    def make_textclip(text):
-        return TextClip(
-            text=text,
-            font=font_path,
-            font_size=params.font_size,
-        )
-
-    if subtitle_path and os.path.exists(subtitle_path):
+    subtitle_items = subtitle_model.load(subtitle_path).items()
+    if subtitle_items:
         logger.info(f"  ⑥ adding subtitles (theme: {params.video_theme})...")
-        sub = SubtitlesClip(
-            subtitles=subtitle_path, encoding="utf-8", make_textclip=make_textclip
-        )
         text_clips = []
         
         # 根据主题选择不同的字幕样式
@@ -1265,12 +1452,11 @@ def generate_video(
             subtitle_y_offset = getattr(params, 'subtitle_y_offset', 0)
             
             # 使用音频时长作为video_duration，确保所有字幕都能显示
-            # 对于静态图片+音频，video_clip.duration可能不准确，audio_clip.duration才是完整时长
-            total_duration = max(audio_clip.duration, video_clip.duration)
-            logger.info(f"  total duration: video={video_clip.duration:.2f}s, audio={audio_clip.duration:.2f}s, using={total_duration:.2f}s")
+            total_duration = max(audio_duration, video_duration)
+            logger.info(f"  total duration: video={video_duration:.2f}s, audio={audio_duration:.2f}s, using={total_duration:.2f}s")
             
             text_clips = create_accumulated_subtitles_for_book_theme(
-                subtitle_items=sub.subtitles,
+                subtitle_items=subtitle_items,
                 font_path=font_path,
                 font_size=params.font_size,
                 video_width=video_width,
@@ -1285,11 +1471,15 @@ def generate_video(
             )
         else:
             # 其他模式：使用传统横排字幕
-            for item in sub.subtitles:
+            for item in subtitle_items:
                 clip = create_text_clip(subtitle_item=item)
                 text_clips.append(clip)
         
-        video_clip = CompositeVideoClip([video_clip, *text_clips])
+        layers.extend(text_clips)
+        # 标题时长与叠加字幕后的画面一致
+        video_duration = max(
+            [video_duration] + [c.end for c in text_clips if c.end is not None]
+        )
         logger.success(f"  ✓ subtitles added ({len(text_clips)} clips)")        
     
     # 添加视频标题显示（根据主题）
@@ -1302,8 +1492,8 @@ def generate_video(
             title_x_offset = getattr(params, 'title_x_offset', 0)
             title_y_offset = getattr(params, 'title_y_offset', 0)
             
-            # 使用与video_clip相同的时长（已经包含了字幕）
-            current_duration = video_clip.duration
+            # 使用与画面相同的时长（已经包含了字幕）
+            current_duration = video_duration
             
             # 根据主题创建标题
             title_clips = create_title_clips_for_theme(
@@ -1320,7 +1510,7 @@ def generate_video(
             )
             
             # 将标题叠加到视频上
-            video_clip = CompositeVideoClip([video_clip, *title_clips])
+            layers.extend(title_clips)
             
             logger.success(f"  ✓ title added successfully ({len(title_clips)} clips, theme: {theme})")
         except Exception as e:
@@ -1328,7 +1518,55 @@ def generate_video(
             import traceback
             traceback.print_exc()
 
-    bgm_file = get_bgm_file(bgm_type=params.bgm_type, bgm_file=params.bgm_file)
+    return layers
+
+
+def generate_video(
+    video_path: str,
+    audio_path: str,
+    subtitle_path: str,
+    output_file: str,
+    params: VideoParams,
+    mixed_audio_path: str = "",
+):
+    """
+    mixed_audio_path: audio.mix_audio_track 生成的最终音轨，传入时不再混音，画面编码后直接封装该音轨
+    """
+    video_width, video_height = render_size(params)
+
+    logger.info(f"generating video: {video_width} x {video_height}{' (preview)' if params.preview else ''}")
+    logger.info(f"  ① video: {video_path}")
+    logger.info(f"  ② audio: {audio_path}")
+    logger.info(f"  ③ subtitle: {subtitle_path}")
+    logger.info(f"  ④ output: {output_file}")
+
+    # https://github.com/harry0703/MoneyPrinterTurbo/issues/217
+    # PermissionError: [WinError 32] The process cannot access the file because it is being used by another process: 'final-1.mp4.tempTEMP_MPY_wvf_snd.mp3'
+    # write into the same directory as the output file
+    output_dir = os.path.dirname(output_file)
+
+    video_clip = VideoFileClip(video_path).without_audio()
+    preview_duration = render_duration(params, video_clip.duration)
+    if preview_duration < video_clip.duration:
+        video_clip = video_clip.subclipped(0, preview_duration)
+    audio_clip = None
+    if not mixed_audio_path:
+        audio_clip = AudioFileClip(audio_path).with_effects(
+            [afx.MultiplyVolume(params.voice_volume)]
+        )
+
+    # 对于静态图片+音频，video_clip.duration可能不准确，audio_clip.duration才是完整时长
+    audio_duration = (
+        audio_clip.duration if audio_clip else media_probe.get_duration(mixed_audio_path)
+    )
+    layers = build_overlay_layers(
+        subtitle_path, params, video_clip.duration, audio_duration
+    )
+    if layers:
+        # 叠加层按时间建立索引，每帧只合成正在显示的叠加层
+        video_clip = IndexedCompositeVideoClip([video_clip, *layers])
+
+    bgm_file = "" if mixed_audio_path else get_bgm_file(bgm_type=params.bgm_type, bgm_file=params.bgm_file)
     if bgm_file:
         try:
             logger.info(f"  ⑦ adding background music: {os.path.basename(bgm_file)}")
@@ -1345,31 +1583,38 @@ def generate_video(
             logger.error(f"failed to add bgm: {str(e)}")
     
     logger.info(f"  ⑧ starting final video encoding (this may take a while)...")
-    video_clip = video_clip.with_audio(audio_clip)
     
     import time
     encode_start = time.time()
     
-    # 检测GPU编码器
-    gpu_codec, gpu_params = detect_gpu_encoder()
+    if mixed_audio_path:
+        if _write_with_mixed_audio(video_clip, output_file, mixed_audio_path, params):
+            encode_time = time.time() - encode_start
+            logger.success(f"  ✓ final video encoding completed in {encode_time:.1f}s")
+            video_clip.close()
+            del video_clip
+            return
+        logger.warning("  - failed to mux mixed audio track, falling back to moviepy")
+        audio_clip = AudioFileClip(mixed_audio_path)
+    
+    video_clip = video_clip.with_audio(audio_clip)
+    
+    # 最终输出使用任务选择的编码配置
+    encode_args = encoder.moviepy_args(render_profile(params))
+    encode_args["ffmpeg_params"] += ['-movflags', '+faststart']
+    logger.info(f"  - encoder: {encode_args['codec']} ({encoder.resolve_profile(render_profile(params))})")
     
     # 使用最优线程数
     optimal_threads = params.n_threads if params.n_threads else get_optimal_threads()
     
-    # 构建完整的ffmpeg参数
-    ffmpeg_params = gpu_params + [
-        '-movflags', '+faststart',
-    ]
-    
     video_clip.write_videofile(
         output_file,
         audio_codec=audio_codec,
-        codec=gpu_codec,  # 使用GPU编码器
         temp_audiofile_path=output_dir,
         threads=optimal_threads,
         logger=None,
-        fps=fps,
-        ffmpeg_params=ffmpeg_params
+        fps=render_fps(params),
+        **encode_args
     )
     
     encode_time = time.time() - encode_start
@@ -1379,6 +1624,188 @@ def generate_video(
     del video_clip
 
 
+def _write_with_mixed_audio(
+    video_clip, output_file: str, mixed_audio_path: str, params: VideoParams
+) -> bool:
+    """
+    画面通过管道送入 ffmpeg 编码，混好的音轨作为第二路输入直接封装（AAC 时 -c:a copy）
+    """
+    video_args = encoder.ffmpeg_args(render_profile(params))
+    logger.info(f"  - encoder: {video_args[1]} ({encoder.resolve_profile(render_profile(params))}), audio: {os.path.basename(mixed_audio_path)}")
+    try:
+        return streaming.write_clip(
+            video_clip,
+            output_file,
+            fps=render_fps(params),
+            video_args=video_args,
+            inputs=["-i", mixed_audio_path],
+            output_args=[
+                "-map", "0:v",
+                "-map", "1:a",
+                *audio.mux_codec_args(mixed_audio_path),
+                "-shortest",
+                "-movflags", "+faststart",
+            ],
+        )
+    except Exception as e:
+        logger.error(f"failed to render video: {str(e)}")
+        return False
+
+
+def render_overlay(
+    subtitle_path: str, params: VideoParams, duration: float, output_file: str
+) -> Optional[str]:
+    """
+    把字幕和标题图层单独渲染成带透明通道的视频（QuickTime RLE），同一任务的多个视频共用，
+    每个视频只需要用 ffmpeg overlay 叠加，不必各自重新排版、合成字幕
+
+    颜色按 MoviePy 的方式与黑色背景混合，即预乘透明度，叠加时使用 alpha=premultiplied
+
+    Returns:
+        叠加层文件路径；没有字幕和标题时返回空字符串；失败返回 None
+    """
+    import numpy as np
+
+    layers = build_overlay_layers(subtitle_path, params, duration, duration)
+    if not layers:
+        return ""
+
+    video_width, video_height = render_size(params)
+    video_fps = render_fps(params)
+    # 预览只渲染前 N 秒（排版仍按完整时长计算）
+    duration = render_duration(params, duration)
+    overlay = IndexedCompositeVideoClip(layers, size=(video_width, video_height)).with_duration(duration)
+    if overlay.mask is None:
+        overlay = overlay.with_mask()
+
+    logger.info(f"rendering shared overlay: {output_file}")
+    try:
+        with streaming.FrameSink(
+            output_file,
+            (video_width, video_height),
+            video_fps,
+            video_args=["-c:v", "qtrle"],
+            pix_fmt="rgba",
+        ) as sink:
+            for i in range(int(np.ceil(duration * video_fps))):
+                t = min(i / video_fps, duration)
+                rgb = overlay.get_frame(t)[:, :, :3]
+                alpha = (overlay.mask.get_frame(t) * 255).astype("uint8")
+                sink.write(np.dstack([rgb, alpha]))
+        return output_file if sink.close() else None
+    except Exception as e:
+        logger.error(f"failed to render overlay: {str(e)}")
+        return None
+    finally:
+        close_clip(overlay)
+
+
+def compose_video(
+    video_path: str,
+    overlay_path: str,
+    audio_path: str,
+    output_file: str,
+    params: VideoParams,
+) -> bool:
+    """
+    素材画面 + 共用的叠加层 + 混好的音轨，一次 ffmpeg 调用生成最终视频
+
+    Args:
+        video_path: combine_videos 拼接好的画面
+        overlay_path: render_overlay 生成的叠加层，为空时不叠加
+        audio_path: audio.mix_audio_track 生成的音轨
+    """
+    import subprocess
+
+    from app.services.video_fast import find_ffmpeg
+
+    ffmpeg_path = find_ffmpeg()
+    if not ffmpeg_path:
+        logger.error("ffmpeg not found, unable to compose video")
+        return False
+
+    inputs = ["-i", video_path]
+    if overlay_path:
+        inputs += ["-i", overlay_path]
+        video_map = [
+            "-filter_complex",
+            "[0:v][1:v]overlay=0:0:alpha=premultiplied:eof_action=pass,format=yuv420p[v]",
+            "-map", "[v]",
+        ]
+    else:
+        video_map = ["-map", "0:v"]
+    # 音轨为最后一路输入
+    audio_index = len(inputs) // 2
+    inputs += ["-i", audio_path]
+
+    # 预览只输出前 N 秒
+    duration_args = []
+    if params.preview and params.preview_duration and params.preview_duration > 0:
+        duration_args = ["-t", str(params.preview_duration)]
+
+    cmd = [
+        ffmpeg_path,
+        "-y",
+        "-loglevel", "error",
+        *inputs,
+        *video_map,
+        "-map", f"{audio_index}:a",
+        *encoder.ffmpeg_args(render_profile(params)),
+        *audio.mux_codec_args(audio_path),
+        "-shortest",
+        *duration_args,
+        "-movflags", "+faststart",
+        output_file,
+    ]
+
+    logger.debug(f"compose video: {' '.join(cmd)}")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.error(f"failed to compose video: {output_file}, {result.stderr[-500:]}")
+        return False
+    return True
+
+
+def replace_audio(video_path: str, audio_path: str) -> bool:
+    """
+    只替换最终视频的音轨（例如只调整了背景音乐音量）：画面直接复制（-c:v copy），不重新编码
+    """
+    import subprocess
+
+    from app.services.video_fast import find_ffmpeg
+
+    ffmpeg_path = find_ffmpeg()
+    if not ffmpeg_path:
+        logger.error("ffmpeg not found, unable to replace audio")
+        return False
+
+    base, ext = os.path.splitext(video_path)
+    temp_file = f"{base}.remux{ext}"
+    cmd = [
+        ffmpeg_path,
+        "-y",
+        "-loglevel", "error",
+        "-i", video_path,
+        "-i", audio_path,
+        "-map", "0:v",
+        "-map", "1:a",
+        "-c:v", "copy",
+        *audio.mux_codec_args(audio_path),
+        "-shortest",
+        "-movflags", "+faststart",
+        temp_file,
+    ]
+
+    logger.debug(f"replace audio: {' '.join(cmd)}")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.error(f"failed to replace audio: {video_path}, {result.stderr[-500:]}")
+        delete_files(temp_file)
+        return False
+    os.replace(temp_file, video_path)
+    return True
+
+
 def preprocess_video(materials: List[MaterialInfo], clip_duration=4):
     if not materials:
         logger.warning("no materials provided for preprocessing")
@@ -1411,13 +1838,13 @@ def preprocess_video(materials: List[MaterialInfo], clip_duration=4):
             continue
 
         ext = utils.parse_extension(material.url)
-        try:
-            clip = VideoFileClip(material.url)
-        except Exception:
+        info = media_probe.probe(material.url)
+        if info and info.has_video:
+            width, height = info.width, info.height
+        else:
             clip = ImageClip(material.url)
-
-        width = clip.size[0]
-        height = clip.size[1]
+            width, height = clip.size
+            close_clip(clip)
         if width < 480 or height < 480:
             logger.warning(f"low resolution material: {width}x{height}, minimum 480x480 required")
             continue
@@ -1446,15 +1873,12 @@ def preprocess_video(materials: List[MaterialInfo], clip_duration=4):
             # Output the video to a file.
             video_file = f"{material.url}.mp4"
             
-            # 检测GPU编码器
-            gpu_codec, gpu_params = detect_gpu_encoder()
-            
+            # 生成的是素材文件，快速模式下可能与其他素材直接拼接，使用常规H.264
             final_clip.write_videofile(
                 video_file, 
                 fps=30, 
                 logger=None,
-                codec=gpu_codec,
-                ffmpeg_params=gpu_params
+                **encoder.moviepy_args(encoder.DEFAULT_PROFILE, allow_hardware=False)
             )
             close_clip(clip)
             material.url = video_file
@@ -8,6 +8,8 @@ import shutil
 from loguru import logger
 from typing import List, Tuple, Optional
 from app.models.schema import VideoAspect
+from app.services import audio, encoder, media_probe, streaming, subtitle_model
+from app.utils import utils
 from app.config.subtitle_themes import get_subtitle_theme_colors  # 导入颜色主题配置
 
 
@@ -70,6 +72,141 @@ def find_ffmpeg() -> Optional[str]:
     return None
 
 
+def _run_in_work_dir(output_path: str, func) -> Optional[str]:
+    """
+    在中间文件目录（可能位于内存文件系统，与输出文件一一对应）中执行 func(output_dir)，用完即删；
+    空间不足时整个阶段改用磁盘上的目录重新执行，仍然失败返回 None
+    """
+    try:
+        return utils.run_in_temp_dir(f"fast-{utils.md5(output_path)}", func)
+    except Exception as e:
+        logger.error(f"快速生成失败: {e}")
+        return None
+
+
+# 快速拼接要求所有素材满足的目标规格（-c copy 拼接的前提）
+TARGET_VIDEO_CODEC = "h264"
+TARGET_PIX_FMT = "yuv420p"
+TARGET_FPS = 30
+# 拼接时只使用第一个文件的 SPS 参数，规范化结果固定为 High@4.0（足够覆盖 1080x1920@30fps），
+# 无需处理的素材也必须一致
+TARGET_H264_PROFILE = "High"
+TARGET_H264_LEVEL = 40
+TARGET_SAR = ("", "1:1")  # 未标注视为方形像素
+
+
+class NormalizeAction:
+    keep = "keep"            # 已符合目标规格，直接使用
+    remux = "remux"          # 视频流符合规格，仅去掉音频/多余流（-c:v copy）
+    transcode = "transcode"  # 需要重新编码
+
+
+def _plan_action(
+    info: Optional[media_probe.MediaInfo],
+    target_width: int,
+    target_height: int,
+    target_fps: int = TARGET_FPS,
+) -> str:
+    if not info or not info.has_video:
+        return NormalizeAction.transcode
+
+    video_matches = (
+        info.video_codec == TARGET_VIDEO_CODEC
+        and info.width == target_width
+        and info.height == target_height
+        and info.pix_fmt == TARGET_PIX_FMT
+        and abs(info.fps - target_fps) < 0.01
+        and info.sar in TARGET_SAR
+        and info.profile == TARGET_H264_PROFILE
+        and info.level == TARGET_H264_LEVEL
+    )
+    if not video_matches:
+        return NormalizeAction.transcode
+
+    # concat demuxer 按流序号对齐，所有文件必须只有一路视频流
+    if info.has_audio or info.stream_count != 1:
+        return NormalizeAction.remux
+    return NormalizeAction.keep
+
+
+def plan_normalization(
+    video_paths: List[str],
+    target_width: int,
+    target_height: int,
+    target_fps: int = TARGET_FPS,
+) -> List[str]:
+    """
+    规范化计划：逐个素材与目标规格比较（而不是与第一个素材比较）
+
+    Returns:
+        与 video_paths 一一对应的动作列表（NormalizeAction）
+    """
+    actions = []
+    for video_path in video_paths:
+        info = media_probe.probe(video_path)
+        actions.append(_plan_action(info, target_width, target_height, target_fps))
+    return actions
+
+
+def _normalize_workers(task_count: int) -> Tuple[int, int]:
+    """
+    返回 (并发任务数, 每个ffmpeg进程的线程数)
+    """
+    from app.config import config
+
+    cpu_count = os.cpu_count() or 2
+    workers = int(config.app.get("normalize_workers", 0) or 0)
+    if workers <= 0:
+        workers = max(1, cpu_count // 2)
+    workers = max(1, min(workers, task_count))
+    threads = max(1, cpu_count // workers)
+    return workers, threads
+
+
+def _normalize_one(
+    ffmpeg_path: str,
+    video_path: str,
+    normalized_path: str,
+    action: str,
+    target_width: int,
+    target_height: int,
+    threads: int,
+) -> bool:
+    if action == NormalizeAction.remux:
+        cmd = [
+            ffmpeg_path,
+            '-i', video_path,
+            '-map', '0:v:0',
+            '-c:v', 'copy',
+            '-an', '-sn', '-dn',
+            '-y',
+            normalized_path
+        ]
+    else:
+        cmd = [
+            ffmpeg_path,
+            '-i', video_path,
+            '-map', '0:v:0',
+            '-vf', f'scale={target_width}:{target_height}:force_original_aspect_ratio=decrease,pad={target_width}:{target_height}:(ow-iw)/2:(oh-ih)/2,setsar=1',
+            # 规范化结果要与无需处理的素材一起 -c copy 拼接，使用常规CPU H.264 保证码流参数兼容
+            *encoder.ffmpeg_args(encoder.DEFAULT_PROFILE, allow_hardware=False),
+            '-profile:v', TARGET_H264_PROFILE.lower(),
+            '-level:v', f'{TARGET_H264_LEVEL / 10:.1f}',
+            '-r', str(TARGET_FPS),   # 统一30fps
+            '-pix_fmt', TARGET_PIX_FMT,  # 统一像素格式
+            '-an',                   # 拼接结果只使用视频流
+            '-threads', str(threads),
+            '-y',
+            normalized_path
+        ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        utils.raise_for_no_space(result.stderr)
+        logger.error(f"❌ 素材规范化失败: {video_path}, {result.stderr}")
+        return False
+    return True
+
+
 def normalize_video_materials(
     video_paths: List[str],
     output_dir: str,
@@ -79,8 +216,8 @@ def normalize_video_materials(
     """
     规范化视频素材 - 统一编码格式，为快速拼接做准备
     
-    策略：将所有素材转换为统一的编码格式（H.264 + AAC + 30fps）
-    这样后续拼接时可以使用 -c copy 直接复制流，不需要重新编码
+    策略：每个素材都与目标规格（H.264 High@4.0 + yuv420p + 30fps + 目标分辨率 + 方形像素，仅视频流）比较，
+    只处理不符合的素材，并发执行；处理后的素材集合可以使用 -c copy 直接拼接
     
     Args:
         video_paths: 原始视频素材路径列表
@@ -91,93 +228,82 @@ def normalize_video_materials(
     Returns:
         (normalized_paths, is_already_compatible)
         - normalized_paths: 规范化后的视频路径列表
-        - is_already_compatible: 是否所有素材已经兼容（无需转换）
+        - is_already_compatible: 返回的素材是否都可以直接 -c copy 拼接（无需转换或全部规范化成功）
     """
     ffmpeg_path = find_ffmpeg()
     if not ffmpeg_path:
         logger.warning("未找到ffmpeg，无法规范化素材")
         return video_paths, False
-    
-    normalized_paths = []
-    need_normalize = False
-    
-    # 检测第一个视频的编码参数作为基准
-    probe_cmd = [
-        'ffprobe', '-v', 'error',
-        '-select_streams', 'v:0',
-        '-show_entries', 'stream=codec_name,width,height,r_frame_rate',
-        '-of', 'default=noprint_wrappers=1',
-        video_paths[0]
+
+    actions = plan_normalization(video_paths, target_width, target_height)
+    pending = [
+        i for i, action in enumerate(actions) if action != NormalizeAction.keep
     ]
-    
-    try:
-        result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=10)
-        base_info = result.stdout
-        logger.info(f"基准素材信息: {base_info}")
-    except:
-        base_info = None
-    
-    # 逐个检查和转换素材
-    for i, video_path in enumerate(video_paths):
-        # 检测当前视频参数
-        probe_cmd = [
-            'ffprobe', '-v', 'error',
-            '-select_streams', 'v:0',
-            '-show_entries', 'stream=codec_name,width,height,r_frame_rate',
-            '-of', 'default=noprint_wrappers=1',
-            video_path
-        ]
-        
-        try:
-            result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=10)
-            current_info = result.stdout
-            
-            # 如果与基准不一致，需要规范化
-            if base_info and current_info != base_info:
-                need_normalize = True
-                logger.info(f"素材 {i+1} 格式不一致，需要规范化")
-            
-        except:
-            need_normalize = True
-        
-        if need_normalize:
-            # 转换为标准格式
+    if not pending:
+        logger.info("✅ 所有素材已兼容，可直接快速拼接")
+        return list(video_paths), True
+
+    transcode_count = sum(
+        1 for i in pending if actions[i] == NormalizeAction.transcode
+    )
+    logger.info(
+        f"⚙️ 规范化计划: {len(video_paths)} 个素材，"
+        f"转码 {transcode_count} 个，去除音频 {len(pending) - transcode_count} 个"
+    )
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    workers, threads = _normalize_workers(len(pending))
+    normalized_paths = list(video_paths)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for i in pending:
             normalized_path = os.path.join(output_dir, f"normalized_{i+1}.mp4")
-            
-            normalize_cmd = [
-                ffmpeg_path,
-                '-i', video_path,
-                '-vf', f'scale={target_width}:{target_height}:force_original_aspect_ratio=decrease,pad={target_width}:{target_height}:(ow-iw)/2:(oh-ih)/2',
-                '-c:v', 'libx264',      # 统一使用H.264
-                '-preset', 'fast',       # 平衡速度和质量
-                '-crf', '23',            # 质量参数
-                '-r', '30',              # 统一30fps
-                '-c:a', 'aac',           # 统一AAC音频
-                '-b:a', '128k',
-                '-pix_fmt', 'yuv420p',   # 统一像素格式
-                '-y',
-                normalized_path
-            ]
-            
-            logger.info(f"⚙️ 规范化素材 {i+1}/{len(video_paths)}...")
-            result = subprocess.run(normalize_cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                normalized_paths.append(normalized_path)
-                logger.info(f"✅ 素材 {i+1} 规范化完成")
+            futures[i] = (
+                normalized_path,
+                executor.submit(
+                    _normalize_one,
+                    ffmpeg_path,
+                    video_paths[i],
+                    normalized_path,
+                    actions[i],
+                    target_width,
+                    target_height,
+                    threads,
+                ),
+            )
+
+        all_succeeded = True
+        for i, (normalized_path, future) in futures.items():
+            if future.result():
+                normalized_paths[i] = normalized_path
+                logger.info(f"✅ 素材 {i+1} 规范化完成 ({actions[i]})")
             else:
-                logger.error(f"❌ 素材 {i+1} 规范化失败: {result.stderr}")
-                normalized_paths.append(video_path)  # 失败则使用原文件
-        else:
-            normalized_paths.append(video_path)
-    
-    is_compatible = not need_normalize
-    if is_compatible:
-        logger.info("✅ 所有素材已兼容，可直接快速拼接")
-    else:
+                # 失败则使用原文件，拼接失败时会回退到重新编码模式
+                all_succeeded = False
+
+    if all_succeeded:
         logger.info("⚙️ 素材已规范化为统一格式，可进行快速拼接")
-    
-    return normalized_paths, is_compatible
+    return normalized_paths, all_succeeded
+
+
+def loop_to_duration(video_paths: List[str], duration: float) -> List[str]:
+    """
+    按顺序循环使用素材，直到总时长不少于 duration（-c copy 拼接不能裁剪素材，只能整段重复）
+    """
+    durations = [media_probe.get_duration(video_path) for video_path in video_paths]
+    if sum(durations) <= 0:
+        return list(video_paths)
+
+    result = []
+    total = 0.0
+    while total < duration:
+        for video_path, video_duration in zip(video_paths, durations):
+            result.append(video_path)
+            total += video_duration
+            if total >= duration:
+                break
+    return result
 
 
 def generate_video_fast(
@@ -189,6 +315,8 @@ def generate_video_fast(
     background_music: str = None,
     bgm_volume: float = 0.2,
     auto_normalize: bool = True,  # 新增：是否自动规范化素材
+    encoder_profile: str = None,
+    combined_video_path: str = None,
 ) -> str:
     """
     快速生成视频 - 使用FFmpeg直接拼接，避免重新编码
@@ -210,10 +338,46 @@ def generate_video_fast(
         background_music: 背景音乐路径
         bgm_volume: 背景音乐音量
         auto_normalize: 是否自动规范化不兼容的素材
+        encoder_profile: 最终输出的编码配置（见 encoder.PROFILES）
+        combined_video_path: 保留拼接好的画面（不含字幕和音频）的路径，供 task.edit 只重新叠加字幕时复用
         
     Returns:
         生成的视频文件路径
     """
+    return _run_in_work_dir(
+        output_path,
+        lambda output_dir: _generate_video_fast(
+            output_dir,
+            video_paths,
+            audio_file,
+            subtitle_file,
+            output_path,
+            video_aspect,
+            background_music,
+            bgm_volume,
+            auto_normalize,
+            encoder_profile,
+            combined_video_path,
+        ),
+    )
+
+
+def _generate_video_fast(
+    output_dir: str,
+    video_paths: List[str],
+    audio_file: str,
+    subtitle_file: str,
+    output_path: str,
+    video_aspect: VideoAspect,
+    background_music: str,
+    bgm_volume: float,
+    auto_normalize: bool,
+    encoder_profile: str,
+    combined_video_path: str,
+) -> Optional[str]:
+    """
+    generate_video_fast 的实现，中间文件写入 output_dir（由调用方清理）
+    """
     try:
         ffmpeg_path = find_ffmpeg()
         if not ffmpeg_path:
@@ -230,7 +394,6 @@ def generate_video_fast(
             logger.info("")
             return None
         
-        output_dir = os.path.dirname(output_path)
         aspect = VideoAspect(video_aspect)
         video_width, video_height = aspect.to_resolution()
         
@@ -245,7 +408,7 @@ def generate_video_fast(
             )
             
             if not is_compatible:
-                logger.info("⚙️ 素材已自动规范化为统一格式，开始快速拼接...")
+                logger.warning("⚠️ 部分素材规范化失败，拼接失败时将回退到重新编码")
         
         temp_concat_file = os.path.join(output_dir, "concat_list.txt")
         temp_video_only = os.path.join(output_dir, "temp_video_only.mp4")
@@ -265,19 +428,23 @@ def generate_video_fast(
             '-f', 'concat',
             '-safe', '0',
             '-i', temp_concat_file,
+            '-map', '0:v:0',
             '-c', 'copy',  # 关键：不重新编码，直接复制流
+            '-an',
             '-y',
             temp_video_only
         ]
         
         result = subprocess.run(concat_cmd, capture_output=True, text=True)
         if result.returncode != 0:
+            utils.raise_for_no_space(result.stderr)
             logger.error(f"视频拼接失败: {result.stderr}")
             # 回退：如果拼接失败（编码不一致），使用重新编码
             logger.warning("拼接失败，使用重新编码模式...")
             return _generate_with_reencode(
-                video_paths, audio_file, subtitle_file, output_path,
-                video_aspect, background_music, bgm_volume
+                output_dir, video_paths, audio_file, subtitle_file, output_path,
+                video_aspect, background_music, bgm_volume, encoder_profile,
+                combined_video_path,
             )
         
         logger.info("✅ 视频拼接完成（无重新编码）")
@@ -286,15 +453,13 @@ def generate_video_fast(
         logger.info("⚡ 快速模式：叠加字幕...")
         
         from moviepy import VideoFileClip
-        from moviepy.video.tools.subtitles import SubtitlesClip
         from moviepy import TextClip, CompositeVideoClip
         
         video_clip = VideoFileClip(temp_video_only)
         
         # 读取字幕文件并创建字幕clip
         try:
-            # 尝试使用SubtitlesClip（如果字幕格式正确）
-            subtitle_clip = SubtitlesClip(subtitle_file, lambda txt: TextClip(
+            subtitle_clip = _subtitle_clip(subtitle_file, lambda txt: TextClip(
                 text=txt,
                 font_size=48,
                 color='white',
@@ -303,82 +468,127 @@ def generate_video_fast(
                 method='caption',
                 size=(int(video_clip.w * 0.9), None)
             ))
+            if subtitle_clip is None:
+                raise ValueError(f"no subtitles in {subtitle_file}")
             video_with_subs = CompositeVideoClip([video_clip, subtitle_clip.with_position(('center', 'bottom'))])
         except Exception as e:
             # 如果字幕处理失败，跳过字幕
             logger.warning(f"字幕叠加失败，跳过字幕: {e}")
             video_with_subs = video_clip
         
-        temp_video_with_subs = os.path.join(output_dir, "temp_with_subs.mp4")
-        video_with_subs.write_videofile(
-            temp_video_with_subs,
-            codec='libx264',
-            preset='ultrafast',
-            audio=False,
-            logger=None
+        # 4. 字幕画面通过管道直接送入ffmpeg，同时叠加音频（不生成中间文件）
+        logger.info("⚡ 快速模式：渲染字幕并叠加音频...")
+        succeeded = _render_with_audio(
+            video_with_subs, output_path, audio_file,
+            background_music, bgm_volume, encoder_profile
         )
         
         from app.services.video import close_clip
         close_clip(video_clip)
         close_clip(video_with_subs)
         
-        logger.info("✅ 字幕叠加完成")
-        
-        # 4. 叠加音频（视频使用-c:v copy不重新编码）
-        logger.info("⚡ 快速模式：叠加音频...")
-        
-        # 构建FFmpeg命令
-        final_cmd = [ffmpeg_path, '-i', temp_video_with_subs, '-i', audio_file]
-        
-        # 添加背景音乐输入
-        if background_music and os.path.exists(background_music):
-            final_cmd.extend(['-i', background_music])
-            # 混音：语音 + 背景音乐
-            final_cmd.extend([
-                '-filter_complex', f"[1:a][2:a]amix=inputs=2:duration=first:weights=1 {bgm_volume}[audio]",
-                '-map', '0:v',
-                '-map', '[audio]',
-                '-c:v', 'copy',  # 关键：视频直接复制，不重新编码
-                '-c:a', 'aac',
-                '-shortest',  # 以最短的流为准
-                '-y',
-                output_path
-            ])
-        else:
-            # 没有背景音乐，直接映射音频流
-            final_cmd.extend([
-                '-map', '0:v',
-                '-map', '1:a',
-                '-c:v', 'copy',  # 关键：视频直接复制，不重新编码
-                '-c:a', 'aac',
-                '-shortest',  # 以最短的流为准
-                '-y',
-                output_path
-            ])
+        if succeeded and combined_video_path:
+            shutil.move(temp_video_only, combined_video_path)
         
-        result = subprocess.run(final_cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            logger.error(f"音频叠加失败: {result.stderr}")
+        if not succeeded:
+            logger.error("字幕渲染/音频叠加失败")
             return None
         
         logger.info("✅ 快速视频生成完成！")
-        
-        # 清理临时文件
-        try:
-            os.remove(temp_concat_file)
-            os.remove(temp_video_only)
-            os.remove(temp_video_with_subs)
-        except:
-            pass
-        
         return output_path
         
     except Exception as e:
+        if utils.is_no_space_error(e):
+            raise
         logger.error(f"快速生成失败: {e}")
         return None
 
 
+def _subtitle_clip(subtitle_file: str, make_textclip):
+    """
+    字幕层：与 MoviePy SubtitlesClip 相同，文字图片在第一次显示时才由 make_textclip 生成，
+    但每帧通过 subtitle_model 二分查找当前字幕，不再遍历全部字幕；没有字幕时返回 None
+    """
+    import numpy as np
+    from moviepy import VideoClip
+
+    track = subtitle_model.load(subtitle_file)
+    if not track:
+        return None
+
+    text_clips = {}
+
+    def text_clip_at(t):
+        index = track.index_at(t)
+        if index < 0:
+            return None
+        if index not in text_clips:
+            text_clips[index] = make_textclip(track.texts[index])
+        return text_clips[index]
+
+    def frame_function(t):
+        text_clip = text_clip_at(t)
+        return text_clip.get_frame(t) if text_clip else np.array([[[0, 0, 0]]])
+
+    def mask_frame_function(t):
+        text_clip = text_clip_at(t)
+        return text_clip.mask.get_frame(t) if text_clip else np.array([[0]])
+
+    clip = VideoClip(frame_function, duration=track.duration, has_constant_size=False)
+    clip.mask = VideoClip(mask_frame_function, is_mask=True, duration=track.duration, has_constant_size=False)
+    return clip
+
+
+def _render_with_audio(
+    clip,
+    output_path: str,
+    audio_file: str,
+    background_music: str = None,
+    bgm_volume: float = 0.2,
+    encoder_profile: str = None,
+) -> bool:
+    """
+    把 MoviePy 合成的画面通过管道送入 ffmpeg 编码，同时混入语音和背景音乐，一次生成最终视频
+
+    audio_file 为 audio.mix_audio_track 混好的音轨时（background_music 为空），音轨直接复制不再编码；
+    失败时删除不完整的输出文件
+    """
+    inputs = ['-i', audio_file]
+    if background_music and os.path.exists(background_music):
+        inputs.extend(['-i', background_music])
+        # 混音：语音 + 背景音乐
+        audio_args = [
+            '-filter_complex', f"[1:a][2:a]amix=inputs=2:duration=first:weights=1 {bgm_volume}[audio]",
+            '-map', '0:v',
+            '-map', '[audio]',
+            '-c:a', 'aac',
+        ]
+    else:
+        # 没有背景音乐，直接映射音频流
+        audio_args = ['-map', '0:v', '-map', '1:a', *audio.mux_codec_args(audio_file)]
+
+    try:
+        succeeded = streaming.write_clip(
+            clip,
+            output_path,
+            fps=clip.fps or TARGET_FPS,
+            video_args=encoder.ffmpeg_args(encoder_profile),
+            inputs=inputs,
+            output_args=audio_args + [
+                '-shortest',  # 以最短的流为准
+                '-movflags', '+faststart',
+            ],
+        )
+    except Exception as e:
+        logger.error(f"failed to render video: {str(e)}")
+        succeeded = False
+    if not succeeded and os.path.exists(output_path):
+        os.remove(output_path)
+    return succeeded
+
+
 def _generate_with_reencode(
+    output_dir: str,
     video_paths: List[str],
     audio_file: str,
     subtitle_file: str,
@@ -386,10 +596,15 @@ def _generate_with_reencode(
     video_aspect: VideoAspect,
     background_music: str = None,
     bgm_volume: float = 0.2,
+    encoder_profile: str = None,
+    combined_video_path: str = None,
 ) -> str:
     """
     回退方案：使用重新编码的方式生成视频
     当素材编码格式不一致时使用
+
+    Returns:
+        输出文件路径，失败时返回None（不留下不完整的输出文件）
     """
     logger.info("使用重新编码模式生成视频...")
     
@@ -398,8 +613,6 @@ def _generate_with_reencode(
         logger.error("未找到ffmpeg")
         return None
     
-    output_dir = os.path.dirname(output_path)
-    
     # 获取视频分辨率
     aspect = VideoAspect(video_aspect)
     video_width, video_height = aspect.to_resolution()
@@ -420,27 +633,28 @@ def _generate_with_reencode(
         '-safe', '0',
         '-i', temp_concat_file,
         '-vf', f'scale={video_width}:{video_height}:force_original_aspect_ratio=decrease,pad={video_width}:{video_height}:(ow-iw)/2:(oh-ih)/2',
-        '-c:v', 'libx264',
-        '-preset', 'ultrafast',
-        '-crf', '23',
+        *encoder.ffmpeg_args(encoder.INTERMEDIATE_PROFILE),
         '-an',  # 暂时不要音频
         '-y',
         temp_merged
     ]
     
-    subprocess.run(concat_cmd, capture_output=True)
+    result = subprocess.run(concat_cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        utils.raise_for_no_space(result.stderr)
+        logger.error(f"重新编码拼接失败: {result.stderr}")
+        return None
     
     # 2. 使用MoviePy叠加字幕
     logger.info("叠加字幕...")
     
     from moviepy import VideoFileClip
-    from moviepy.video.tools.subtitles import SubtitlesClip
     from moviepy import TextClip, CompositeVideoClip
     
     video_clip = VideoFileClip(temp_merged)
     
     try:
-        subtitle_clip = SubtitlesClip(subtitle_file, lambda txt: TextClip(
+        subtitle_clip = _subtitle_clip(subtitle_file, lambda txt: TextClip(
             text=txt,
             font_size=48,
             color='white',
@@ -449,64 +663,30 @@ def _generate_with_reencode(
             method='caption',
             size=(int(video_clip.w * 0.9), None)
         ))
+        if subtitle_clip is None:
+            raise ValueError(f"no subtitles in {subtitle_file}")
         video_with_subs = CompositeVideoClip([video_clip, subtitle_clip.with_position(('center', 'bottom'))])
     except Exception as e:
         logger.warning(f"字幕叠加失败，跳过字幕: {e}")
         video_with_subs = video_clip
     
-    temp_video_with_subs = os.path.join(output_dir, "temp_with_subs.mp4")
-    video_with_subs.write_videofile(
-        temp_video_with_subs,
-        codec='libx264',
-        preset='ultrafast',
-        audio=False,
-        logger=None
+    # 3. 字幕画面通过管道直接编码，同时叠加音频
+    logger.info("渲染字幕并叠加音频...")
+    succeeded = _render_with_audio(
+        video_with_subs, output_path, audio_file,
+        background_music, bgm_volume, encoder_profile
     )
     
     from app.services.video import close_clip
     close_clip(video_clip)
     close_clip(video_with_subs)
     
-    # 3. 叠加音频
-    logger.info("叠加音频...")
-    final_cmd = [ffmpeg_path, '-i', temp_video_with_subs, '-i', audio_file]
-    
-    # 添加背景音乐输入
-    if background_music and os.path.exists(background_music):
-        final_cmd.extend(['-i', background_music])
-        # 混音：语音 + 背景音乐
-        final_cmd.extend([
-            '-filter_complex', f"[1:a][2:a]amix=inputs=2:duration=first:weights=1 {bgm_volume}[audio]",
-            '-map', '0:v',
-            '-map', '[audio]',
-            '-c:v', 'copy',
-            '-c:a', 'aac',
-            '-shortest',
-            '-y',
-            output_path
-        ])
-    else:
-        # 没有背景音乐，直接映射音频流
-        final_cmd.extend([
-            '-map', '0:v',
-            '-map', '1:a',
-            '-c:v', 'copy',
-            '-c:a', 'aac',
-            '-shortest',
-            '-y',
-            output_path
-        ])
-    
-    subprocess.run(final_cmd, capture_output=True)
-    
-    # 清理临时文件
-    try:
-        os.remove(temp_concat_file)
-        os.remove(temp_merged)
-        os.remove(temp_video_with_subs)
-    except:
-        pass
+    if succeeded and combined_video_path:
+        shutil.move(temp_merged, combined_video_path)
     
+    if not succeeded:
+        logger.error(f"重新编码生成视频失败: {output_path}")
+        return None
     return output_path
 
 
@@ -523,6 +703,8 @@ def generate_video_from_image_fast(
     video_theme: str = None,    # 新增：视频主题模式
     subtitle_color_theme: str = "classic_gold",  # 新增：字幕颜色主题
     font_size: int = 60,  # 新增：字体大小（用户配置）
+    encoder_profile: str = None,
+    combined_video_path: str = None,
 ) -> str:
     """
     从静态图片快速生成视频 - 使用FFmpeg直接处理，速度提升10倍以上
@@ -542,6 +724,7 @@ def generate_video_from_image_fast(
         video_height: 视频高度
         background_music: 背景音乐路径
         bgm_volume: 背景音乐音量
+        combined_video_path: 保留图片生成的画面（不含字幕和音频）的路径，供 task.edit 只重新叠加字幕时复用
         
     Returns:
         生成的视频文件路径
@@ -561,21 +744,60 @@ def generate_video_from_image_fast(
         logger.info("")
         return None
     
+    return _run_in_work_dir(
+        output_path,
+        lambda output_dir: _generate_video_from_image_fast(
+            output_dir,
+            ffmpeg_path,
+            image_path,
+            audio_file,
+            subtitle_file,
+            output_path,
+            video_width,
+            video_height,
+            background_music,
+            bgm_volume,
+            video_subject,
+            video_theme,
+            subtitle_color_theme,
+            font_size,
+            encoder_profile,
+            combined_video_path,
+        ),
+    )
+
+
+def _generate_video_from_image_fast(
+    output_dir: str,
+    ffmpeg_path: str,
+    image_path: str,
+    audio_file: str,
+    subtitle_file: str,
+    output_path: str,
+    video_width: int,
+    video_height: int,
+    background_music: str,
+    bgm_volume: float,
+    video_subject: str,
+    video_theme: str,
+    subtitle_color_theme: str,
+    font_size: int,
+    encoder_profile: str,
+    combined_video_path: str,
+) -> Optional[str]:
+    """
+    generate_video_from_image_fast 的实现，中间文件写入 output_dir（由调用方清理）
+    """
     try:
         logger.info("⚡ 快速模式：从静态图片生成视频...")
         
         # 获取音频时长
-        probe_cmd = [
-            'ffprobe', '-v', 'error',
-            '-show_entries', 'format=duration',
-            '-of', 'default=noprint_wrappers=1:nokey=1',
-            audio_file
-        ]
-        result = subprocess.run(probe_cmd, capture_output=True, text=True)
-        audio_duration = float(result.stdout.strip())
+        audio_duration = media_probe.get_duration(audio_file)
+        if audio_duration <= 0:
+            logger.error(f"无法获取音频时长: {audio_file}")
+            return None
         logger.info(f"  - 音频时长: {audio_duration:.2f}秒")
         
-        output_dir = os.path.dirname(output_path)
         temp_video = os.path.join(output_dir, "temp_image_video.mp4")
         
         # 步骤1：使用FFmpeg从图片生成视频（超快！）
@@ -587,9 +809,8 @@ def generate_video_from_image_fast(
             '-i', image_path,                # 输入图片
             '-t', str(audio_duration),       # 视频时长等于音频时长
             '-vf', f'scale={video_width}:{video_height}:force_original_aspect_ratio=decrease,pad={video_width}:{video_height}:(ow-iw)/2:(oh-ih)/2,format=yuv420p',
-            '-c:v', 'libx264',
-            '-preset', 'ultrafast',          # 最快编码速度
-            '-crf', '23',
+            # 无字幕时该视频流会被直接复制到最终输出，使用最终输出的编码配置
+            *encoder.ffmpeg_args(encoder_profile),
             '-r', '30',                      # 30fps
             '-pix_fmt', 'yuv420p',
             '-y',
@@ -598,6 +819,7 @@ def generate_video_from_image_fast(
         
         result = subprocess.run(video_gen_cmd, capture_output=True, text=True)
         if result.returncode != 0:
+            utils.raise_for_no_space(result.stderr)
             logger.error(f"图片生成视频失败: {result.stderr}")
             return None
         
@@ -715,14 +937,8 @@ def generate_video_from_image_fast(
                 # 添加竖排字幕（如果有字幕文件）
                 if subtitle_file and os.path.exists(subtitle_file):
                     logger.info("  - 添加竖排字幕（古书卷轴样式 - 分屏显示）")
-                    # 解析SRT字幕文件
-                    import re
-                    with open(subtitle_file, 'r', encoding='utf-8') as f:
-                        srt_content = f.read()
-                    
-                    # SRT格式：序号\n时间戳\n文本\n空行
-                    subtitle_pattern = r'(\d+)\s+([\d:,]+)\s+-->\s+([\d:,]+)\s+([\s\S]+?)(?=\n\n|\n*$)'
-                    subtitles = re.findall(subtitle_pattern, srt_content)
+                    # 解析SRT字幕文件（与其他渲染路径共用解析结果）
+                    subtitles = subtitle_model.load(subtitle_file).items()
                     
                     # 古书卷轴字幕参数（根据视频比例自适应）
                     # 判断视频方向
@@ -775,20 +991,13 @@ def generate_video_from_image_fast(
                     current_screen_start = None
                     current_screen_end = None
                     
-                    def parse_time(time_str):
-                        """将SRT时间格式转换为秒数"""
-                        h, m, s = time_str.replace(',', '.').split(':')
-                        return float(h) * 3600 + float(m) * 60 + float(s)
-                    
                     # 首先解析所有字幕，建立字符到时间的映射
-                    for idx, (num, start_time, end_time, text) in enumerate(subtitles):
+                    for idx, ((sentence_start, sentence_end), text) in enumerate(subtitles):
                         # 清理文本
                         clean_text = text.strip().replace('\n', '').replace('\r', '')
                         chars = list(clean_text)
                         
                         # 计算这句字幕的时间范围
-                        sentence_start = parse_time(start_time)
-                        sentence_end = parse_time(end_time)
                         sentence_duration = sentence_end - sentence_start
                         
                         # 为每个字符分配精确的时间（基于当前句子的实际时间）
@@ -941,20 +1150,19 @@ def generate_video_from_image_fast(
         # 编码参数：如果有字幕滤镜则需要重编码，否则复制
         if video_filter:
             # 需要重编码以渲染字幕
-            final_cmd.extend([
-                '-c:v', 'libx264',
-                '-preset', 'ultrafast',  # 最快速度
-                '-crf', '23',
-            ])
+            final_cmd.extend(encoder.ffmpeg_args(encoder_profile))
         else:
             # 无字幕或跳过字幕，直接复制视频流（超快）
             final_cmd.extend([
                 '-c:v', 'copy',
             ])
         
+        if background_music and os.path.exists(background_music):
+            final_cmd.extend(['-c:a', 'aac', '-b:a', '128k'])
+        else:
+            # 已混好的音轨（AAC）直接复制
+            final_cmd.extend(audio.mux_codec_args(audio_file))
         final_cmd.extend([
-            '-c:a', 'aac',
-            '-b:a', '128k',
             '-shortest',
             '-movflags', '+faststart',
             '-y',
@@ -963,20 +1171,19 @@ def generate_video_from_image_fast(
         
         # 直接生成最终视频（不使用MoviePy）
         result = subprocess.run(final_cmd, capture_output=True, text=True)
+        
         if result.returncode != 0:
             logger.error(f"视频生成失败: {result.stderr}")
             return None
         
-        # 清理临时文件
-        try:
-            os.remove(temp_video)
-        except:
-            pass
-        
+        if combined_video_path:
+            shutil.move(temp_video, combined_video_path)
         logger.success(f"⚡ 快速视频生成完成！")
         return output_path
         
     except Exception as e:
+        if utils.is_no_space_error(e):
+            raise
         logger.error(f"快速生成失败: {e}")
         import traceback
         traceback.print_exc()
@@ -1014,10 +1221,7 @@ def generate_template_video(
         ffmpeg_path,
         '-f', 'lavfi',
         '-i', f'color=c={background_color}:s={width}x{height}:d={duration}:r=30',
-        '-c:v', 'libx264',
-        '-preset', 'ultrafast',
-        '-crf', '23',
-        '-pix_fmt', 'yuv420p',
+        *encoder.ffmpeg_args(encoder.INTERMEDIATE_PROFILE),
         '-y',
         output_path
     ]
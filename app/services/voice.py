@@ -1,45 +1,34 @@
 import asyncio
+import itertools
 import os
 import re
+import threading
 from datetime import datetime
-from typing import Union
+from typing import TYPE_CHECKING, Iterator, List, Tuple, Union
 from xml.sax.saxutils import unescape
 
-import edge_tts
 import requests
-from edge_tts import SubMaker, submaker
-from edge_tts.submaker import mktimestamp
 from loguru import logger
-from moviepy.video.tools import subtitles
 
 from app.config import config
+from app.services import audio, media_probe, voice_catalog
 from app.utils import utils
 
+if TYPE_CHECKING:
+    from edge_tts import SubMaker
+
+# 导入耗时较长（aiohttp 等），第一次合成语音或处理字幕时间轴时才导入
+edge_tts = utils.lazy_import("edge_tts")
+
 
 def get_siliconflow_voices() -> list[str]:
     """
     获取硅基流动的声音列表
 
     Returns:
-        声音列表，格式为 ["siliconflow:FunAudioLLM/CosyVoice2-0.5B:alex", ...]
+        声音列表，格式为 ["siliconflow:FunAudioLLM/CosyVoice2-0.5B:alex-Male", ...]
     """
-    # 硅基流动的声音列表和对应的性别（用于显示）
-    voices_with_gender = [
-        ("FunAudioLLM/CosyVoice2-0.5B", "alex", "Male"),
-        ("FunAudioLLM/CosyVoice2-0.5B", "anna", "Female"),
-        ("FunAudioLLM/CosyVoice2-0.5B", "bella", "Female"),
-        ("FunAudioLLM/CosyVoice2-0.5B", "benjamin", "Male"),
-        ("FunAudioLLM/CosyVoice2-0.5B", "charles", "Male"),
-        ("FunAudioLLM/CosyVoice2-0.5B", "claire", "Female"),
-        ("FunAudioLLM/CosyVoice2-0.5B", "david", "Male"),
-        ("FunAudioLLM/CosyVoice2-0.5B", "diana", "Female"),
-    ]
-
-    # 添加siliconflow:前缀，并格式化为显示名称
-    return [
-        f"siliconflow:{model}:{voice}-{gender}"
-        for model, voice, gender in voices_with_gender
-    ]
+    return list(voice_catalog.siliconflow_voices())
 
 
 def get_gtts_voices() -> list[str]:
@@ -48,35 +37,9 @@ def get_gtts_voices() -> list[str]:
     gTTS是完全免费的，无需API Key
     
     Returns:
-        声音列表，格式为 ["gtts:zh-CN-Female", "gtts:en-US-Female", ...]
+        声音列表，格式为 ["gtts:zh-CN-Female-Chinese (Simplified)", ...]
     """
-    # gTTS支持的主要语言
-    voices = [
-        ("zh-CN", "Chinese (Simplified)", "Female"),
-        ("zh-TW", "Chinese (Traditional)", "Female"),
-        ("en-US", "English (US)", "Female"),
-        ("en-GB", "English (UK)", "Female"),
-        ("en-AU", "English (Australia)", "Female"),
-        ("en-IN", "English (India)", "Female"),
-        ("ja-JP", "Japanese", "Female"),
-        ("ko-KR", "Korean", "Female"),
-        ("fr-FR", "French", "Female"),
-        ("de-DE", "German", "Female"),
-        ("es-ES", "Spanish (Spain)", "Female"),
-        ("es-MX", "Spanish (Mexico)", "Female"),
-        ("pt-BR", "Portuguese (Brazil)", "Female"),
-        ("ru-RU", "Russian", "Female"),
-        ("it-IT", "Italian", "Female"),
-        ("ar-SA", "Arabic", "Female"),
-        ("hi-IN", "Hindi", "Female"),
-        ("th-TH", "Thai", "Female"),
-        ("vi-VN", "Vietnamese", "Female"),
-    ]
-    
-    return [
-        f"gtts:{lang}-{gender}-{name}"
-        for lang, name, gender in voices
-    ]
+    return list(voice_catalog.gtts_voices())
 
 
 def get_pyttsx3_voices() -> list[str]:
@@ -85,1057 +48,31 @@ def get_pyttsx3_voices() -> list[str]:
     pyttsx3完全免费且离线工作，不需要网络连接
     
     Returns:
-        声音列表，格式为 ["pyttsx3:system-0-Male", ...]
+        声音列表，格式为 ["pyttsx3:en-US-0-Male-David", ...]
     """
-    try:
-        import pyttsx3
-        engine = pyttsx3.init()
-        system_voices = engine.getProperty('voices')
-        engine.stop()
-        
-        voices = []
-        for idx, v in enumerate(system_voices):
-            # 检测性别
-            gender = "Male" if "male" in v.name.lower() or "david" in v.name.lower() else "Female"
-            # 提取语言代码
-            lang_code = "en-US"  # 默认
-            if "zh" in v.id.lower() or "chinese" in v.name.lower():
-                lang_code = "zh-CN"
-            elif "ja" in v.id.lower() or "japanese" in v.name.lower():
-                lang_code = "ja-JP"
-            
-            voice_name = v.name.split(" ")[0] if " " in v.name else v.name
-            voices.append(f"pyttsx3:{lang_code}-{idx}-{gender}-{voice_name}")
-        
-        return voices[:10]  # 限制显示前10个系统声音
-    except Exception as e:
-        logger.warning(f"Failed to get pyttsx3 voices: {str(e)}")
-        # 返回默认声音列表
-        return [
-            "pyttsx3:en-US-0-Male-David",
-            "pyttsx3:en-US-1-Female-Zira",
-        ]
+    return list(voice_catalog.pyttsx3_voices())
 
 
 def get_all_azure_voices(filter_locals=None) -> list[str]:
-    azure_voices_str = """
-Name: af-ZA-AdriNeural
-Gender: Female
-
-Name: af-ZA-WillemNeural
-Gender: Male
-
-Name: am-ET-AmehaNeural
-Gender: Male
-
-Name: am-ET-MekdesNeural
-Gender: Female
-
-Name: ar-AE-FatimaNeural
-Gender: Female
-
-Name: ar-AE-HamdanNeural
-Gender: Male
-
-Name: ar-BH-AliNeural
-Gender: Male
-
-Name: ar-BH-LailaNeural
-Gender: Female
-
-Name: ar-DZ-AminaNeural
-Gender: Female
-
-Name: ar-DZ-IsmaelNeural
-Gender: Male
-
-Name: ar-EG-SalmaNeural
-Gender: Female
-
-Name: ar-EG-ShakirNeural
-Gender: Male
-
-Name: ar-IQ-BasselNeural
-Gender: Male
-
-Name: ar-IQ-RanaNeural
-Gender: Female
-
-Name: ar-JO-SanaNeural
-Gender: Female
-
-Name: ar-JO-TaimNeural
-Gender: Male
-
-Name: ar-KW-FahedNeural
-Gender: Male
-
-Name: ar-KW-NouraNeural
-Gender: Female
-
-Name: ar-LB-LaylaNeural
-Gender: Female
-
-Name: ar-LB-RamiNeural
-Gender: Male
-
-Name: ar-LY-ImanNeural
-Gender: Female
-
-Name: ar-LY-OmarNeural
-Gender: Male
-
-Name: ar-MA-JamalNeural
-Gender: Male
-
-Name: ar-MA-MounaNeural
-Gender: Female
-
-Name: ar-OM-AbdullahNeural
-Gender: Male
-
-Name: ar-OM-AyshaNeural
-Gender: Female
-
-Name: ar-QA-AmalNeural
-Gender: Female
-
-Name: ar-QA-MoazNeural
-Gender: Male
-
-Name: ar-SA-HamedNeural
-Gender: Male
-
-Name: ar-SA-ZariyahNeural
-Gender: Female
-
-Name: ar-SY-AmanyNeural
-Gender: Female
-
-Name: ar-SY-LaithNeural
-Gender: Male
-
-Name: ar-TN-HediNeural
-Gender: Male
-
-Name: ar-TN-ReemNeural
-Gender: Female
-
-Name: ar-YE-MaryamNeural
-Gender: Female
-
-Name: ar-YE-SalehNeural
-Gender: Male
-
-Name: az-AZ-BabekNeural
-Gender: Male
-
-Name: az-AZ-BanuNeural
-Gender: Female
-
-Name: bg-BG-BorislavNeural
-Gender: Male
-
-Name: bg-BG-KalinaNeural
-Gender: Female
-
-Name: bn-BD-NabanitaNeural
-Gender: Female
-
-Name: bn-BD-PradeepNeural
-Gender: Male
-
-Name: bn-IN-BashkarNeural
-Gender: Male
-
-Name: bn-IN-TanishaaNeural
-Gender: Female
-
-Name: bs-BA-GoranNeural
-Gender: Male
-
-Name: bs-BA-VesnaNeural
-Gender: Female
-
-Name: ca-ES-EnricNeural
-Gender: Male
-
-Name: ca-ES-JoanaNeural
-Gender: Female
-
-Name: cs-CZ-AntoninNeural
-Gender: Male
-
-Name: cs-CZ-VlastaNeural
-Gender: Female
-
-Name: cy-GB-AledNeural
-Gender: Male
-
-Name: cy-GB-NiaNeural
-Gender: Female
-
-Name: da-DK-ChristelNeural
-Gender: Female
-
-Name: da-DK-JeppeNeural
-Gender: Male
-
-Name: de-AT-IngridNeural
-Gender: Female
-
-Name: de-AT-JonasNeural
-Gender: Male
-
-Name: de-CH-JanNeural
-Gender: Male
-
-Name: de-CH-LeniNeural
-Gender: Female
-
-Name: de-DE-AmalaNeural
-Gender: Female
-
-Name: de-DE-ConradNeural
-Gender: Male
-
-Name: de-DE-FlorianMultilingualNeural
-Gender: Male
-
-Name: de-DE-KatjaNeural
-Gender: Female
-
-Name: de-DE-KillianNeural
-Gender: Male
-
-Name: de-DE-SeraphinaMultilingualNeural
-Gender: Female
-
-Name: el-GR-AthinaNeural
-Gender: Female
-
-Name: el-GR-NestorasNeural
-Gender: Male
-
-Name: en-AU-NatashaNeural
-Gender: Female
-
-Name: en-AU-WilliamNeural
-Gender: Male
-
-Name: en-CA-ClaraNeural
-Gender: Female
-
-Name: en-CA-LiamNeural
-Gender: Male
-
-Name: en-GB-LibbyNeural
-Gender: Female
-
-Name: en-GB-MaisieNeural
-Gender: Female
-
-Name: en-GB-RyanNeural
-Gender: Male
-
-Name: en-GB-SoniaNeural
-Gender: Female
-
-Name: en-GB-ThomasNeural
-Gender: Male
-
-Name: en-HK-SamNeural
-Gender: Male
-
-Name: en-HK-YanNeural
-Gender: Female
-
-Name: en-IE-ConnorNeural
-Gender: Male
-
-Name: en-IE-EmilyNeural
-Gender: Female
-
-Name: en-IN-NeerjaExpressiveNeural
-Gender: Female
-
-Name: en-IN-NeerjaNeural
-Gender: Female
-
-Name: en-IN-PrabhatNeural
-Gender: Male
-
-Name: en-KE-AsiliaNeural
-Gender: Female
-
-Name: en-KE-ChilembaNeural
-Gender: Male
-
-Name: en-NG-AbeoNeural
-Gender: Male
-
-Name: en-NG-EzinneNeural
-Gender: Female
-
-Name: en-NZ-MitchellNeural
-Gender: Male
-
-Name: en-NZ-MollyNeural
-Gender: Female
-
-Name: en-PH-JamesNeural
-Gender: Male
-
-Name: en-PH-RosaNeural
-Gender: Female
-
-Name: en-SG-LunaNeural
-Gender: Female
-
-Name: en-SG-WayneNeural
-Gender: Male
-
-Name: en-TZ-ElimuNeural
-Gender: Male
-
-Name: en-TZ-ImaniNeural
-Gender: Female
-
-Name: en-US-AnaNeural
-Gender: Female
-
-Name: en-US-AndrewMultilingualNeural
-Gender: Male
-
-Name: en-US-AndrewNeural
-Gender: Male
-
-Name: en-US-AriaNeural
-Gender: Female
-
-Name: en-US-AvaMultilingualNeural
-Gender: Female
-
-Name: en-US-AvaNeural
-Gender: Female
-
-Name: en-US-BrianMultilingualNeural
-Gender: Male
-
-Name: en-US-BrianNeural
-Gender: Male
-
-Name: en-US-ChristopherNeural
-Gender: Male
-
-Name: en-US-EmmaMultilingualNeural
-Gender: Female
-
-Name: en-US-EmmaNeural
-Gender: Female
-
-Name: en-US-EricNeural
-Gender: Male
-
-Name: en-US-GuyNeural
-Gender: Male
-
-Name: en-US-JennyNeural
-Gender: Female
-
-Name: en-US-MichelleNeural
-Gender: Female
-
-Name: en-US-RogerNeural
-Gender: Male
-
-Name: en-US-SteffanNeural
-Gender: Male
-
-Name: en-ZA-LeahNeural
-Gender: Female
-
-Name: en-ZA-LukeNeural
-Gender: Male
-
-Name: es-AR-ElenaNeural
-Gender: Female
-
-Name: es-AR-TomasNeural
-Gender: Male
-
-Name: es-BO-MarceloNeural
-Gender: Male
-
-Name: es-BO-SofiaNeural
-Gender: Female
-
-Name: es-CL-CatalinaNeural
-Gender: Female
-
-Name: es-CL-LorenzoNeural
-Gender: Male
-
-Name: es-CO-GonzaloNeural
-Gender: Male
-
-Name: es-CO-SalomeNeural
-Gender: Female
-
-Name: es-CR-JuanNeural
-Gender: Male
-
-Name: es-CR-MariaNeural
-Gender: Female
-
-Name: es-CU-BelkysNeural
-Gender: Female
-
-Name: es-CU-ManuelNeural
-Gender: Male
-
-Name: es-DO-EmilioNeural
-Gender: Male
-
-Name: es-DO-RamonaNeural
-Gender: Female
-
-Name: es-EC-AndreaNeural
-Gender: Female
-
-Name: es-EC-LuisNeural
-Gender: Male
-
-Name: es-ES-AlvaroNeural
-Gender: Male
-
-Name: es-ES-ElviraNeural
-Gender: Female
-
-Name: es-ES-XimenaNeural
-Gender: Female
-
-Name: es-GQ-JavierNeural
-Gender: Male
-
-Name: es-GQ-TeresaNeural
-Gender: Female
-
-Name: es-GT-AndresNeural
-Gender: Male
-
-Name: es-GT-MartaNeural
-Gender: Female
-
-Name: es-HN-CarlosNeural
-Gender: Male
-
-Name: es-HN-KarlaNeural
-Gender: Female
-
-Name: es-MX-DaliaNeural
-Gender: Female
-
-Name: es-MX-JorgeNeural
-Gender: Male
-
-Name: es-NI-FedericoNeural
-Gender: Male
-
-Name: es-NI-YolandaNeural
-Gender: Female
-
-Name: es-PA-MargaritaNeural
-Gender: Female
-
-Name: es-PA-RobertoNeural
-Gender: Male
-
-Name: es-PE-AlexNeural
-Gender: Male
-
-Name: es-PE-CamilaNeural
-Gender: Female
-
-Name: es-PR-KarinaNeural
-Gender: Female
-
-Name: es-PR-VictorNeural
-Gender: Male
-
-Name: es-PY-MarioNeural
-Gender: Male
-
-Name: es-PY-TaniaNeural
-Gender: Female
-
-Name: es-SV-LorenaNeural
-Gender: Female
-
-Name: es-SV-RodrigoNeural
-Gender: Male
-
-Name: es-US-AlonsoNeural
-Gender: Male
-
-Name: es-US-PalomaNeural
-Gender: Female
-
-Name: es-UY-MateoNeural
-Gender: Male
-
-Name: es-UY-ValentinaNeural
-Gender: Female
-
-Name: es-VE-PaolaNeural
-Gender: Female
-
-Name: es-VE-SebastianNeural
-Gender: Male
-
-Name: et-EE-AnuNeural
-Gender: Female
-
-Name: et-EE-KertNeural
-Gender: Male
-
-Name: fa-IR-DilaraNeural
-Gender: Female
-
-Name: fa-IR-FaridNeural
-Gender: Male
-
-Name: fi-FI-HarriNeural
-Gender: Male
-
-Name: fi-FI-NooraNeural
-Gender: Female
-
-Name: fil-PH-AngeloNeural
-Gender: Male
-
-Name: fil-PH-BlessicaNeural
-Gender: Female
-
-Name: fr-BE-CharlineNeural
-Gender: Female
-
-Name: fr-BE-GerardNeural
-Gender: Male
-
-Name: fr-CA-AntoineNeural
-Gender: Male
-
-Name: fr-CA-JeanNeural
-Gender: Male
-
-Name: fr-CA-SylvieNeural
-Gender: Female
-
-Name: fr-CA-ThierryNeural
-Gender: Male
-
-Name: fr-CH-ArianeNeural
-Gender: Female
-
-Name: fr-CH-FabriceNeural
-Gender: Male
-
-Name: fr-FR-DeniseNeural
-Gender: Female
-
-Name: fr-FR-EloiseNeural
-Gender: Female
-
-Name: fr-FR-HenriNeural
-Gender: Male
-
-Name: fr-FR-RemyMultilingualNeural
-Gender: Male
-
-Name: fr-FR-VivienneMultilingualNeural
-Gender: Female
-
-Name: ga-IE-ColmNeural
-Gender: Male
-
-Name: ga-IE-OrlaNeural
-Gender: Female
-
-Name: gl-ES-RoiNeural
-Gender: Male
-
-Name: gl-ES-SabelaNeural
-Gender: Female
-
-Name: gu-IN-DhwaniNeural
-Gender: Female
-
-Name: gu-IN-NiranjanNeural
-Gender: Male
-
-Name: he-IL-AvriNeural
-Gender: Male
-
-Name: he-IL-HilaNeural
-Gender: Female
-
-Name: hi-IN-MadhurNeural
-Gender: Male
-
-Name: hi-IN-SwaraNeural
-Gender: Female
-
-Name: hr-HR-GabrijelaNeural
-Gender: Female
-
-Name: hr-HR-SreckoNeural
-Gender: Male
-
-Name: hu-HU-NoemiNeural
-Gender: Female
-
-Name: hu-HU-TamasNeural
-Gender: Male
-
-Name: id-ID-ArdiNeural
-Gender: Male
-
-Name: id-ID-GadisNeural
-Gender: Female
-
-Name: is-IS-GudrunNeural
-Gender: Female
-
-Name: is-IS-GunnarNeural
-Gender: Male
-
-Name: it-IT-DiegoNeural
-Gender: Male
-
-Name: it-IT-ElsaNeural
-Gender: Female
-
-Name: it-IT-GiuseppeMultilingualNeural
-Gender: Male
-
-Name: it-IT-IsabellaNeural
-Gender: Female
-
-Name: iu-Cans-CA-SiqiniqNeural
-Gender: Female
-
-Name: iu-Cans-CA-TaqqiqNeural
-Gender: Male
-
-Name: iu-Latn-CA-SiqiniqNeural
-Gender: Female
-
-Name: iu-Latn-CA-TaqqiqNeural
-Gender: Male
-
-Name: ja-JP-KeitaNeural
-Gender: Male
-
-Name: ja-JP-NanamiNeural
-Gender: Female
-
-Name: jv-ID-DimasNeural
-Gender: Male
-
-Name: jv-ID-SitiNeural
-Gender: Female
-
-Name: ka-GE-EkaNeural
-Gender: Female
-
-Name: ka-GE-GiorgiNeural
-Gender: Male
-
-Name: kk-KZ-AigulNeural
-Gender: Female
-
-Name: kk-KZ-DauletNeural
-Gender: Male
-
-Name: km-KH-PisethNeural
-Gender: Male
-
-Name: km-KH-SreymomNeural
-Gender: Female
-
-Name: kn-IN-GaganNeural
-Gender: Male
-
-Name: kn-IN-SapnaNeural
-Gender: Female
-
-Name: ko-KR-HyunsuMultilingualNeural
-Gender: Male
-
-Name: ko-KR-InJoonNeural
-Gender: Male
-
-Name: ko-KR-SunHiNeural
-Gender: Female
-
-Name: lo-LA-ChanthavongNeural
-Gender: Male
-
-Name: lo-LA-KeomanyNeural
-Gender: Female
-
-Name: lt-LT-LeonasNeural
-Gender: Male
-
-Name: lt-LT-OnaNeural
-Gender: Female
-
-Name: lv-LV-EveritaNeural
-Gender: Female
-
-Name: lv-LV-NilsNeural
-Gender: Male
-
-Name: mk-MK-AleksandarNeural
-Gender: Male
-
-Name: mk-MK-MarijaNeural
-Gender: Female
-
-Name: ml-IN-MidhunNeural
-Gender: Male
-
-Name: ml-IN-SobhanaNeural
-Gender: Female
-
-Name: mn-MN-BataaNeural
-Gender: Male
-
-Name: mn-MN-YesuiNeural
-Gender: Female
-
-Name: mr-IN-AarohiNeural
-Gender: Female
-
-Name: mr-IN-ManoharNeural
-Gender: Male
-
-Name: ms-MY-OsmanNeural
-Gender: Male
-
-Name: ms-MY-YasminNeural
-Gender: Female
-
-Name: mt-MT-GraceNeural
-Gender: Female
-
-Name: mt-MT-JosephNeural
-Gender: Male
-
-Name: my-MM-NilarNeural
-Gender: Female
-
-Name: my-MM-ThihaNeural
-Gender: Male
-
-Name: nb-NO-FinnNeural
-Gender: Male
-
-Name: nb-NO-PernilleNeural
-Gender: Female
-
-Name: ne-NP-HemkalaNeural
-Gender: Female
-
-Name: ne-NP-SagarNeural
-Gender: Male
-
-Name: nl-BE-ArnaudNeural
-Gender: Male
-
-Name: nl-BE-DenaNeural
-Gender: Female
-
-Name: nl-NL-ColetteNeural
-Gender: Female
-
-Name: nl-NL-FennaNeural
-Gender: Female
-
-Name: nl-NL-MaartenNeural
-Gender: Male
-
-Name: pl-PL-MarekNeural
-Gender: Male
-
-Name: pl-PL-ZofiaNeural
-Gender: Female
-
-Name: ps-AF-GulNawazNeural
-Gender: Male
-
-Name: ps-AF-LatifaNeural
-Gender: Female
-
-Name: pt-BR-AntonioNeural
-Gender: Male
-
-Name: pt-BR-FranciscaNeural
-Gender: Female
-
-Name: pt-BR-ThalitaMultilingualNeural
-Gender: Female
-
-Name: pt-PT-DuarteNeural
-Gender: Male
-
-Name: pt-PT-RaquelNeural
-Gender: Female
-
-Name: ro-RO-AlinaNeural
-Gender: Female
-
-Name: ro-RO-EmilNeural
-Gender: Male
-
-Name: ru-RU-DmitryNeural
-Gender: Male
-
-Name: ru-RU-SvetlanaNeural
-Gender: Female
-
-Name: si-LK-SameeraNeural
-Gender: Male
-
-Name: si-LK-ThiliniNeural
-Gender: Female
-
-Name: sk-SK-LukasNeural
-Gender: Male
-
-Name: sk-SK-ViktoriaNeural
-Gender: Female
-
-Name: sl-SI-PetraNeural
-Gender: Female
-
-Name: sl-SI-RokNeural
-Gender: Male
-
-Name: so-SO-MuuseNeural
-Gender: Male
-
-Name: so-SO-UbaxNeural
-Gender: Female
-
-Name: sq-AL-AnilaNeural
-Gender: Female
-
-Name: sq-AL-IlirNeural
-Gender: Male
-
-Name: sr-RS-NicholasNeural
-Gender: Male
-
-Name: sr-RS-SophieNeural
-Gender: Female
-
-Name: su-ID-JajangNeural
-Gender: Male
-
-Name: su-ID-TutiNeural
-Gender: Female
-
-Name: sv-SE-MattiasNeural
-Gender: Male
-
-Name: sv-SE-SofieNeural
-Gender: Female
-
-Name: sw-KE-RafikiNeural
-Gender: Male
-
-Name: sw-KE-ZuriNeural
-Gender: Female
-
-Name: sw-TZ-DaudiNeural
-Gender: Male
-
-Name: sw-TZ-RehemaNeural
-Gender: Female
-
-Name: ta-IN-PallaviNeural
-Gender: Female
-
-Name: ta-IN-ValluvarNeural
-Gender: Male
-
-Name: ta-LK-KumarNeural
-Gender: Male
-
-Name: ta-LK-SaranyaNeural
-Gender: Female
-
-Name: ta-MY-KaniNeural
-Gender: Female
-
-Name: ta-MY-SuryaNeural
-Gender: Male
-
-Name: ta-SG-AnbuNeural
-Gender: Male
-
-Name: ta-SG-VenbaNeural
-Gender: Female
-
-Name: te-IN-MohanNeural
-Gender: Male
-
-Name: te-IN-ShrutiNeural
-Gender: Female
-
-Name: th-TH-NiwatNeural
-Gender: Male
-
-Name: th-TH-PremwadeeNeural
-Gender: Female
-
-Name: tr-TR-AhmetNeural
-Gender: Male
-
-Name: tr-TR-EmelNeural
-Gender: Female
-
-Name: uk-UA-OstapNeural
-Gender: Male
-
-Name: uk-UA-PolinaNeural
-Gender: Female
-
-Name: ur-IN-GulNeural
-Gender: Female
-
-Name: ur-IN-SalmanNeural
-Gender: Male
-
-Name: ur-PK-AsadNeural
-Gender: Male
-
-Name: ur-PK-UzmaNeural
-Gender: Female
-
-Name: uz-UZ-MadinaNeural
-Gender: Female
-
-Name: uz-UZ-SardorNeural
-Gender: Male
-
-Name: vi-VN-HoaiMyNeural
-Gender: Female
-
-Name: vi-VN-NamMinhNeural
-Gender: Male
-
-Name: zh-CN-XiaoxiaoNeural
-Gender: Female
-
-Name: zh-CN-XiaoyiNeural
-Gender: Female
-
-Name: zh-CN-YunjianNeural
-Gender: Male
-
-Name: zh-CN-YunxiNeural
-Gender: Male
-
-Name: zh-CN-YunxiaNeural
-Gender: Male
-
-Name: zh-CN-YunyangNeural
-Gender: Male
-
-Name: zh-CN-liaoning-XiaobeiNeural
-Gender: Female
-
-Name: zh-CN-shaanxi-XiaoniNeural
-Gender: Female
-
-Name: zh-HK-HiuGaaiNeural
-Gender: Female
-
-Name: zh-HK-HiuMaanNeural
-Gender: Female
-
-Name: zh-HK-WanLungNeural
-Gender: Male
-
-Name: zh-TW-HsiaoChenNeural
-Gender: Female
-
-Name: zh-TW-HsiaoYuNeural
-Gender: Female
-
-Name: zh-TW-YunJheNeural
-Gender: Male
-
-Name: zu-ZA-ThandoNeural
-Gender: Female
-
-Name: zu-ZA-ThembaNeural
-Gender: Male
-
-
-Name: en-US-AvaMultilingualNeural-V2
-Gender: Female
-
-Name: en-US-AndrewMultilingualNeural-V2
-Gender: Male
-
-Name: en-US-EmmaMultilingualNeural-V2
-Gender: Female
-
-Name: en-US-BrianMultilingualNeural-V2
-Gender: Male
-
-Name: de-DE-FlorianMultilingualNeural-V2
-Gender: Male
-
-Name: de-DE-SeraphinaMultilingualNeural-V2
-Gender: Female
-
-Name: fr-FR-RemyMultilingualNeural-V2
-Gender: Male
-
-Name: fr-FR-VivienneMultilingualNeural-V2
-Gender: Female
-
-Name: zh-CN-XiaoxiaoMultilingualNeural-V2
-Gender: Female
-    """.strip()
-    voices = []
-    # 定义正则表达式模式，用于匹配 Name 和 Gender 行
-    pattern = re.compile(r"Name:\s*(.+)\s*Gender:\s*(.+)\s*", re.MULTILINE)
-    # 使用正则表达式查找所有匹配项
-    matches = pattern.findall(azure_voices_str)
-
-    for name, gender in matches:
-        # 应用过滤条件
-        if filter_locals and any(
-            name.lower().startswith(fl.lower()) for fl in filter_locals
-        ):
-            voices.append(f"{name}-{gender}")
-        elif not filter_locals:
-            voices.append(f"{name}-{gender}")
+    """
+    获取 edge / azure v2 的声音列表（已排序）
 
-    voices.sort()
-    return voices
+    Args:
+        filter_locals: 名称前缀列表（不区分大小写），如 ["zh-CN"]，为空时返回全部
+    """
+    return voice_catalog.azure_voices(filter_locals)
 
 
 def parse_voice_name(name: str):
     # zh-CN-XiaoyiNeural-Female
     # zh-CN-YunxiNeural-Male
     # zh-CN-XiaoxiaoMultilingualNeural-V2-Female
+    v = voice_catalog.get_catalog().get(name)
+    if v is not None and v.provider in (
+        voice_catalog.PROVIDER_EDGE,
+        voice_catalog.PROVIDER_AZURE_V2,
+    ):
+        return v.short_name
     name = name.replace("-Female", "").replace("-Male", "").strip()
     return name
 
@@ -1168,7 +105,7 @@ def tts(
     voice_rate: float,
     voice_file: str,
     voice_volume: float = 1.0,
-) -> Union[SubMaker, None]:
+) -> Union["SubMaker", None]:
     if is_azure_v2_voice(voice_name):
         return azure_tts_v2(text, voice_name, voice_file)
     elif is_siliconflow_voice(voice_name):
@@ -1229,34 +166,95 @@ def convert_rate_to_percent(rate: float) -> str:
         return f"{percent}%"
 
 
+class EdgeTTSService:
+    """
+    edge_tts 合成服务：所有请求都在同一个常驻事件循环线程中执行
+
+    任务线程通过 submit() 提交请求并拿到线程安全的 Future，
+    不再为每次请求创建新的事件循环；并发数由信号量限制（配置 edge_tts_concurrency）
+    """
+
+    def __init__(self, concurrency: int = 4):
+        self._concurrency = max(1, concurrency)
+        self._semaphore = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run, name="edge-tts-loop", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _synthesize(self, text: str, voice_name: str, rate: str):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+
+        async with self._semaphore:
+            communicate = edge_tts.Communicate(text, voice_name, rate=rate)
+            sub_maker = edge_tts.SubMaker()
+            # 音频先收集在内存中，由调用方线程一次性写入文件，不阻塞事件循环
+            audio_data = bytearray()
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    audio_data.extend(chunk["data"])
+                elif chunk["type"] == "WordBoundary":
+                    sub_maker.create_sub(
+                        (chunk["offset"], chunk["duration"]), chunk["text"]
+                    )
+            return bytes(audio_data), sub_maker
+
+    def submit(self, text: str, voice_name: str, rate: str = "+0%"):
+        """
+        Returns:
+            concurrent.futures.Future，结果为 (audio_bytes, sub_maker)
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._synthesize(text, voice_name, rate), self._loop
+        )
+
+
+_edge_service = None
+_edge_service_lock = threading.Lock()
+
+
+def get_edge_service() -> EdgeTTSService:
+    global _edge_service
+    if _edge_service is None:
+        with _edge_service_lock:
+            if _edge_service is None:
+                _edge_service = EdgeTTSService(
+                    concurrency=config.app.get("edge_tts_concurrency", 4)
+                )
+    return _edge_service
+
+
 def azure_tts_v1(
     text: str, voice_name: str, voice_rate: float, voice_file: str
-) -> Union[SubMaker, None]:
+) -> Union["SubMaker", None]:
     voice_name = parse_voice_name(voice_name)
     text = text.strip()
     rate_str = convert_rate_to_percent(voice_rate)
+    timeout = config.app.get("edge_tts_timeout", 120)
     for i in range(3):
         try:
             logger.info(f"start, voice name: {voice_name}, try: {i + 1}")
 
-            async def _do() -> SubMaker:
-                communicate = edge_tts.Communicate(text, voice_name, rate=rate_str)
-                sub_maker = edge_tts.SubMaker()
-                with open(voice_file, "wb") as file:
-                    async for chunk in communicate.stream():
-                        if chunk["type"] == "audio":
-                            file.write(chunk["data"])
-                        elif chunk["type"] == "WordBoundary":
-                            sub_maker.create_sub(
-                                (chunk["offset"], chunk["duration"]), chunk["text"]
-                            )
-                return sub_maker
+            future = get_edge_service().submit(text, voice_name, rate_str)
+            try:
+                audio, sub_maker = future.result(timeout=timeout)
+            except Exception:
+                future.cancel()
+                raise
 
-            sub_maker = asyncio.run(_do())
             if not sub_maker or not sub_maker.subs:
                 logger.warning("failed, sub_maker is None or sub_maker.subs is None")
                 continue
 
+            with open(voice_file, "wb") as file:
+                file.write(audio)
+
             logger.info(f"completed, output file: {voice_file}")
             return sub_maker
         except Exception as e:
@@ -1271,7 +269,7 @@ def siliconflow_tts(
     voice_rate: float,
     voice_file: str,
     voice_volume: float = 1.0,
-) -> Union[SubMaker, None]:
+) -> Union["SubMaker", None]:
     """
     使用硅基流动的API生成语音
 
@@ -1328,16 +326,11 @@ def siliconflow_tts(
                     f.write(response.content)
 
                 # 创建一个空的SubMaker对象
-                sub_maker = SubMaker()
+                sub_maker = edge_tts.SubMaker()
 
                 # 获取音频文件的实际长度
                 try:
-                    # 尝试使用moviepy获取音频长度
-                    from moviepy import AudioFileClip
-
-                    audio_clip = AudioFileClip(voice_file)
-                    audio_duration = audio_clip.duration
-                    audio_clip.close()
+                    audio_duration = _audio_duration(voice_file)
 
                     # 将音频长度转换为100纳秒单位（与edge_tts兼容）
                     audio_duration_100ns = int(audio_duration * 10000000)
@@ -1402,12 +395,20 @@ def siliconflow_tts(
     return None
 
 
+def _audio_duration(voice_file: str) -> float:
+    # 读取容器头信息得到时长，不解码音频
+    info = media_probe.probe(voice_file, use_cache=False)
+    if not info or not info.duration:
+        raise ValueError(f"unable to read audio duration: {voice_file}")
+    return info.duration
+
+
 def gtts_tts(
     text: str,
     lang: str,
     voice_rate: float,
     voice_file: str,
-) -> Union[SubMaker, None]:
+) -> Union["SubMaker", None]:
     """
     使用gTTS (Google Text-to-Speech) 生成语音
     完全免费，无需API Key
@@ -1415,7 +416,7 @@ def gtts_tts(
     Args:
         text: 要转换为语音的文本
         lang: 语言代码，如 "zh-CN", "en-US", "ja-JP" 等
-        voice_rate: 语音速度（gTTS不支持，可后期处理）
+        voice_rate: 语音速度（gTTS不支持，合成后由 audio.postprocess_audio 调整）
         voice_file: 输出的音频文件路径
         
     Returns:
@@ -1437,37 +438,21 @@ def gtts_tts(
             tts = gTTS(text=text, lang=gtts_lang, slow=False)
             tts.save(voice_file)
             
-            # 如果需要调整语速，使用pydub处理
-            if abs(voice_rate - 1.0) > 0.01:  # 如果语速不是1.0
-                try:
-                    from pydub import AudioSegment
-                    from pydub.effects import speedup
-                    
-                    audio = AudioSegment.from_mp3(voice_file)
-                    # 调整语速
-                    if voice_rate > 1.0:
-                        audio = speedup(audio, playback_speed=voice_rate)
-                    else:
-                        # 降速：通过改变frame_rate
-                        audio = audio._spawn(audio.raw_data, overrides={
-                            "frame_rate": int(audio.frame_rate * voice_rate)
-                        }).set_frame_rate(audio.frame_rate)
-                    
-                    audio.export(voice_file, format="mp3")
-                    logger.info(f"adjusted speed to {voice_rate}x")
-                except Exception as e:
-                    logger.warning(f"Failed to adjust speed: {str(e)}")
+            # 语速 / 响度在一次 ffmpeg 调用中处理，同时得到处理后音频的准确时长
+            # 响度归一化在全部分段拼接后统一处理（tts_engine）
+            audio_duration = audio.postprocess_audio(
+                voice_file, rate=voice_rate, loudnorm=False
+            )
+            if audio_duration is None:
+                logger.warning("failed to postprocess gTTS audio, keeping original speed")
             
             # 创建 SubMaker 对象
-            sub_maker = SubMaker()
+            sub_maker = edge_tts.SubMaker()
             
             # 获取音频文件的实际长度
             try:
-                from moviepy import AudioFileClip
-                
-                audio_clip = AudioFileClip(voice_file)
-                audio_duration = audio_clip.duration
-                audio_clip.close()
+                if not audio_duration:
+                    audio_duration = _audio_duration(voice_file)
                 
                 # 将音频长度转换为100纳秒单位（与 edge_tts 兼容）
                 audio_duration_100ns = int(audio_duration * 10000000)
@@ -1525,7 +510,7 @@ def pyttsx3_tts(
     voice_rate: float,
     voice_file: str,
     voice_volume: float = 1.0,
-) -> Union[SubMaker, None]:
+) -> Union["SubMaker", None]:
     """
     使用pyttsx3（本地离线TTS）生成语音
     完全免费且离线工作，不需要网络连接
@@ -1571,15 +556,11 @@ def pyttsx3_tts(
             engine.stop()
             
             # 创建 SubMaker 对象
-            sub_maker = SubMaker()
+            sub_maker = edge_tts.SubMaker()
             
             # 获取音频文件的实际长度
             try:
-                from moviepy import AudioFileClip
-                
-                audio_clip = AudioFileClip(voice_file)
-                audio_duration = audio_clip.duration
-                audio_clip.close()
+                audio_duration = _audio_duration(voice_file)
                 
                 # 将音频长度转换为100纳秒单位
                 audio_duration_100ns = int(audio_duration * 10000000)
@@ -1625,7 +606,7 @@ def pyttsx3_tts(
     return None
 
 
-def azure_tts_v2(text: str, voice_name: str, voice_file: str) -> Union[SubMaker, None]:
+def azure_tts_v2(text: str, voice_name: str, voice_file: str) -> Union["SubMaker", None]:
     voice_name = is_azure_v2_voice(voice_name)
     if not voice_name:
         logger.error(f"invalid voice name: {voice_name}")
@@ -1654,7 +635,7 @@ def azure_tts_v2(text: str, voice_name: str, voice_file: str) -> Union[SubMaker,
 
             import azure.cognitiveservices.speech as speechsdk
 
-            sub_maker = SubMaker()
+            sub_maker = edge_tts.SubMaker()
 
             def speech_synthesizer_word_boundary_cb(evt: speechsdk.SessionEventArgs):
                 # print('WordBoundary event:')
@@ -1732,12 +713,101 @@ def _format_text(text: str) -> str:
     return text
 
 
-def create_subtitle(sub_maker: submaker.SubMaker, text: str, subtitle_file: str):
+# 去掉标点和空白后再比较，字幕与文案只在标点、空格、大小写上有差异时也能对上
+_NON_WORD_PATTERN = re.compile(r"\W+")
+# 词与文案对不上时，向后查找的字符数（跳过文案中没有读出来的内容）
+_RESYNC_WINDOW = 16
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD_PATTERN.sub("", text).casefold()
+
+
+def subtitle_entries(
+    sub_maker: "SubMaker", script_lines: List[str]
+) -> Iterator[Tuple[str, float, float]]:
+    """
+    把逐词时间戳按文案分行，逐行产出 (文案行, 开始时间, 结束时间)，时间单位与 sub_maker.offset 相同（100ns）
+
+    文案只归一化一次并拼接成一个字符串，每个词在上面移动游标：
+    - 词与游标处的文本一致时，游标前进词的长度
+    - 不一致时在后面一小段内查找，找到就跳过去（文案中有未读出的内容）；
+      找不到就前进词开头能对上的部分（完全对不上时按词长），但不越过当前行，下一个能对上的词会重新同步
+    游标越过一行的结尾时输出这一行；一个词跨越多行时，按字符数分配这个词的时长。
+    结尾没有对应语音的行会被丢弃
+    """
+    normalized = [_normalize(line) for line in script_lines]
+    script = "".join(normalized)
+    line_ends = list(itertools.accumulate(len(n) for n in normalized))
+
+    line_index = 0
+    cursor = 0
+    start_time = -1.0
+    end_time = 0.0
+    mismatches = 0
+
+    # 跳过归一化后为空的行（只有标点）
+    while line_index < len(script_lines) and not normalized[line_index]:
+        line_index += 1
+
+    for (word_start, word_end), sub in zip(sub_maker.offset, sub_maker.subs):
+        if line_index >= len(script_lines):
+            break
+        word = _normalize(unescape(sub))
+        if not word:
+            continue
+
+        word_cursor = cursor
+        if script.startswith(word, cursor):
+            cursor += len(word)
+        else:
+            mismatches += 1
+            found = script.find(word, cursor, cursor + len(word) + _RESYNC_WINDOW)
+            if found >= 0:
+                word_cursor = found
+                cursor = found + len(word)
+            else:
+                # 只有前半部分对得上时只前进对上的部分，完全对不上时按词长前进
+                matched = len(os.path.commonprefix([word, script[cursor : cursor + len(word)]]))
+                cursor = min(cursor + (matched or len(word)), line_ends[line_index])
+
+        if start_time < 0:
+            start_time = word_start
+        end_time = word_end
+
+        emitted = False
+        while line_index < len(script_lines) and cursor >= line_ends[line_index]:
+            if normalized[line_index]:
+                emitted = True
+                # 词跨越多行时，按字符数切分这个词的时长
+                span = max(1, cursor - word_cursor)
+                ratio = min(1.0, max(0.0, (line_ends[line_index] - word_cursor) / span))
+                line_end = word_start + (word_end - word_start) * ratio
+                yield script_lines[line_index].strip(), start_time, line_end
+                start_time = line_end
+            line_index += 1
+        if emitted and start_time >= end_time:
+            start_time = -1.0
+
+    if line_index < len(script_lines) and start_time >= 0:
+        # 音频已经结束，把已读到的最后一行补上
+        yield script_lines[line_index].strip(), start_time, end_time
+        line_index += 1
+
+    if mismatches or line_index < len(script_lines):
+        logger.warning(
+            f"subtitle mismatches: {mismatches}, lines without audio: {len(script_lines) - line_index}"
+        )
+
+
+def create_subtitle(sub_maker: "SubMaker", text: str, subtitle_file: str):
     """
     优化字幕文件
-    1. 将字幕文件按照标点符号分割成多行
-    2. 逐行匹配字幕文件中的文本
-    3. 生成新的字幕文件
+    1. 将文案按照标点符号分割成多行
+    2. 把逐词时间戳按行归并（见 subtitle_entries）
+    3. 逐行写入字幕文件
+
+    部分词对不上时只影响附近的行，不会导致整个字幕文件生成失败
     """
 
     text = _format_text(text)
@@ -1748,81 +818,45 @@ def create_subtitle(sub_maker: submaker.SubMaker, text: str, subtitle_file: str)
         00:00:00,000 --> 00:00:02,360
         跑步是一项简单易行的运动
         """
-        start_t = mktimestamp(start_time).replace(".", ",")
-        end_t = mktimestamp(end_time).replace(".", ",")
+        start_t = edge_tts.submaker.mktimestamp(start_time).replace(".", ",")
+        end_t = edge_tts.submaker.mktimestamp(end_time).replace(".", ",")
         return f"{idx}\n{start_t} --> {end_t}\n{sub_text}\n"
 
-    start_time = -1.0
-    sub_items = []
-    sub_index = 0
-
     script_lines = utils.split_string_by_punctuations(text)
 
-    def match_line(_sub_line: str, _sub_index: int):
-        if len(script_lines) <= _sub_index:
-            return ""
-
-        _line = script_lines[_sub_index]
-        if _sub_line == _line:
-            return script_lines[_sub_index].strip()
-
-        _sub_line_ = re.sub(r"[^\w\s]", "", _sub_line)
-        _line_ = re.sub(r"[^\w\s]", "", _line)
-        if _sub_line_ == _line_:
-            return _line_.strip()
-
-        _sub_line_ = re.sub(r"\W+", "", _sub_line)
-        _line_ = re.sub(r"\W+", "", _line)
-        if _sub_line_ == _line_:
-            return _line.strip()
-
-        return ""
-
-    sub_line = ""
-
+    sub_index = 0
+    end_time = 0.0
     try:
-        for _, (offset, sub) in enumerate(zip(sub_maker.offset, sub_maker.subs)):
-            _start_time, end_time = offset
-            if start_time < 0:
-                start_time = _start_time
-
-            sub = unescape(sub)
-            sub_line += sub
-            sub_text = match_line(sub_line, sub_index)
-            if sub_text:
+        with open(subtitle_file, "w", encoding="utf-8") as file:
+            for sub_text, start_time, end_time in subtitle_entries(sub_maker, script_lines):
                 sub_index += 1
-                line = formatter(
-                    idx=sub_index,
-                    start_time=start_time,
-                    end_time=end_time,
-                    sub_text=sub_text,
-                )
-                sub_items.append(line)
-                start_time = -1.0
-                sub_line = ""
-
-        if len(sub_items) == len(script_lines):
-            with open(subtitle_file, "w", encoding="utf-8") as file:
-                file.write("\n".join(sub_items) + "\n")
-            try:
-                sbs = subtitles.file_to_subtitles(subtitle_file, encoding="utf-8")
-                duration = max([tb for ((ta, tb), txt) in sbs])
-                logger.info(
-                    f"completed, subtitle file created: {subtitle_file}, duration: {duration}"
+                # 每条字幕后空一行，最后一条也一样（SubtitlesClip 依赖结尾的空行）
+                file.write(
+                    formatter(
+                        idx=sub_index,
+                        start_time=start_time,
+                        end_time=end_time,
+                        sub_text=sub_text,
+                    )
+                    + "\n"
                 )
-            except Exception as e:
-                logger.error(f"failed, error: {str(e)}")
-                os.remove(subtitle_file)
-        else:
-            logger.warning(
-                f"failed, sub_items len: {len(sub_items)}, script_lines len: {len(script_lines)}"
-            )
-
     except Exception as e:
         logger.error(f"failed, error: {str(e)}")
+        sub_index = 0
+
+    if sub_index == 0:
+        logger.warning(f"failed, no subtitle matched, script_lines len: {len(script_lines)}")
+        if os.path.exists(subtitle_file):
+            os.remove(subtitle_file)
+        return
+
+    logger.info(
+        f"completed, subtitle file created: {subtitle_file}, "
+        f"lines: {sub_index}/{len(script_lines)}, duration: {end_time / 10000000:.3f}"
+    )
 
 
-def get_audio_duration(sub_maker: submaker.SubMaker):
+def get_audio_duration(sub_maker: "SubMaker"):
     """
     获取音频时长
     """
@@ -0,0 +1,1315 @@
+"""
+声音目录（voice catalog）
+
+所有服务商的声音列表在第一次使用时解析一次，建立按 服务商 / 地区(locale) / 语言 / 性别
+的索引，之后的查询都直接读索引：
+- webui 每次刷新构建声音下拉框时不再重新解析上千行的声音列表
+- 按地区前缀过滤使用排序列表 + 二分查找，不再逐个比较
+- 根据声音名称判断服务商、解析合成用的名称时直接查表
+
+本模块只依赖标准库，导入时不会加载 edge_tts / moviepy 等重量级依赖
+"""
+import bisect
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+PROVIDER_EDGE = "edge"
+PROVIDER_AZURE_V2 = "azure_v2"
+PROVIDER_SILICONFLOW = "siliconflow"
+PROVIDER_GTTS = "gtts"
+PROVIDER_PYTTSX3 = "pyttsx3"
+
+
+@dataclass(frozen=True)
+class Voice:
+    # 列表中显示/保存的名称，如 zh-CN-XiaoxiaoNeural-Female
+    name: str
+    # 合成时使用的名称（去掉性别后缀），如 zh-CN-XiaoxiaoNeural
+    short_name: str
+    provider: str
+    # 地区，如 zh-CN；与语言无关的声音（硅基流动）为空
+    locale: str
+    # 语言，如 zh
+    language: str
+    gender: str
+
+
+class VoiceCatalog:
+    """
+    只读的声音索引，构建后不再修改，可在多线程间共享
+    """
+
+    def __init__(self, voices: Iterable[Voice]):
+        self._voices: Dict[str, Voice] = {}
+        self._by_provider: Dict[str, List[str]] = {}
+        self._by_locale: Dict[str, List[str]] = {}
+        self._by_language: Dict[str, List[str]] = {}
+        self._by_gender: Dict[str, List[str]] = {}
+
+        for v in voices:
+            self._voices[v.name] = v
+            self._by_provider.setdefault(v.provider, []).append(v.name)
+            if v.locale:
+                self._by_locale.setdefault(v.locale.lower(), []).append(v.name)
+                self._by_language.setdefault(v.language.lower(), []).append(v.name)
+            self._by_gender.setdefault(v.gender.lower(), []).append(v.name)
+
+        for index in (self._by_provider, self._by_locale, self._by_language, self._by_gender):
+            for names in index.values():
+                names.sort()
+
+        # 按小写名称排序，用于前缀二分查找
+        self._sorted_lower: List[Tuple[str, str]] = sorted(
+            (name.lower(), name) for name in self._voices
+        )
+        self._sorted_keys = [key for key, _ in self._sorted_lower]
+
+    def __len__(self) -> int:
+        return len(self._voices)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._voices
+
+    def get(self, name: str) -> Optional[Voice]:
+        return self._voices.get(name)
+
+    def locales(self, provider: Optional[str] = None) -> List[str]:
+        if provider is None:
+            return sorted({v.locale for v in self._voices.values() if v.locale})
+        return sorted(
+            {self._voices[n].locale for n in self._by_provider.get(provider, []) if self._voices[n].locale}
+        )
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        """
+        名称以 prefix 开头（不区分大小写）的声音
+        """
+        key = prefix.lower()
+        start = bisect.bisect_left(self._sorted_keys, key)
+        names = []
+        for i in range(start, len(self._sorted_keys)):
+            if not self._sorted_keys[i].startswith(key):
+                break
+            names.append(self._sorted_lower[i][1])
+        return names
+
+    def filter(
+        self,
+        provider: Optional[str] = None,
+        locales: Optional[Iterable[str]] = None,
+        gender: Optional[str] = None,
+        prefixes: Optional[Iterable[str]] = None,
+    ) -> List[str]:
+        """
+        按条件筛选声音名称，各条件之间为"且"，返回按名称排序的列表
+
+        Args:
+            provider: 服务商，见 PROVIDER_*
+            locales: 地区或语言，如 ["zh-CN"]、["en"]
+            gender: Female / Male
+            prefixes: 名称前缀（不区分大小写），与 get_all_azure_voices 的 filter_locals 相同
+        """
+        candidates = None
+
+        def _narrow(names: Iterable[str]):
+            nonlocal candidates
+            names = set(names)
+            candidates = names if candidates is None else candidates & names
+
+        if provider is not None:
+            _narrow(self._by_provider.get(provider, []))
+        if locales:
+            names = []
+            for locale in locales:
+                key = locale.lower()
+                names += self._by_locale.get(key, []) or self._by_language.get(key, [])
+            _narrow(names)
+        if gender:
+            _narrow(self._by_gender.get(gender.lower(), []))
+        if prefixes:
+            names = []
+            for prefix in prefixes:
+                names += self.with_prefix(prefix)
+            _narrow(names)
+
+        if candidates is None:
+            candidates = self._voices.keys()
+        return sorted(candidates)
+
+
+def _locale_of(name: str) -> Tuple[str, str]:
+    # zh-CN-XiaoxiaoNeural -> (zh-CN, zh)
+    parts = name.split("-")
+    if len(parts) < 2:
+        return "", ""
+    return f"{parts[0]}-{parts[1]}", parts[0]
+
+
+def _parse_azure_voices() -> List[Voice]:
+    # 定义正则表达式模式，用于匹配 Name 和 Gender 行
+    pattern = re.compile(r"Name:\s*(.+)\s*Gender:\s*(.+)\s*", re.MULTILINE)
+    voices = []
+    for name, gender in pattern.findall(_AZURE_VOICES):
+        provider = PROVIDER_AZURE_V2 if name.endswith("-V2") else PROVIDER_EDGE
+        locale, language = _locale_of(name)
+        voices.append(
+            Voice(
+                name=f"{name}-{gender}",
+                short_name=name,
+                provider=provider,
+                locale=locale,
+                language=language,
+                gender=gender,
+            )
+        )
+    return voices
+
+
+def _siliconflow_voices() -> List[Voice]:
+    return [
+        Voice(
+            name=f"siliconflow:{model}:{voice}-{gender}",
+            short_name=f"siliconflow:{model}:{voice}",
+            provider=PROVIDER_SILICONFLOW,
+            locale="",
+            language="",
+            gender=gender,
+        )
+        for model, voice, gender in _SILICONFLOW_VOICES
+    ]
+
+
+def _gtts_voices() -> List[Voice]:
+    return [
+        Voice(
+            name=f"gtts:{lang}-{gender}-{display_name}",
+            short_name=f"gtts:{lang}",
+            provider=PROVIDER_GTTS,
+            locale=lang,
+            language=lang.split("-")[0],
+            gender=gender,
+        )
+        for lang, display_name, gender in _GTTS_VOICES
+    ]
+
+
+@lru_cache(maxsize=None)
+def get_catalog() -> VoiceCatalog:
+    """
+    内置声音（edge / azure v2 / 硅基流动 / gTTS）的索引，第一次调用时构建
+
+    pyttsx3 的声音来自本机系统，不在此目录中，见 pyttsx3_voices()
+    """
+    catalog = VoiceCatalog(_parse_azure_voices() + _siliconflow_voices() + _gtts_voices())
+    logger.debug(f"voice catalog loaded, {len(catalog)} voices")
+    return catalog
+
+
+def azure_voices(filter_locals: Optional[List[str]] = None) -> List[str]:
+    """
+    edge 与 azure v2 的声音，filter_locals 为名称前缀（不区分大小写）
+    """
+    catalog = get_catalog()
+    edge = catalog.filter(provider=PROVIDER_EDGE, prefixes=filter_locals)
+    v2 = catalog.filter(provider=PROVIDER_AZURE_V2, prefixes=filter_locals)
+    return sorted(edge + v2)
+
+
+@lru_cache(maxsize=1)
+def siliconflow_voices() -> Tuple[str, ...]:
+    return tuple(v.name for v in _siliconflow_voices())
+
+
+@lru_cache(maxsize=1)
+def gtts_voices() -> Tuple[str, ...]:
+    return tuple(v.name for v in _gtts_voices())
+
+
+@lru_cache(maxsize=1)
+def pyttsx3_voices() -> Tuple[str, ...]:
+    """
+    本机 pyttsx3 声音，初始化系统语音引擎较慢，结果在进程内缓存
+    """
+    try:
+        import pyttsx3
+
+        engine = pyttsx3.init()
+        system_voices = engine.getProperty("voices")
+        engine.stop()
+    except Exception as e:
+        logger.warning(f"Failed to get pyttsx3 voices: {str(e)}")
+        # 返回默认声音列表
+        return (
+            "pyttsx3:en-US-0-Male-David",
+            "pyttsx3:en-US-1-Female-Zira",
+        )
+
+    voices = []
+    for idx, v in enumerate(system_voices):
+        # 检测性别
+        gender = "Male" if "male" in v.name.lower() or "david" in v.name.lower() else "Female"
+        # 提取语言代码
+        lang_code = "en-US"  # 默认
+        if "zh" in v.id.lower() or "chinese" in v.name.lower():
+            lang_code = "zh-CN"
+        elif "ja" in v.id.lower() or "japanese" in v.name.lower():
+            lang_code = "ja-JP"
+
+        voice_name = v.name.split(" ")[0] if " " in v.name else v.name
+        voices.append(f"pyttsx3:{lang_code}-{idx}-{gender}-{voice_name}")
+
+    return tuple(voices[:10])  # 限制显示前10个系统声音
+
+
+def provider_of(voice_name: str) -> str:
+    """
+    声音所属的服务商，目录中没有的名称按前缀判断
+    """
+    v = get_catalog().get(voice_name)
+    if v is not None:
+        return v.provider
+    if voice_name.startswith("siliconflow:"):
+        return PROVIDER_SILICONFLOW
+    if voice_name.startswith("gtts:"):
+        return PROVIDER_GTTS
+    if voice_name.startswith("pyttsx3:"):
+        return PROVIDER_PYTTSX3
+    if voice_name.replace("-Female", "").replace("-Male", "").strip().endswith("-V2"):
+        return PROVIDER_AZURE_V2
+    return PROVIDER_EDGE
+
+
+# 硅基流动的声音列表和对应的性别（用于显示）
+_SILICONFLOW_VOICES = [
+    ("FunAudioLLM/CosyVoice2-0.5B", "alex", "Male"),
+    ("FunAudioLLM/CosyVoice2-0.5B", "anna", "Female"),
+    ("FunAudioLLM/CosyVoice2-0.5B", "bella", "Female"),
+    ("FunAudioLLM/CosyVoice2-0.5B", "benjamin", "Male"),
+    ("FunAudioLLM/CosyVoice2-0.5B", "charles", "Male"),
+    ("FunAudioLLM/CosyVoice2-0.5B", "claire", "Female"),
+    ("FunAudioLLM/CosyVoice2-0.5B", "david", "Male"),
+    ("FunAudioLLM/CosyVoice2-0.5B", "diana", "Female"),
+]
+
+# gTTS支持的主要语言
+_GTTS_VOICES = [
+    ("zh-CN", "Chinese (Simplified)", "Female"),
+    ("zh-TW", "Chinese (Traditional)", "Female"),
+    ("en-US", "English (US)", "Female"),
+    ("en-GB", "English (UK)", "Female"),
+    ("en-AU", "English (Australia)", "Female"),
+    ("en-IN", "English (India)", "Female"),
+    ("ja-JP", "Japanese", "Female"),
+    ("ko-KR", "Korean", "Female"),
+    ("fr-FR", "French", "Female"),
+    ("de-DE", "German", "Female"),
+    ("es-ES", "Spanish (Spain)", "Female"),
+    ("es-MX", "Spanish (Mexico)", "Female"),
+    ("pt-BR", "Portuguese (Brazil)", "Female"),
+    ("ru-RU", "Russian", "Female"),
+    ("it-IT", "Italian", "Female"),
+    ("ar-SA", "Arabic", "Female"),
+    ("hi-IN", "Hindi", "Female"),
+    ("th-TH", "Thai", "Female"),
+    ("vi-VN", "Vietnamese", "Female"),
+]
+
+_AZURE_VOICES = """
+Name: af-ZA-AdriNeural
+Gender: Female
+
+Name: af-ZA-WillemNeural
+Gender: Male
+
+Name: am-ET-AmehaNeural
+Gender: Male
+
+Name: am-ET-MekdesNeural
+Gender: Female
+
+Name: ar-AE-FatimaNeural
+Gender: Female
+
+Name: ar-AE-HamdanNeural
+Gender: Male
+
+Name: ar-BH-AliNeural
+Gender: Male
+
+Name: ar-BH-LailaNeural
+Gender: Female
+
+Name: ar-DZ-AminaNeural
+Gender: Female
+
+Name: ar-DZ-IsmaelNeural
+Gender: Male
+
+Name: ar-EG-SalmaNeural
+Gender: Female
+
+Name: ar-EG-ShakirNeural
+Gender: Male
+
+Name: ar-IQ-BasselNeural
+Gender: Male
+
+Name: ar-IQ-RanaNeural
+Gender: Female
+
+Name: ar-JO-SanaNeural
+Gender: Female
+
+Name: ar-JO-TaimNeural
+Gender: Male
+
+Name: ar-KW-FahedNeural
+Gender: Male
+
+Name: ar-KW-NouraNeural
+Gender: Female
+
+Name: ar-LB-LaylaNeural
+Gender: Female
+
+Name: ar-LB-RamiNeural
+Gender: Male
+
+Name: ar-LY-ImanNeural
+Gender: Female
+
+Name: ar-LY-OmarNeural
+Gender: Male
+
+Name: ar-MA-JamalNeural
+Gender: Male
+
+Name: ar-MA-MounaNeural
+Gender: Female
+
+Name: ar-OM-AbdullahNeural
+Gender: Male
+
+Name: ar-OM-AyshaNeural
+Gender: Female
+
+Name: ar-QA-AmalNeural
+Gender: Female
+
+Name: ar-QA-MoazNeural
+Gender: Male
+
+Name: ar-SA-HamedNeural
+Gender: Male
+
+Name: ar-SA-ZariyahNeural
+Gender: Female
+
+Name: ar-SY-AmanyNeural
+Gender: Female
+
+Name: ar-SY-LaithNeural
+Gender: Male
+
+Name: ar-TN-HediNeural
+Gender: Male
+
+Name: ar-TN-ReemNeural
+Gender: Female
+
+Name: ar-YE-MaryamNeural
+Gender: Female
+
+Name: ar-YE-SalehNeural
+Gender: Male
+
+Name: az-AZ-BabekNeural
+Gender: Male
+
+Name: az-AZ-BanuNeural
+Gender: Female
+
+Name: bg-BG-BorislavNeural
+Gender: Male
+
+Name: bg-BG-KalinaNeural
+Gender: Female
+
+Name: bn-BD-NabanitaNeural
+Gender: Female
+
+Name: bn-BD-PradeepNeural
+Gender: Male
+
+Name: bn-IN-BashkarNeural
+Gender: Male
+
+Name: bn-IN-TanishaaNeural
+Gender: Female
+
+Name: bs-BA-GoranNeural
+Gender: Male
+
+Name: bs-BA-VesnaNeural
+Gender: Female
+
+Name: ca-ES-EnricNeural
+Gender: Male
+
+Name: ca-ES-JoanaNeural
+Gender: Female
+
+Name: cs-CZ-AntoninNeural
+Gender: Male
+
+Name: cs-CZ-VlastaNeural
+Gender: Female
+
+Name: cy-GB-AledNeural
+Gender: Male
+
+Name: cy-GB-NiaNeural
+Gender: Female
+
+Name: da-DK-ChristelNeural
+Gender: Female
+
+Name: da-DK-JeppeNeural
+Gender: Male
+
+Name: de-AT-IngridNeural
+Gender: Female
+
+Name: de-AT-JonasNeural
+Gender: Male
+
+Name: de-CH-JanNeural
+Gender: Male
+
+Name: de-CH-LeniNeural
+Gender: Female
+
+Name: de-DE-AmalaNeural
+Gender: Female
+
+Name: de-DE-ConradNeural
+Gender: Male
+
+Name: de-DE-FlorianMultilingualNeural
+Gender: Male
+
+Name: de-DE-KatjaNeural
+Gender: Female
+
+Name: de-DE-KillianNeural
+Gender: Male
+
+Name: de-DE-SeraphinaMultilingualNeural
+Gender: Female
+
+Name: el-GR-AthinaNeural
+Gender: Female
+
+Name: el-GR-NestorasNeural
+Gender: Male
+
+Name: en-AU-NatashaNeural
+Gender: Female
+
+Name: en-AU-WilliamNeural
+Gender: Male
+
+Name: en-CA-ClaraNeural
+Gender: Female
+
+Name: en-CA-LiamNeural
+Gender: Male
+
+Name: en-GB-LibbyNeural
+Gender: Female
+
+Name: en-GB-MaisieNeural
+Gender: Female
+
+Name: en-GB-RyanNeural
+Gender: Male
+
+Name: en-GB-SoniaNeural
+Gender: Female
+
+Name: en-GB-ThomasNeural
+Gender: Male
+
+Name: en-HK-SamNeural
+Gender: Male
+
+Name: en-HK-YanNeural
+Gender: Female
+
+Name: en-IE-ConnorNeural
+Gender: Male
+
+Name: en-IE-EmilyNeural
+Gender: Female
+
+Name: en-IN-NeerjaExpressiveNeural
+Gender: Female
+
+Name: en-IN-NeerjaNeural
+Gender: Female
+
+Name: en-IN-PrabhatNeural
+Gender: Male
+
+Name: en-KE-AsiliaNeural
+Gender: Female
+
+Name: en-KE-ChilembaNeural
+Gender: Male
+
+Name: en-NG-AbeoNeural
+Gender: Male
+
+Name: en-NG-EzinneNeural
+Gender: Female
+
+Name: en-NZ-MitchellNeural
+Gender: Male
+
+Name: en-NZ-MollyNeural
+Gender: Female
+
+Name: en-PH-JamesNeural
+Gender: Male
+
+Name: en-PH-RosaNeural
+Gender: Female
+
+Name: en-SG-LunaNeural
+Gender: Female
+
+Name: en-SG-WayneNeural
+Gender: Male
+
+Name: en-TZ-ElimuNeural
+Gender: Male
+
+Name: en-TZ-ImaniNeural
+Gender: Female
+
+Name: en-US-AnaNeural
+Gender: Female
+
+Name: en-US-AndrewMultilingualNeural
+Gender: Male
+
+Name: en-US-AndrewNeural
+Gender: Male
+
+Name: en-US-AriaNeural
+Gender: Female
+
+Name: en-US-AvaMultilingualNeural
+Gender: Female
+
+Name: en-US-AvaNeural
+Gender: Female
+
+Name: en-US-BrianMultilingualNeural
+Gender: Male
+
+Name: en-US-BrianNeural
+Gender: Male
+
+Name: en-US-ChristopherNeural
+Gender: Male
+
+Name: en-US-EmmaMultilingualNeural
+Gender: Female
+
+Name: en-US-EmmaNeural
+Gender: Female
+
+Name: en-US-EricNeural
+Gender: Male
+
+Name: en-US-GuyNeural
+Gender: Male
+
+Name: en-US-JennyNeural
+Gender: Female
+
+Name: en-US-MichelleNeural
+Gender: Female
+
+Name: en-US-RogerNeural
+Gender: Male
+
+Name: en-US-SteffanNeural
+Gender: Male
+
+Name: en-ZA-LeahNeural
+Gender: Female
+
+Name: en-ZA-LukeNeural
+Gender: Male
+
+Name: es-AR-ElenaNeural
+Gender: Female
+
+Name: es-AR-TomasNeural
+Gender: Male
+
+Name: es-BO-MarceloNeural
+Gender: Male
+
+Name: es-BO-SofiaNeural
+Gender: Female
+
+Name: es-CL-CatalinaNeural
+Gender: Female
+
+Name: es-CL-LorenzoNeural
+Gender: Male
+
+Name: es-CO-GonzaloNeural
+Gender: Male
+
+Name: es-CO-SalomeNeural
+Gender: Female
+
+Name: es-CR-JuanNeural
+Gender: Male
+
+Name: es-CR-MariaNeural
+Gender: Female
+
+Name: es-CU-BelkysNeural
+Gender: Female
+
+Name: es-CU-ManuelNeural
+Gender: Male
+
+Name: es-DO-EmilioNeural
+Gender: Male
+
+Name: es-DO-RamonaNeural
+Gender: Female
+
+Name: es-EC-AndreaNeural
+Gender: Female
+
+Name: es-EC-LuisNeural
+Gender: Male
+
+Name: es-ES-AlvaroNeural
+Gender: Male
+
+Name: es-ES-ElviraNeural
+Gender: Female
+
+Name: es-ES-XimenaNeural
+Gender: Female
+
+Name: es-GQ-JavierNeural
+Gender: Male
+
+Name: es-GQ-TeresaNeural
+Gender: Female
+
+Name: es-GT-AndresNeural
+Gender: Male
+
+Name: es-GT-MartaNeural
+Gender: Female
+
+Name: es-HN-CarlosNeural
+Gender: Male
+
+Name: es-HN-KarlaNeural
+Gender: Female
+
+Name: es-MX-DaliaNeural
+Gender: Female
+
+Name: es-MX-JorgeNeural
+Gender: Male
+
+Name: es-NI-FedericoNeural
+Gender: Male
+
+Name: es-NI-YolandaNeural
+Gender: Female
+
+Name: es-PA-MargaritaNeural
+Gender: Female
+
+Name: es-PA-RobertoNeural
+Gender: Male
+
+Name: es-PE-AlexNeural
+Gender: Male
+
+Name: es-PE-CamilaNeural
+Gender: Female
+
+Name: es-PR-KarinaNeural
+Gender: Female
+
+Name: es-PR-VictorNeural
+Gender: Male
+
+Name: es-PY-MarioNeural
+Gender: Male
+
+Name: es-PY-TaniaNeural
+Gender: Female
+
+Name: es-SV-LorenaNeural
+Gender: Female
+
+Name: es-SV-RodrigoNeural
+Gender: Male
+
+Name: es-US-AlonsoNeural
+Gender: Male
+
+Name: es-US-PalomaNeural
+Gender: Female
+
+Name: es-UY-MateoNeural
+Gender: Male
+
+Name: es-UY-ValentinaNeural
+Gender: Female
+
+Name: es-VE-PaolaNeural
+Gender: Female
+
+Name: es-VE-SebastianNeural
+Gender: Male
+
+Name: et-EE-AnuNeural
+Gender: Female
+
+Name: et-EE-KertNeural
+Gender: Male
+
+Name: fa-IR-DilaraNeural
+Gender: Female
+
+Name: fa-IR-FaridNeural
+Gender: Male
+
+Name: fi-FI-HarriNeural
+Gender: Male
+
+Name: fi-FI-NooraNeural
+Gender: Female
+
+Name: fil-PH-AngeloNeural
+Gender: Male
+
+Name: fil-PH-BlessicaNeural
+Gender: Female
+
+Name: fr-BE-CharlineNeural
+Gender: Female
+
+Name: fr-BE-GerardNeural
+Gender: Male
+
+Name: fr-CA-AntoineNeural
+Gender: Male
+
+Name: fr-CA-JeanNeural
+Gender: Male
+
+Name: fr-CA-SylvieNeural
+Gender: Female
+
+Name: fr-CA-ThierryNeural
+Gender: Male
+
+Name: fr-CH-ArianeNeural
+Gender: Female
+
+Name: fr-CH-FabriceNeural
+Gender: Male
+
+Name: fr-FR-DeniseNeural
+Gender: Female
+
+Name: fr-FR-EloiseNeural
+Gender: Female
+
+Name: fr-FR-HenriNeural
+Gender: Male
+
+Name: fr-FR-RemyMultilingualNeural
+Gender: Male
+
+Name: fr-FR-VivienneMultilingualNeural
+Gender: Female
+
+Name: ga-IE-ColmNeural
+Gender: Male
+
+Name: ga-IE-OrlaNeural
+Gender: Female
+
+Name: gl-ES-RoiNeural
+Gender: Male
+
+Name: gl-ES-SabelaNeural
+Gender: Female
+
+Name: gu-IN-DhwaniNeural
+Gender: Female
+
+Name: gu-IN-NiranjanNeural
+Gender: Male
+
+Name: he-IL-AvriNeural
+Gender: Male
+
+Name: he-IL-HilaNeural
+Gender: Female
+
+Name: hi-IN-MadhurNeural
+Gender: Male
+
+Name: hi-IN-SwaraNeural
+Gender: Female
+
+Name: hr-HR-GabrijelaNeural
+Gender: Female
+
+Name: hr-HR-SreckoNeural
+Gender: Male
+
+Name: hu-HU-NoemiNeural
+Gender: Female
+
+Name: hu-HU-TamasNeural
+Gender: Male
+
+Name: id-ID-ArdiNeural
+Gender: Male
+
+Name: id-ID-GadisNeural
+Gender: Female
+
+Name: is-IS-GudrunNeural
+Gender: Female
+
+Name: is-IS-GunnarNeural
+Gender: Male
+
+Name: it-IT-DiegoNeural
+Gender: Male
+
+Name: it-IT-ElsaNeural
+Gender: Female
+
+Name: it-IT-GiuseppeMultilingualNeural
+Gender: Male
+
+Name: it-IT-IsabellaNeural
+Gender: Female
+
+Name: iu-Cans-CA-SiqiniqNeural
+Gender: Female
+
+Name: iu-Cans-CA-TaqqiqNeural
+Gender: Male
+
+Name: iu-Latn-CA-SiqiniqNeural
+Gender: Female
+
+Name: iu-Latn-CA-TaqqiqNeural
+Gender: Male
+
+Name: ja-JP-KeitaNeural
+Gender: Male
+
+Name: ja-JP-NanamiNeural
+Gender: Female
+
+Name: jv-ID-DimasNeural
+Gender: Male
+
+Name: jv-ID-SitiNeural
+Gender: Female
+
+Name: ka-GE-EkaNeural
+Gender: Female
+
+Name: ka-GE-GiorgiNeural
+Gender: Male
+
+Name: kk-KZ-AigulNeural
+Gender: Female
+
+Name: kk-KZ-DauletNeural
+Gender: Male
+
+Name: km-KH-PisethNeural
+Gender: Male
+
+Name: km-KH-SreymomNeural
+Gender: Female
+
+Name: kn-IN-GaganNeural
+Gender: Male
+
+Name: kn-IN-SapnaNeural
+Gender: Female
+
+Name: ko-KR-HyunsuMultilingualNeural
+Gender: Male
+
+Name: ko-KR-InJoonNeural
+Gender: Male
+
+Name: ko-KR-SunHiNeural
+Gender: Female
+
+Name: lo-LA-ChanthavongNeural
+Gender: Male
+
+Name: lo-LA-KeomanyNeural
+Gender: Female
+
+Name: lt-LT-LeonasNeural
+Gender: Male
+
+Name: lt-LT-OnaNeural
+Gender: Female
+
+Name: lv-LV-EveritaNeural
+Gender: Female
+
+Name: lv-LV-NilsNeural
+Gender: Male
+
+Name: mk-MK-AleksandarNeural
+Gender: Male
+
+Name: mk-MK-MarijaNeural
+Gender: Female
+
+Name: ml-IN-MidhunNeural
+Gender: Male
+
+Name: ml-IN-SobhanaNeural
+Gender: Female
+
+Name: mn-MN-BataaNeural
+Gender: Male
+
+Name: mn-MN-YesuiNeural
+Gender: Female
+
+Name: mr-IN-AarohiNeural
+Gender: Female
+
+Name: mr-IN-ManoharNeural
+Gender: Male
+
+Name: ms-MY-OsmanNeural
+Gender: Male
+
+Name: ms-MY-YasminNeural
+Gender: Female
+
+Name: mt-MT-GraceNeural
+Gender: Female
+
+Name: mt-MT-JosephNeural
+Gender: Male
+
+Name: my-MM-NilarNeural
+Gender: Female
+
+Name: my-MM-ThihaNeural
+Gender: Male
+
+Name: nb-NO-FinnNeural
+Gender: Male
+
+Name: nb-NO-PernilleNeural
+Gender: Female
+
+Name: ne-NP-HemkalaNeural
+Gender: Female
+
+Name: ne-NP-SagarNeural
+Gender: Male
+
+Name: nl-BE-ArnaudNeural
+Gender: Male
+
+Name: nl-BE-DenaNeural
+Gender: Female
+
+Name: nl-NL-ColetteNeural
+Gender: Female
+
+Name: nl-NL-FennaNeural
+Gender: Female
+
+Name: nl-NL-MaartenNeural
+Gender: Male
+
+Name: pl-PL-MarekNeural
+Gender: Male
+
+Name: pl-PL-ZofiaNeural
+Gender: Female
+
+Name: ps-AF-GulNawazNeural
+Gender: Male
+
+Name: ps-AF-LatifaNeural
+Gender: Female
+
+Name: pt-BR-AntonioNeural
+Gender: Male
+
+Name: pt-BR-FranciscaNeural
+Gender: Female
+
+Name: pt-BR-ThalitaMultilingualNeural
+Gender: Female
+
+Name: pt-PT-DuarteNeural
+Gender: Male
+
+Name: pt-PT-RaquelNeural
+Gender: Female
+
+Name: ro-RO-AlinaNeural
+Gender: Female
+
+Name: ro-RO-EmilNeural
+Gender: Male
+
+Name: ru-RU-DmitryNeural
+Gender: Male
+
+Name: ru-RU-SvetlanaNeural
+Gender: Female
+
+Name: si-LK-SameeraNeural
+Gender: Male
+
+Name: si-LK-ThiliniNeural
+Gender: Female
+
+Name: sk-SK-LukasNeural
+Gender: Male
+
+Name: sk-SK-ViktoriaNeural
+Gender: Female
+
+Name: sl-SI-PetraNeural
+Gender: Female
+
+Name: sl-SI-RokNeural
+Gender: Male
+
+Name: so-SO-MuuseNeural
+Gender: Male
+
+Name: so-SO-UbaxNeural
+Gender: Female
+
+Name: sq-AL-AnilaNeural
+Gender: Female
+
+Name: sq-AL-IlirNeural
+Gender: Male
+
+Name: sr-RS-NicholasNeural
+Gender: Male
+
+Name: sr-RS-SophieNeural
+Gender: Female
+
+Name: su-ID-JajangNeural
+Gender: Male
+
+Name: su-ID-TutiNeural
+Gender: Female
+
+Name: sv-SE-MattiasNeural
+Gender: Male
+
+Name: sv-SE-SofieNeural
+Gender: Female
+
+Name: sw-KE-RafikiNeural
+Gender: Male
+
+Name: sw-KE-ZuriNeural
+Gender: Female
+
+Name: sw-TZ-DaudiNeural
+Gender: Male
+
+Name: sw-TZ-RehemaNeural
+Gender: Female
+
+Name: ta-IN-PallaviNeural
+Gender: Female
+
+Name: ta-IN-ValluvarNeural
+Gender: Male
+
+Name: ta-LK-KumarNeural
+Gender: Male
+
+Name: ta-LK-SaranyaNeural
+Gender: Female
+
+Name: ta-MY-KaniNeural
+Gender: Female
+
+Name: ta-MY-SuryaNeural
+Gender: Male
+
+Name: ta-SG-AnbuNeural
+Gender: Male
+
+Name: ta-SG-VenbaNeural
+Gender: Female
+
+Name: te-IN-MohanNeural
+Gender: Male
+
+Name: te-IN-ShrutiNeural
+Gender: Female
+
+Name: th-TH-NiwatNeural
+Gender: Male
+
+Name: th-TH-PremwadeeNeural
+Gender: Female
+
+Name: tr-TR-AhmetNeural
+Gender: Male
+
+Name: tr-TR-EmelNeural
+Gender: Female
+
+Name: uk-UA-OstapNeural
+Gender: Male
+
+Name: uk-UA-PolinaNeural
+Gender: Female
+
+Name: ur-IN-GulNeural
+Gender: Female
+
+Name: ur-IN-SalmanNeural
+Gender: Male
+
+Name: ur-PK-AsadNeural
+Gender: Male
+
+Name: ur-PK-UzmaNeural
+Gender: Female
+
+Name: uz-UZ-MadinaNeural
+Gender: Female
+
+Name: uz-UZ-SardorNeural
+Gender: Male
+
+Name: vi-VN-HoaiMyNeural
+Gender: Female
+
+Name: vi-VN-NamMinhNeural
+Gender: Male
+
+Name: zh-CN-XiaoxiaoNeural
+Gender: Female
+
+Name: zh-CN-XiaoyiNeural
+Gender: Female
+
+Name: zh-CN-YunjianNeural
+Gender: Male
+
+Name: zh-CN-YunxiNeural
+Gender: Male
+
+Name: zh-CN-YunxiaNeural
+Gender: Male
+
+Name: zh-CN-YunyangNeural
+Gender: Male
+
+Name: zh-CN-liaoning-XiaobeiNeural
+Gender: Female
+
+Name: zh-CN-shaanxi-XiaoniNeural
+Gender: Female
+
+Name: zh-HK-HiuGaaiNeural
+Gender: Female
+
+Name: zh-HK-HiuMaanNeural
+Gender: Female
+
+Name: zh-HK-WanLungNeural
+Gender: Male
+
+Name: zh-TW-HsiaoChenNeural
+Gender: Female
+
+Name: zh-TW-HsiaoYuNeural
+Gender: Female
+
+Name: zh-TW-YunJheNeural
+Gender: Male
+
+Name: zu-ZA-ThandoNeural
+Gender: Female
+
+Name: zu-ZA-ThembaNeural
+Gender: Male
+
+
+Name: en-US-AvaMultilingualNeural-V2
+Gender: Female
+
+Name: en-US-AndrewMultilingualNeural-V2
+Gender: Male
+
+Name: en-US-EmmaMultilingualNeural-V2
+Gender: Female
+
+Name: en-US-BrianMultilingualNeural-V2
+Gender: Male
+
+Name: de-DE-FlorianMultilingualNeural-V2
+Gender: Male
+
+Name: de-DE-SeraphinaMultilingualNeural-V2
+Gender: Female
+
+Name: fr-FR-RemyMultilingualNeural-V2
+Gender: Male
+
+Name: fr-FR-VivienneMultilingualNeural-V2
+Gender: Female
+
+Name: zh-CN-XiaoxiaoMultilingualNeural-V2
+Gender: Female
+""".strip()
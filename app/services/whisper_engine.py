@@ -0,0 +1,177 @@
+"""
+Whisper 语音识别服务
+
+- 模型按 (model_size, device, compute_type) 只加载一次，加载过程加锁，并发任务不会重复加载
+- 同一个模型由所有任务共用：CTranslate2 按 num_workers 并行处理多个请求，
+  超出 whisper_workers 的请求排队等待，不会同时占满 CPU/显存
+- 使用 faster-whisper 的批量推理（BatchedInferencePipeline）：先用 VAD 把长音频切成若干片段，
+  再按 batch_size 批量并行解码，长音频不再从头到尾串行识别
+- beam_size / compute_type / batch_size 可以按请求指定，未指定时使用配置 [whisper]
+"""
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import config
+from app.utils import utils
+
+if TYPE_CHECKING:
+    from faster_whisper import BatchedInferencePipeline, WhisperModel
+    from faster_whisper.transcribe import Segment, TranscriptionInfo
+
+# 导入耗时较长（ctranslate2、onnxruntime 等），第一次加载模型时才导入
+faster_whisper = utils.lazy_import("faster_whisper")
+
+_models: Dict[tuple, "WhisperModel"] = {}
+_pipelines: Dict[tuple, "BatchedInferencePipeline"] = {}
+_models_lock = threading.Lock()
+_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def _workers() -> int:
+    return max(1, int(config.whisper.get("workers", 2)))
+
+
+def _request_slots() -> threading.BoundedSemaphore:
+    global _slots
+    if _slots is None:
+        with _models_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(_workers())
+    return _slots
+
+
+def _model_path(model_size: str) -> str:
+    # 优先使用 models 目录下手动下载的模型
+    model_path = f"{utils.root_dir()}/models/whisper-{model_size}"
+    if os.path.isfile(f"{model_path}/model.bin"):
+        return model_path
+    return model_size
+
+
+def _model_key(compute_type: Optional[str] = None) -> tuple:
+    return (
+        config.whisper.get("model_size", "large-v3"),
+        config.whisper.get("device", "cpu").lower(),
+        compute_type or config.whisper.get("compute_type", "int8"),
+    )
+
+
+def get_model(compute_type: Optional[str] = None) -> Optional["WhisperModel"]:
+    """
+    获取共用的模型，首次调用时加载；同一配置的模型只会加载一次
+
+    Returns:
+        WhisperModel，加载失败返回 None
+    """
+    key = _model_key(compute_type)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _models_lock:
+        model = _models.get(key)
+        if model is not None:
+            return model
+
+        model_size, device, compute_type = key
+        model_path = _model_path(model_size)
+        cpu_threads = int(config.whisper.get("cpu_threads", 0))
+        if cpu_threads <= 0 and device == "cpu":
+            # 各个 worker 平分 CPU 核心
+            cpu_threads = max(1, (os.cpu_count() or 4) // _workers())
+        logger.info(
+            f"loading model: {model_path}, device: {device}, compute_type: {compute_type}, "
+            f"workers: {_workers()}, cpu_threads: {cpu_threads}"
+        )
+        try:
+            model = faster_whisper.WhisperModel(
+                model_size_or_path=model_path,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                num_workers=_workers(),
+            )
+        except Exception as e:
+            logger.error(
+                f"failed to load model: {e} \n\n"
+                f"********************************************\n"
+                f"this may be caused by network issue. \n"
+                f"please download the model manually and put it in the 'models' folder. \n"
+                f"see [README.md FAQ](https://github.com/harry0703/MoneyPrinterTurbo) for more details.\n"
+                f"********************************************\n\n"
+            )
+            return None
+
+        _models[key] = model
+        _pipelines[key] = faster_whisper.BatchedInferencePipeline(model=model)
+        return model
+
+
+def language_code(language: Optional[str]) -> Optional[str]:
+    """
+    界面/接口使用的语言区域（"zh-CN"、"en-US"）转换为 whisper 的 ISO-639-1 代码，
+    whisper 不支持的语言返回 None（自动检测）
+    """
+    if not language:
+        return None
+    code = language.replace("_", "-").split("-")[0].lower()
+    return code if code in faster_whisper.tokenizer._LANGUAGE_CODES else None
+
+
+def transcribe(
+    audio_file: str,
+    beam_size: Optional[int] = None,
+    compute_type: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    language: Optional[str] = None,
+    word_timestamps: bool = True,
+) -> Optional[Tuple[List["Segment"], "TranscriptionInfo"]]:
+    """
+    识别音频，返回完整的片段列表（已按时间排序）
+
+    Args:
+        audio_file: 音频文件
+        beam_size: 束搜索宽度，None 时使用配置 beam_size（默认 5）
+        compute_type: 计算精度，None 时使用配置 compute_type；不同精度各自加载一个模型
+        batch_size: 批量解码的片段数，None 时使用配置 batch_size（默认 8），不大于 1 时逐段解码
+        language: 语言代码，None 时自动检测
+        word_timestamps: 是否输出逐词时间戳
+
+    Returns:
+        (segments, info)，模型加载失败返回 None
+    """
+    model = get_model(compute_type)
+    if model is None:
+        return None
+
+    if beam_size is None:
+        beam_size = int(config.whisper.get("beam_size", 5))
+    if batch_size is None:
+        batch_size = int(config.whisper.get("batch_size", 8))
+
+    options = dict(
+        language=language,
+        beam_size=beam_size,
+        word_timestamps=word_timestamps,
+        vad_filter=True,
+        vad_parameters=dict(min_silence_duration_ms=500),
+    )
+
+    with _request_slots():
+        if batch_size > 1:
+            pipeline = _pipelines[_model_key(compute_type)]
+            segments, info = pipeline.transcribe(audio_file, batch_size=batch_size, **options)
+        else:
+            segments, info = model.transcribe(audio_file, **options)
+        # segments 是生成器，实际解码发生在迭代时，需要在占用名额期间完成
+        segments = list(segments)
+
+    logger.info(
+        f"transcribed: {os.path.basename(audio_file)}, language: '{info.language}' "
+        f"({info.language_probability:.2f}), segments: {len(segments)}, "
+        f"beam_size: {beam_size}, batch_size: {batch_size}"
+    )
+    return segments, info
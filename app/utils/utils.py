@@ -1,6 +1,11 @@
+import errno
+import importlib
 import json
 import locale
 import os
+import shutil
+import sys
+import types
 from pathlib import Path
 import threading
 from typing import Any
@@ -78,6 +83,80 @@ def storage_dir(sub_dir: str = "", create: bool = False):
     return d
 
 
+def temp_dir(sub_dir: str = "", size_hint_mb: float = 0, on_disk: bool = False):
+    """
+    流水线内部临时文件目录（中间视频等），读写频繁但用完即删
+
+    优先级：配置 temp_dir > 内存文件系统 /dev/shm（剩余空间足够时）> storage/temp
+
+    Args:
+        size_hint_mb: 本阶段预计写入的中间文件大小（MB），/dev/shm 剩余空间需要不少于
+                      tmpfs_min_free_mb + size_hint_mb，避免并发任务写满内存文件系统
+        on_disk: 不使用内存文件系统（例如写入时空间不足，改为在磁盘上重试）
+    """
+    from app.config import config
+
+    base = config.app.get("temp_dir", "")
+    if not base:
+        base = storage_dir("temp")
+        shm = "/dev/shm"
+        min_free_mb = config.app.get("tmpfs_min_free_mb", 2048)
+        if not on_disk and min_free_mb > 0 and os.path.isdir(shm) and os.access(shm, os.W_OK):
+            try:
+                stat = os.statvfs(shm)
+                required = (min_free_mb + max(0, size_hint_mb)) * 1024 * 1024
+                if stat.f_bavail * stat.f_frsize >= required:
+                    base = os.path.join(shm, "MoneyPrinterTurbo")
+            except OSError:
+                pass
+
+    d = os.path.join(base, sub_dir) if sub_dir else base
+    if not os.path.exists(d):
+        os.makedirs(d, exist_ok=True)
+    return d
+
+
+def is_no_space_error(e: BaseException) -> bool:
+    """
+    写入失败是否因为空间不足（ffmpeg/MoviePy 的错误只包含 ffmpeg 的输出文本）
+    """
+    if isinstance(e, OSError) and e.errno == errno.ENOSPC:
+        return True
+    return "No space left on device" in str(e)
+
+
+def raise_for_no_space(output: str):
+    """
+    ffmpeg 子进程因空间不足失败时抛出 ENOSPC（其他失败由调用方自行处理）
+    """
+    if output and "No space left on device" in output:
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+
+def run_in_temp_dir(sub_dir: str, func, size_hint_mb: float = 0):
+    """
+    在临时目录中执行 func(work_dir)，结束后（包括出错时）删除该目录
+
+    目录位于内存文件系统且写入时空间不足（ENOSPC），改用磁盘上的临时目录重新执行整个阶段
+    """
+    work_dir = temp_dir(sub_dir, size_hint_mb=size_hint_mb)
+    try:
+        try:
+            return func(work_dir)
+        except Exception as e:
+            if not is_no_space_error(e):
+                raise
+            disk_dir = temp_dir(sub_dir, on_disk=True)
+            if disk_dir == work_dir:
+                raise
+            logger.warning(f"no space left in {work_dir}, retrying in {disk_dir}")
+            shutil.rmtree(work_dir, ignore_errors=True)
+            work_dir = disk_dir
+            return func(work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
 def resource_dir(sub_dir: str = ""):
     d = os.path.join(root_dir(), "resource")
     if sub_dir:
@@ -228,3 +307,40 @@ def load_locales(i18n_dir):
 
 def parse_extension(filename):
     return Path(filename).suffix.lower().lstrip('.')
+
+
+class _LazyModule(types.ModuleType):
+    """
+    模块代理：第一次访问属性时才导入真正的模块，之后的访问直接转发
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            # import_module 自带模块级的导入锁，多个线程同时访问只会导入一次
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    按需导入模块：返回一个代理，第一次使用时才真正导入（模块已导入时直接返回模块本身）
+
+    g4f、openai、faster_whisper、edge_tts、moviepy 等依赖导入耗时较长，且不一定会用到，
+    延迟导入可以缩短 API 服务和 worker 的启动时间
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return _LazyModule(name)
@@ -0,0 +1,103 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import audio, media_probe
+from app.services.video_fast import find_ffmpeg
+
+
+class TestAudio(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def _make_tone(self, duration: float) -> str:
+        path = os.path.join(self.temp_dir.name, "tone.mp3")
+        subprocess.run(
+            [
+                find_ffmpeg(), "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+                "-c:a", "libmp3lame", path,
+            ],
+            check=True,
+        )
+        return path
+
+    def test_atempo_filters(self):
+        self.assertEqual(audio.atempo_filters(1.0), [])
+        self.assertEqual(audio.atempo_filters(1.5), ["atempo=1.5"])
+        self.assertEqual(audio.atempo_filters(3.0), ["atempo=2.0", "atempo=1.5"])
+        self.assertEqual(audio.atempo_filters(0.25), ["atempo=0.5", "atempo=0.5"])
+        with self.assertRaises(ValueError):
+            audio.atempo_filters(0)
+
+    def test_build_filters(self):
+        filters = audio.build_filters(rate=1.2, volume=0.5, loudnorm=True)
+        self.assertEqual(filters[:2], ["atempo=1.2", "volume=0.5"])
+        self.assertTrue(filters[2].startswith("loudnorm="))
+
+    def test_build_mix_graph(self):
+        graph = audio.build_mix_graph(10, has_bgm=True, bgm_volume=0.3, fade_out=3)
+        self.assertIn("atrim=0:10.000", graph)
+        self.assertIn("afade=t=out:st=7.000:d=3.000", graph)
+        self.assertIn("sidechaincompress", graph)
+        self.assertIn("normalize=0", graph)
+        self.assertIn("loudnorm=", graph)
+        self.assertTrue(graph.endswith("[mix]"))
+
+        graph = audio.build_mix_graph(10, has_bgm=False, voice_volume=1.0, loudnorm=False)
+        self.assertEqual(graph, "[0:a]anull[mix]")
+
+        graph = audio.build_mix_graph(10, has_bgm=True, ducking=False, loudnorm=False)
+        self.assertNotIn("sidechaincompress", graph)
+        self.assertIn("[voice][bgm]amix", graph)
+
+    @unittest.skipIf(not find_ffmpeg(), "ffmpeg not found")
+    def test_mix_audio_track_loops_short_bgm(self):
+        voice_file = self._make_tone(5)
+        bgm_file = os.path.join(self.temp_dir.name, "bgm.mp3")
+        subprocess.run(
+            [
+                find_ffmpeg(), "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", "sine=frequency=220:duration=1",
+                "-c:a", "libmp3lame", bgm_file,
+            ],
+            check=True,
+        )
+        output = os.path.join(self.temp_dir.name, "mixed-audio.m4a")
+        duration = audio.mix_audio_track(voice_file, output, bgm_file, bgm_volume=0.3)
+        self.assertIsNotNone(duration)
+        # 背景音乐循环填满，但时长以配音为准
+        self.assertAlmostEqual(duration, 5.0, delta=0.15)
+        self.assertEqual(audio.mux_codec_args(output), ["-c:a", "copy"])
+
+    @unittest.skipIf(not find_ffmpeg(), "ffmpeg not found")
+    def test_postprocess_audio_rate_in_place(self):
+        path = self._make_tone(4)
+        duration = audio.postprocess_audio(path, rate=2.0, volume=0.8, loudnorm=False)
+        self.assertIsNotNone(duration)
+        self.assertAlmostEqual(duration, 2.0, delta=0.15)
+        self.assertAlmostEqual(
+            media_probe.probe(path, use_cache=False).duration, duration, delta=0.15
+        )
+        self.assertFalse(
+            any(".processing" in name for name in os.listdir(self.temp_dir.name))
+        )
+
+    @unittest.skipIf(not find_ffmpeg(), "ffmpeg not found")
+    def test_postprocess_audio_loudnorm_to_new_file(self):
+        path = self._make_tone(2)
+        output = os.path.join(self.temp_dir.name, "out.m4a")
+        duration = audio.postprocess_audio(path, output, loudnorm=True)
+        self.assertTrue(os.path.exists(output))
+        self.assertAlmostEqual(duration, 2.0, delta=0.15)
+
+
+if __name__ == "__main__":
+    unittest.main()
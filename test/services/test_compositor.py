@@ -0,0 +1,64 @@
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from moviepy import ColorClip, CompositeVideoClip
+
+from app.services.utils.compositor import IndexedCompositeVideoClip
+
+
+def _layers():
+    background = ColorClip((64, 48), color=(20, 40, 60), duration=10)
+    layers = [
+        ColorClip((10, 10), color=(255, 255, 255))
+        .with_start(i * 0.3)
+        .with_duration(1)
+        .with_position(((i * 7) % 60 - 5, (i * 11) % 45))
+        for i in range(30)
+    ]
+    # 半透明、超出画面、没有结束时间的叠加层
+    layers.append(ColorClip((30, 30), color=(255, 0, 0), duration=10).with_opacity(0.5).with_position(("center", "center")))
+    layers.append(ColorClip((20, 20), color=(0, 255, 0)).with_position((50, 40)))
+    return background, layers
+
+
+class TestCompositor(unittest.TestCase):
+    def test_playing_clips(self):
+        _, layers = _layers()
+        composite = IndexedCompositeVideoClip(layers, size=(64, 48))
+        for t in (0, 0.29, 0.3, 1.0, 4.5, 8.95, 20):
+            self.assertEqual(
+                composite.playing_clips(t),
+                [clip for clip in composite.clips if clip.is_playing(t)],
+            )
+
+    def test_same_frames_as_moviepy(self):
+        background, layers = _layers()
+        for clips, size in (([background, *layers], None), (layers, (64, 48))):
+            expected = CompositeVideoClip(clips, size=size)
+            composite = IndexedCompositeVideoClip(clips, size=size)
+            for t in (0.1, 2.05, 5.0, 9.5):
+                diff = np.abs(
+                    composite.get_frame(t).astype(int) - expected.get_frame(t).astype(int)
+                )
+                self.assertLessEqual(diff.max(), 1)
+                self.assertTrue(
+                    np.allclose(composite.mask.get_frame(t), expected.mask.get_frame(t), atol=1e-6)
+                )
+
+    def test_reuses_frame_buffers(self):
+        background, layers = _layers()
+        composite = IndexedCompositeVideoClip([background, *layers])
+        first = composite.get_frame(0.1)
+        self.assertEqual(first.dtype, np.uint8)
+        self.assertIs(composite.get_frame(2.05), first)
+        self.assertIs(composite.mask.get_frame(5.0), composite.mask.get_frame(9.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
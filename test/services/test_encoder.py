@@ -0,0 +1,127 @@
+import errno
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.config import config
+from app.services import encoder
+from app.utils import utils
+
+
+class TestEncoder(unittest.TestCase):
+    def test_resolve_profile(self):
+        self.assertEqual(encoder.resolve_profile("archive"), "archive")
+        self.assertIn(encoder.resolve_profile(None), encoder.PROFILES)
+        self.assertIn(encoder.resolve_profile("unknown"), encoder.PROFILES)
+
+    def test_intermediate_is_lossless_cpu(self):
+        codec, params = encoder.get_encoder(encoder.INTERMEDIATE_PROFILE)
+        self.assertEqual(codec, "libx264")
+        self.assertEqual(params[params.index("-qp") + 1], "0")
+
+    def test_intermediate_codec_config(self):
+        original = config.app.get("intermediate_codec")
+        try:
+            config.app["intermediate_codec"] = "intra"
+            _, params = encoder.get_encoder(encoder.INTERMEDIATE_PROFILE)
+            self.assertEqual(params[params.index("-g") + 1], "1")
+        finally:
+            if original is None:
+                config.app.pop("intermediate_codec", None)
+            else:
+                config.app["intermediate_codec"] = original
+
+    def test_moviepy_args(self):
+        args = encoder.moviepy_args("draft", allow_hardware=False)
+        self.assertEqual(args["codec"], "libx264")
+        self.assertEqual(args["preset"], "ultrafast")
+        self.assertNotIn("-preset", args["ffmpeg_params"])
+
+    def test_hardware_profiles(self):
+        gpu = ("h264_nvenc", ["-preset", "p4", "-b:v", "5M"])
+        with mock.patch.dict(config.app, {"hardware_encoder": True}), mock.patch(
+            "app.services.video.detect_gpu_encoder", return_value=gpu
+        ):
+            draft = encoder.moviepy_args("draft")
+            balanced = encoder.moviepy_args("balanced")
+            archive_codec, _ = encoder.get_encoder("archive")
+        self.assertEqual(draft["codec"], "h264_nvenc")
+        self.assertEqual(draft["preset"], "p1")
+        self.assertEqual(balanced["preset"], "p4")
+        self.assertNotEqual(draft["ffmpeg_params"], balanced["ffmpeg_params"])
+        self.assertEqual(archive_codec, "libx265")
+
+        # VideoToolbox 没有 preset，按 profile 调整码率和 realtime
+        gpu = ("h264_videotoolbox", ["-allow_sw", "1", "-b:v", "5M"])
+        with mock.patch.dict(config.app, {"hardware_encoder": True}), mock.patch(
+            "app.services.video.detect_gpu_encoder", return_value=gpu
+        ):
+            args = encoder.moviepy_args("draft")
+        self.assertIn("-realtime", args["ffmpeg_params"])
+        self.assertNotIn("-preset", args["ffmpeg_params"])
+
+    def test_ffmpeg_args(self):
+        args = encoder.ffmpeg_args("archive")
+        self.assertEqual(args[:2], ["-c:v", "libx265"])
+
+    def test_intermediate_size_selects_temp_dir(self):
+        with mock.patch.dict(config.app, {"intermediate_codec": "lossless"}):
+            lossless = encoder.estimate_intermediate_mb(1080, 1920, 30, 60)
+        with mock.patch.dict(config.app, {"intermediate_codec": "lossy"}):
+            lossy = encoder.estimate_intermediate_mb(1080, 1920, 30, 60)
+        self.assertGreater(lossless, 1000)
+        self.assertLess(lossy, lossless)
+
+        # /dev/shm 剩余 3GB：最低保留 2GB 之外放得下的中间文件才使用内存文件系统
+        free = SimpleNamespace(f_bavail=3 * 1024, f_frsize=1024 * 1024)
+        with mock.patch.dict(config.app, {"temp_dir": "", "tmpfs_min_free_mb": 2048}), mock.patch.object(
+            utils.os, "statvfs", return_value=free
+        ), mock.patch.object(utils.os, "access", return_value=True), mock.patch.object(
+            utils.os.path, "isdir", return_value=True
+        ), mock.patch.object(utils.os, "makedirs"):
+            self.assertTrue(utils.temp_dir("x", size_hint_mb=500).startswith("/dev/shm"))
+            self.assertFalse(utils.temp_dir("x", size_hint_mb=lossless).startswith("/dev/shm"))
+            self.assertFalse(utils.temp_dir("x", on_disk=True).startswith("/dev/shm"))
+
+        self.assertTrue(utils.is_no_space_error(OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))))
+        self.assertTrue(utils.is_no_space_error(IOError("ffmpeg error: No space left on device")))
+        self.assertFalse(utils.is_no_space_error(OSError(errno.ENOENT, "missing")))
+
+    def test_run_in_temp_dir_retries_on_disk(self):
+        work_dirs = []
+
+        def _stage(work_dir):
+            work_dirs.append(work_dir)
+            if len(work_dirs) == 1:
+                utils.raise_for_no_space("Error writing trailer: No space left on device")
+            return "done"
+
+        def _temp_dir(sub_dir, size_hint_mb=0, on_disk=False):
+            d = os.path.join(temp_root, "disk" if on_disk else "shm", sub_dir)
+            os.makedirs(d, exist_ok=True)
+            return d
+
+        # 内存文件系统空间不足时改用磁盘上的目录重新执行整个阶段，结束后两个目录都被删除
+        with tempfile.TemporaryDirectory() as temp_root, mock.patch.object(
+            utils, "temp_dir", side_effect=_temp_dir
+        ):
+            self.assertEqual(utils.run_in_temp_dir("stage", _stage), "done")
+            self.assertEqual(
+                [os.path.basename(os.path.dirname(d)) for d in work_dirs], ["shm", "disk"]
+            )
+            self.assertFalse(any(os.path.exists(d) for d in work_dirs))
+
+            with self.assertRaises(ValueError):
+                utils.run_in_temp_dir("stage", mock.Mock(side_effect=ValueError("failed")))
+            self.assertFalse(os.path.exists(os.path.join(temp_root, "shm", "stage")))
+
+
+if __name__ == "__main__":
+    unittest.main()
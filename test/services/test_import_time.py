@@ -0,0 +1,65 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+
+# 只在使用时才导入的依赖，导入服务模块时不应被加载
+HEAVY_MODULES = ["faster_whisper", "g4f", "openai", "edge_tts", "moviepy", "redis"]
+
+# 导入 app.services.task 的耗时上限（秒），延迟导入之前约 1.8 秒
+IMPORT_BUDGET_SECONDS = 1.0
+
+
+def _import_times(module: str) -> dict:
+    """
+    用 python -X importtime 导入模块，返回 {模块名: 累计耗时（秒）}
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1_000_000
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_heavy_modules_not_imported(self):
+        for module in ["app.services.task", "app.asgi"]:
+            times = _import_times(module)
+            self.assertIn(module, times)
+            for heavy in HEAVY_MODULES:
+                self.assertNotIn(heavy, times, f"{module} imports {heavy}")
+
+    def test_import_budget(self):
+        # 取多次中最快的一次，减少磁盘缓存和机器负载的影响
+        elapsed = min(_import_times("app.services.task")["app.services.task"] for _ in range(3))
+        self.assertLess(elapsed, IMPORT_BUDGET_SECONDS)
+
+    def test_lazy_import(self):
+        code = (
+            "import sys\n"
+            "from app.utils import utils\n"
+            "module = utils.lazy_import('colorsys')\n"
+            "assert 'colorsys' not in sys.modules\n"
+            "assert module.rgb_to_hsv(1, 0, 0) == (0, 1, 1)\n"
+            "assert 'colorsys' in sys.modules\n"
+            "assert utils.lazy_import('colorsys') is sys.modules['colorsys']\n"
+        )
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, check=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,296 @@
+import threading
+import time
+import unittest
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import requests
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.config import config
+from app.services import llm
+
+
+class TestLlmService(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.patches = [
+            mock.patch.object(llm, "_request_response", self._fake_request),
+            mock.patch.object(llm, "_response_cache", llm.OrderedDict()),
+            mock.patch.object(llm, "_inflight", {}),
+            mock.patch.dict(config.app, {"llm_cache_ttl": 600, "llm_cache_max_entries": 2}),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def _fake_request(self, prompt, json_mode=False):
+        self.calls.append(prompt)
+        # 放大并发请求的重叠窗口
+        time.sleep(0.05)
+        if prompt == "fail":
+            return "Error: failed"
+        return f"response {len(self.calls)}"
+
+    def test_cache(self):
+        self.assertEqual(llm._generate_response("a"), "response 1")
+        self.assertEqual(llm._generate_response("a"), "response 1")
+        # 重试时跳过缓存，新结果覆盖缓存
+        self.assertEqual(llm._generate_response("a", use_cache=False), "response 2")
+        self.assertEqual(llm._generate_response("a"), "response 2")
+
+        # 失败的结果不缓存
+        llm._generate_response("fail")
+        llm._generate_response("fail")
+        self.assertEqual(self.calls.count("fail"), 2)
+
+        # 超出条数上限时淘汰最久未使用的
+        llm._generate_response("b")
+        llm._generate_response("c")
+        self.assertEqual(len(llm._response_cache), 2)
+        llm._generate_response("a")
+        self.assertEqual(self.calls.count("a"), 3)
+
+        # 过期后重新请求
+        with mock.patch.object(llm.time, "monotonic", return_value=time.monotonic() + 601):
+            llm._generate_response("c")
+        self.assertEqual(self.calls.count("c"), 2)
+
+        # 不同的模型不共用缓存
+        with mock.patch.dict(config.app, {"llm_provider": "openai", "openai_model_name": "other"}):
+            llm._generate_response("c")
+        self.assertEqual(self.calls.count("c"), 3)
+
+    def test_coalesce_inflight_requests(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(llm._generate_response("same")))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.calls, ["same"])
+        self.assertEqual(results, ["response 1"] * 5)
+
+    def test_cache_disabled(self):
+        with mock.patch.dict(config.app, {"llm_cache_ttl": 0}):
+            llm._generate_response("a")
+            llm._generate_response("a")
+        self.assertEqual(self.calls, ["a", "a"])
+
+    def test_cache_opt_in(self):
+        # 默认不缓存
+        with mock.patch.dict(config.app):
+            config.app.pop("llm_cache_ttl")
+            llm._generate_response("a")
+            llm._generate_response("a")
+        self.assertEqual(self.calls, ["a", "a"])
+
+        # 用户主动重新生成时不使用缓存的文案
+        self.assertEqual(llm.generate_script("subject"), "response 3")
+        self.assertEqual(llm.generate_script("subject"), "response 3")
+        self.assertEqual(llm.generate_script("subject", use_cache=False), "response 4")
+
+    def test_generate_script_and_terms(self):
+        responses = {
+            "valid": '{"script": "第一段**文案**。\\n\\n第二段。", "search_terms": ["a b", " c ", 1, "d"]}',
+            "invalid": '{"script": "只有文案"}',
+        }
+        response = "valid"
+
+        def fake_request(prompt, json_mode=False):
+            self.calls.append(json_mode)
+            return responses[response]
+
+        with mock.patch.object(llm, "_request_response", fake_request), mock.patch.dict(
+            config.app, {"llm_provider": "deepseek"}
+        ):
+            self.assertEqual(
+                llm.generate_script_and_terms("subject", amount=2),
+                ("第一段文案。\n\n第二段。", ["a b", "c"]),
+            )
+            self.assertEqual(self.calls, [True])
+
+            # 返回内容缺少字段时不重试，由调用方回退
+            response = "invalid"
+            self.assertIsNone(llm.generate_script_and_terms("other subject"))
+            self.assertEqual(self.calls, [True, True])
+
+        # 不支持 JSON 输出的提供商不发送请求
+        with mock.patch.dict(config.app, {"llm_provider": "g4f"}):
+            self.assertIsNone(llm.generate_script_and_terms("subject"))
+        self.assertEqual(len(self.calls), 2)
+        self.assertTrue(llm.supports_json_mode("gemini"))
+        self.assertFalse(llm.supports_json_mode("ernie"))
+
+
+
+class _FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class _FakeSession:
+    instances = 0
+
+    def __init__(self):
+        _FakeSession.instances += 1
+        self.token_requests = 0
+        self.failures = 0
+
+    def post(self, url, params=None, **kwargs):
+        if "oauth" in url:
+            self.token_requests += 1
+            return _FakeResponse({"access_token": f"token-{self.token_requests}", "expires_in": 3600})
+        if self.failures:
+            self.failures -= 1
+            raise requests.ConnectionError("connection reset")
+        return _FakeResponse({"result": f"answer with {params['access_token']}"})
+
+
+class TestLlmProviders(unittest.TestCase):
+    def setUp(self):
+        _FakeSession.instances = 0
+        self.patches = [
+            mock.patch.object(llm, "_clients", {}),
+            mock.patch.object(llm, "_ernie_tokens", {}),
+            mock.patch.object(llm.requests, "Session", _FakeSession),
+            mock.patch.object(llm.time, "sleep"),
+            mock.patch.dict(
+                config.app,
+                {
+                    "llm_provider": "ernie",
+                    "ernie_api_key": "key",
+                    "ernie_secret_key": "secret",
+                    "ernie_base_url": "https://ernie.example.com/chat",
+                    "llm_max_retries": 2,
+                },
+            ),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_reuse_session_and_token(self):
+        self.assertEqual(llm.complete("hi"), "answer with token-1")
+        self.assertEqual(llm.complete("hi"), "answer with token-1")
+        session = next(iter(llm._clients.values()))
+        self.assertEqual(_FakeSession.instances, 1)
+        self.assertEqual(session.token_requests, 1)
+
+        # token 过期时重新获取
+        with mock.patch.dict(llm._ernie_tokens, {("key", "secret"): ("token-1", time.time() - 1)}):
+            self.assertEqual(llm.complete("hi"), "answer with token-2")
+
+    def test_retry_with_backoff(self):
+        llm.complete("warm up")
+        session = next(iter(llm._clients.values()))
+
+        session.failures = 2
+        self.assertEqual(llm.complete("hi"), "answer with token-1")
+        self.assertEqual(llm.time.sleep.call_count, 2)
+        delays = [call.args[0] for call in llm.time.sleep.call_args_list]
+        # 指数退避：第二次等待不短于第一次
+        self.assertLessEqual(delays[0], delays[1])
+
+        # 超过重试次数后抛出
+        session.failures = 3
+        with self.assertRaises(requests.ConnectionError):
+            llm.complete("hi")
+        session.failures = 3
+        self.assertTrue(llm._request_response("hi").startswith("Error: "))
+
+    def test_openai_client_reused(self):
+        created = []
+
+        requests_kwargs = []
+
+        def create(**kwargs):
+            requests_kwargs.append(kwargs)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content="ok\n"))]
+            )
+
+        class FakeOpenAI:
+            def __init__(self, **kwargs):
+                created.append(kwargs)
+                self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+        settings = {"llm_provider": "deepseek", "deepseek_api_key": "k", "deepseek_model_name": "m"}
+        with mock.patch.dict(config.app, settings), mock.patch.object(
+            llm.openai, "OpenAI", FakeOpenAI
+        ), mock.patch.object(llm.openai.types.chat, "ChatCompletion", SimpleNamespace):
+            # 换行原样返回，由 generate_script 统一分段
+            self.assertEqual(llm.complete("a"), "ok\n")
+            self.assertEqual(llm.complete("b"), "ok\n")
+            self.assertEqual(llm.complete("c", json_mode=True), "ok\n")
+        self.assertEqual(len(created), 1)
+        self.assertNotIn("response_format", requests_kwargs[0])
+        self.assertEqual(requests_kwargs[2]["response_format"], {"type": "json_object"})
+        self.assertEqual(created[0]["max_retries"], 0)
+
+        # 配置错误不重试
+        with mock.patch.dict(config.app, {"llm_provider": "deepseek", "deepseek_api_key": ""}):
+            with self.assertRaises(ValueError):
+                llm.complete("a")
+        llm.time.sleep.assert_not_called()
+
+    def test_generate_script_stream(self):
+        attempts = []
+
+        def fake_stream(**kwargs):
+            self.assertTrue(kwargs["stream"])
+            attempts.append(kwargs)
+            if len(attempts) == 1:
+                # 第一块内容之前的网络错误会重试
+                raise requests.ConnectionError("connection reset")
+            for content in ["第一段", "文案**。\n", "\n第二", "段文案。\n\n第三段", None]:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+        class FakeOpenAI:
+            def __init__(self, **kwargs):
+                self.chat = SimpleNamespace(
+                    completions=SimpleNamespace(create=lambda **kw: fake_stream(**kw))
+                )
+
+        settings = {"llm_provider": "deepseek", "deepseek_api_key": "k", "deepseek_model_name": "m"}
+        with mock.patch.dict(config.app, settings), mock.patch.object(llm.openai, "OpenAI", FakeOpenAI):
+            paragraphs = llm.generate_script_stream("subject")
+            self.assertEqual(next(paragraphs), "第一段文案。")
+            self.assertEqual(list(paragraphs), ["第二段文案。", "第三段"])
+        self.assertEqual(len(attempts), 2)
+
+        # 不支持流式返回的提供商一次性产出完整内容
+        self.assertEqual(list(llm.generate_script_stream("subject")), ["answer with token-1"])
+
+    def test_script_paragraphs_match_stream(self):
+        response = "第一段**文案。\n\n第二段\n第三段\n"
+
+        def fake_stream(prompt):
+            yield from [response[:5], response[5:]]
+
+        with mock.patch.object(llm, "_request_response", return_value=response), mock.patch.object(
+            llm, "complete_stream", fake_stream
+        ):
+            script = llm.generate_script("subject", use_cache=False)
+            self.assertEqual(script, "第一段文案。\n\n第二段\n\n第三段")
+            self.assertEqual("\n\n".join(llm.generate_script_stream("subject")), script)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import media_probe
+
+resources_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "resources")
+
+probe_output = {
+    "streams": [
+        {
+            "codec_type": "video",
+            "codec_name": "h264",
+            "width": 1080,
+            "height": 1920,
+            "pix_fmt": "yuv420p",
+            "sample_aspect_ratio": "1:1",
+            "profile": "High",
+            "level": 40,
+            "avg_frame_rate": "30000/1001",
+            "r_frame_rate": "30000/1001",
+        },
+        {
+            "codec_type": "audio",
+            "codec_name": "aac",
+            "channels": 2,
+            "channel_layout": "stereo",
+            "sample_rate": "44100",
+        },
+    ],
+    "format": {"format_name": "mov,mp4,m4a,3gp,3g2,mj2", "duration": "12.345"},
+}
+
+
+class TestMediaProbe(unittest.TestCase):
+    def test_parse_probe_output(self):
+        info = media_probe.parse_probe_output("a.mp4", json.dumps(probe_output))
+        self.assertEqual(info.video_codec, "h264")
+        self.assertEqual((info.width, info.height), (1080, 1920))
+        self.assertAlmostEqual(info.fps, 29.97, places=2)
+        self.assertEqual(info.pix_fmt, "yuv420p")
+        self.assertEqual((info.sar, info.profile, info.level), ("1:1", "High", 40))
+        self.assertEqual(info.channel_layout, "stereo")
+        self.assertEqual(info.sample_rate, 44100)
+        self.assertAlmostEqual(info.duration, 12.345)
+        self.assertTrue(info.has_video)
+        self.assertTrue(info.has_audio)
+
+    def test_parse_audio_only(self):
+        output = {
+            "streams": [{"codec_type": "audio", "codec_name": "mp3", "channels": 1}],
+            "format": {"duration": "3.5"},
+        }
+        info = media_probe.parse_probe_output("a.mp3", json.dumps(output))
+        self.assertFalse(info.has_video)
+        self.assertEqual(info.audio_codec, "mp3")
+        self.assertAlmostEqual(info.duration, 3.5)
+
+    def test_probe_video(self):
+        video_file = os.path.join(resources_dir, "1.png.mp4")
+        info = media_probe.probe(video_file)
+        self.assertIsNotNone(info)
+        self.assertTrue(info.has_video)
+        self.assertGreater(info.width, 0)
+        self.assertGreater(info.duration, 0)
+
+    def test_probe_missing_file(self):
+        self.assertIsNone(media_probe.probe(os.path.join(resources_dir, "missing.mp4")))
+
+    def test_save_cache_merges_and_batches(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_file = os.path.join(temp_dir, "media_probe.json")
+            # 其他进程已写入的条目
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump({"other.mp4": {"size": 1, "mtime": 1, "info": {}}}, f)
+
+            with mock.patch.object(media_probe, "_cache_file", return_value=cache_file), mock.patch.multiple(
+                media_probe, _cache={"a.mp4": {"size": 2, "mtime": 2, "info": {}}}, _dirty=True, _last_save=0.0
+            ):
+                media_probe._save_cache()
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    self.assertEqual(set(json.load(f)), {"a.mp4", "other.mp4"})
+                self.assertIn("other.mp4", media_probe._cache)
+                self.assertEqual(os.listdir(temp_dir), ["media_probe.json"])
+
+                # 间隔内的新条目先不写入，force 时写入
+                media_probe._cache["b.mp4"] = {"size": 3, "mtime": 3, "info": {}}
+                media_probe._dirty = True
+                media_probe._save_cache()
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    self.assertNotIn("b.mp4", json.load(f))
+                media_probe._save_cache(force=True)
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    self.assertIn("b.mp4", json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+
+from moviepy import ColorClip
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import encoder, media_probe, streaming
+from app.utils import utils
+
+
+class TestStreaming(unittest.TestCase):
+    def test_write_clip(self):
+        output_file = os.path.join(utils.temp_dir("test"), "streaming.mp4")
+        clip = ColorClip(size=(320, 240), color=(255, 0, 0)).with_duration(1)
+        ok = streaming.write_clip(
+            clip,
+            output_file,
+            fps=10,
+            video_args=encoder.ffmpeg_args("draft", allow_hardware=False),
+        )
+        self.assertTrue(ok)
+        info = media_probe.probe(output_file, use_cache=False)
+        self.assertEqual((info.width, info.height), (320, 240))
+        self.assertAlmostEqual(info.duration, 1, delta=0.2)
+        os.remove(output_file)
+
+    def test_sink_error(self):
+        output_file = os.path.join(utils.temp_dir("test"), "streaming.mp4")
+        sink = streaming.FrameSink(
+            output_file, (320, 240), 10, ["-c:v", "no_such_encoder"]
+        )
+        frame = ColorClip(size=(320, 240), color=(0, 0, 0)).get_frame(0)
+        with self.assertRaises(RuntimeError):
+            for _ in range(1000):
+                sink.write(frame.astype("uint8"))
+        self.assertFalse(sink.close())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import subtitle
+from app.utils import utils
+
+
+class TestSubtitleService(unittest.TestCase):
+    def test_align_words_chinese(self):
+        script_lines = ["今天天气很好", "我们去公园", "一起玩吧"]
+        words = [
+            ("今天", 0.0, 0.5), ("天气", 0.5, 1.0), ("很好", 1.0, 1.5),
+            ("我们", 2.0, 2.4), ("去", 2.4, 2.6), ("公园", 2.6, 3.0),
+            ("一起", 3.5, 4.0), ("玩", 4.0, 4.2), ("吧", 4.2, 4.5),
+        ]
+        self.assertEqual(
+            subtitle.align_words(script_lines, words),
+            [(0.0, 1.5), (2.0, 3.0), (3.5, 4.5)],
+        )
+
+    def test_align_words_with_recognition_errors(self):
+        # 数字读法不同、标点和大小写差异不影响对齐
+        script_lines = ["Hello world", "I have 2 apples", "Goodbye now"]
+        words = [
+            (" Hello", 0.0, 0.4), (" world.", 0.4, 0.9),
+            (" I", 1.0, 1.1), (" have", 1.1, 1.3), (" two", 1.3, 1.5), (" apples.", 1.5, 2.0),
+            (" goodbye", 2.2, 2.6), (" now", 2.6, 3.0),
+        ]
+        self.assertEqual(
+            subtitle.align_words(script_lines, words),
+            [(0.0, 0.9), (1.0, 2.0), (2.2, 3.0)],
+        )
+
+    def test_align_words_interpolates_unmatched_lines(self):
+        timings = subtitle.align_words(
+            ["hello", "xyz", "qqq", "bye"], [(" hello", 0.0, 1.0), (" bye", 3.0, 4.0)]
+        )
+        self.assertEqual(timings, [(0.0, 1.0), (1.0, 2.0), (2.0, 3.0), (3.0, 4.0)])
+
+    def test_levenshtein_distance(self):
+        self.assertEqual(subtitle.levenshtein_distance("kitten", "sitting"), 3)
+        self.assertEqual(subtitle.levenshtein_distance("", "abc"), 3)
+        self.assertEqual(subtitle.levenshtein_distance("今天天气很好", "今天天汽很好"), 1)
+        self.assertEqual(subtitle.levenshtein_distance("a" * 200, "a" * 200), 0)
+        # 超过上限时提前结束
+        self.assertEqual(subtitle.levenshtein_distance("kitten", "sitting", max_distance=1), 2)
+        self.assertEqual(subtitle.levenshtein_distance("abc", "abcdefgh", max_distance=3), 4)
+        self.assertEqual(subtitle.similarity("abcde", "xyzuv", threshold=0.8), 0.0)
+        self.assertAlmostEqual(subtitle.similarity("abcde", "abcdx", threshold=0.8), 0.8)
+
+    def test_correct(self):
+        script = "今天天气很好。我们去公园玩吧，那里有很多花。一起出发！"
+        recognized = [
+            ("今天天气很好", 0.0, 1.0),
+            ("我们去公", 1.0, 1.5),
+            ("园玩吧", 1.5, 2.0),
+            ("那里有很多化", 2.0, 3.0),
+            ("噪音", 3.0, 3.2),
+            ("一起出发", 3.2, 4.0),
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            subtitle_file = os.path.join(temp_dir, "subtitle.srt")
+            with open(subtitle_file, "w", encoding="utf-8") as f:
+                f.write(
+                    "\n".join(
+                        utils.text_to_srt(i + 1, text, start, end)
+                        for i, (text, start, end) in enumerate(recognized)
+                    )
+                    + "\n"
+                )
+            subtitle.correct(subtitle_file, script)
+            self.assertEqual(
+                [(item[1], item[2]) for item in subtitle.file_to_subtitles(subtitle_file)],
+                [
+                    ("00:00:00,000 --> 00:00:01,000", "今天天气很好"),
+                    ("00:00:01,000 --> 00:00:02,000", "我们去公园玩吧"),
+                    ("00:00:02,000 --> 00:00:03,000", "那里有很多花"),
+                    ("00:00:03,200 --> 00:00:04,000", "一起出发"),
+                ],
+            )
+
+    def test_align_with_locale(self):
+        languages = []
+
+        def fake_transcribe(audio_file, beam_size=None, language=None):
+            languages.append(language)
+            words = [SimpleNamespace(word="今天天气很好", start=0.0, end=1.0)]
+            return [SimpleNamespace(words=words)], None
+
+        with tempfile.TemporaryDirectory() as temp_dir, mock.patch.object(
+            subtitle.whisper_engine, "transcribe", fake_transcribe
+        ):
+            subtitle_file = os.path.join(temp_dir, "subtitle.srt")
+            # 界面的语言区域转换为 whisper 的语言代码，不支持的语言自动检测
+            for language in ["zh-CN", "en-US", "xx-YY", None]:
+                self.assertEqual(
+                    subtitle.align("audio.mp3", "今天天气很好。", subtitle_file, language=language),
+                    subtitle_file,
+                )
+        self.assertEqual(languages, ["zh", "en", None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
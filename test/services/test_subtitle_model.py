@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import subtitle_model
+
+SRT_CONTENT = """1
+00:00:00,000 --> 00:00:01,500
+今天天气很好
+
+2
+00:00:01,500 --> 00:00:03,000
+第一行
+第二行
+
+3
+00:00:02,500 --> 00:00:04,250
+重叠的字幕
+"""
+
+
+class TestSubtitleModel(unittest.TestCase):
+    def test_parse_and_lookup(self):
+        track = subtitle_model.parse(SRT_CONTENT)
+        self.assertEqual(len(track), 3)
+        self.assertEqual(track.starts.tolist(), [0, 1500, 2500])
+        self.assertEqual(track.ends.tolist(), [1500, 3000, 4250])
+        self.assertEqual(track.texts[1], "第一行\n第二行")
+        self.assertAlmostEqual(track.duration, 4.25)
+        self.assertEqual(track.items()[0], ((0.0, 1.5), "今天天气很好"))
+
+        self.assertEqual(track.active(0), [0])
+        # 结束时间不包含在内
+        self.assertEqual(track.active(1.5), [1])
+        self.assertEqual(track.active(2.7), [1, 2])
+        self.assertEqual(track.active(4.25), [])
+        self.assertEqual(track.text_at(3.5), "重叠的字幕")
+        self.assertEqual(track.index_at(-1), -1)
+
+    def test_serializers(self):
+        track = subtitle_model.parse(SRT_CONTENT)
+        self.assertEqual(subtitle_model.parse(track.to_srt()).items(), track.items())
+        self.assertTrue(track.to_srt().endswith("重叠的字幕\n\n"))
+
+        vtt = track.to_vtt()
+        self.assertTrue(vtt.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:01.500\n"))
+        self.assertEqual(subtitle_model.parse(vtt).items(), track.items())
+
+        ass = track.to_ass(font_name="Charm", color="#FFCC00", play_res=(720, 1280))
+        self.assertIn("Style: Default,Charm,48,&H0000CCFF,", ass)
+        self.assertIn("PlayResY: 1280", ass)
+        self.assertIn("Dialogue: 0,0:00:01.50,0:00:03.00,Default,,0,0,0,,第一行\\N第二行", ass)
+
+    def test_load_cached_by_content(self):
+        subtitle_model.clear_cache()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            first = os.path.join(temp_dir, "a.srt")
+            second = os.path.join(temp_dir, "b.srt")
+            for file in (first, second):
+                with open(file, "w", encoding="utf-8") as f:
+                    f.write(SRT_CONTENT)
+            track = subtitle_model.load(first)
+            # 内容相同的文件共用同一个解析结果
+            self.assertIs(subtitle_model.load(second), track)
+
+            subtitle_model.SubtitleTrack.from_items(track.items()[:1]).write(second)
+            self.assertEqual(len(subtitle_model.load(second)), 1)
+
+        self.assertFalse(subtitle_model.load(os.path.join(temp_dir, "missing.srt")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,19 @@
 import unittest
+import json
 import os
+import shutil
 import sys
 from pathlib import Path
+from unittest import mock
 
 # add project root to python path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+from app.config import config
+from app.models import const
 from app.services import task as tm
 from app.models.schema import MaterialInfo, VideoParams
+from app.utils import utils
 
 resources_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "resources")
 
@@ -60,7 +66,190 @@ class TestTaskService(unittest.TestCase):
         )
         result = tm.start(task_id=task_id, params=params)
         print(result)
-    
+
+    def test_changed_params(self):
+        params = VideoParams(video_subject="title", font_size=60, bgm_volume=0.2)
+        old_params = json.loads(utils.to_json(params))
+        self.assertEqual(tm.changed_params(old_params, params), set())
+
+        params.font_size = 72
+        params.bgm_volume = 0.5
+        self.assertEqual(tm.changed_params(old_params, params), {"font_size", "bgm_volume"})
+
+        # 旧版本保存的参数缺少新增的键：仍为默认值时不算变化
+        del old_params["preview"], old_params["encoder_profile"]
+        self.assertEqual(tm.changed_params(old_params, params), {"font_size", "bgm_volume"})
+        params.preview = True
+        self.assertIn("preview", tm.changed_params(old_params, params))
+
+    def test_edit(self):
+        """edit reuses combined video / audio / subtitle, re-composes overlay changes and remuxes audio-only changes"""
+        import subprocess
+
+        from app.services import state as sm
+        from app.services.video_fast import find_ffmpeg
+
+        ffmpeg_path = find_ffmpeg()
+        if not ffmpeg_path:
+            self.skipTest("ffmpeg not found")
+
+        task_id = "00000000-0000-0000-0000-00000000edit"
+        task_dir = utils.task_dir(task_id)
+        try:
+            subprocess.run(
+                [
+                    ffmpeg_path, "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "testsrc2=size=1080x1920:rate=30:duration=1",
+                    "-pix_fmt", "yuv420p", os.path.join(task_dir, "combined-1.mp4"),
+                ],
+                check=True,
+            )
+            subprocess.run(
+                [
+                    ffmpeg_path, "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "sine=frequency=440:duration=1",
+                    os.path.join(task_dir, "audio.mp3"),
+                ],
+                check=True,
+            )
+            with open(os.path.join(task_dir, "subtitle.srt"), "w", encoding="utf-8") as f:
+                f.write("1\n00:00:00,000 --> 00:00:01,000\nhello\n\n")
+
+            params = VideoParams(
+                video_subject="title", font_name="Charm-Regular.ttf", bgm_type=""
+            )
+            tm.save_script_data(task_id, "hello", [], params)
+
+            # 只修改字幕样式：重新叠加
+            params.font_size = 72
+            result = tm.edit(task_id, params)
+            final_video = os.path.join(task_dir, "final-1.mp4")
+            self.assertEqual(result["videos"], [final_video])
+            self.assertTrue(os.path.isfile(final_video))
+            self.assertEqual(tm.load_script_data(task_id)["params"]["font_size"], 72)
+
+            # 只修改音量：画面直接复制
+            mtime = os.path.getmtime(final_video)
+            params.voice_volume = 0.5
+            result = tm.edit(task_id, params)
+            self.assertEqual(result["videos"], [final_video])
+            self.assertGreaterEqual(os.path.getmtime(final_video), mtime)
+
+            # 修改文案相关参数需要重新生成
+            params.voice_name = "en-US-JennyNeural-Female"
+            self.assertIsNone(tm.edit(task_id, params))
+            self.assertEqual(sm.state.get_task(task_id)["state"], const.TASK_STATE_FAILED)
+        finally:
+            shutil.rmtree(task_dir, ignore_errors=True)
+            sm.state.delete_task(task_id)
+
+    def test_final_videos_without_combined(self):
+        """不保留拼接视频时 combined_videos 为空，临时目录渲染完即删除"""
+        task_id = "00000000-0000-0000-0000-0000000temp"
+        params = VideoParams(
+            video_subject="title", video_count=2, enable_fast_mode=False, bgm_type=""
+        )
+        with mock.patch.dict(config.app, {"keep_combined_video": False}), mock.patch.object(
+            tm, "generate_audio_mix", return_value=""
+        ), mock.patch.object(tm.media_probe, "get_duration", return_value=1), mock.patch.object(
+            tm.video, "combine_videos"
+        ) as combine_videos, mock.patch.object(tm.video, "generate_video"):
+            task_dir = utils.task_dir(task_id)
+            try:
+                final_video_paths, combined_video_paths = tm.generate_final_videos(
+                    task_id, params, ["a.mp4"], "audio.mp3", ""
+                )
+            finally:
+                shutil.rmtree(task_dir, ignore_errors=True)
+
+        self.assertEqual(len(final_video_paths), 2)
+        self.assertEqual(combined_video_paths, [])
+        temp_dir = os.path.dirname(combine_videos.call_args.kwargs["combined_video_path"])
+        self.assertNotEqual(temp_dir, task_dir)
+        self.assertFalse(os.path.exists(temp_dir))
+
+    def test_edit_error(self):
+        """没有保留拼接视频的任务不能只重新渲染样式，返回明确的原因"""
+        from app.services import state as sm
+
+        task_id = "00000000-0000-0000-0000-0000000noedit"
+        task_dir = utils.task_dir(task_id)
+        try:
+            params = VideoParams(video_subject="title", subtitle_enabled=False)
+            self.assertIn("script data not found", tm.edit_error(task_id, params))
+
+            tm.save_script_data(task_id, "hello", [], params)
+            with open(os.path.join(task_dir, "audio.mp3"), "wb") as f:
+                f.write(b"audio")
+            params.font_size = 72
+            self.assertIn("keep_combined_video", tm.edit_error(task_id, params))
+            self.assertIsNone(tm.edit(task_id, params))
+            self.assertEqual(sm.state.get_task(task_id)["state"], const.TASK_STATE_FAILED)
+
+            with open(os.path.join(task_dir, "combined-1.mp4"), "wb") as f:
+                f.write(b"video")
+            self.assertEqual(tm.edit_error(task_id, params), "")
+            params.voice_name = "en-US-JennyNeural-Female"
+            self.assertIn("voice_name", tm.edit_error(task_id, params))
+        finally:
+            shutil.rmtree(task_dir, ignore_errors=True)
+            sm.state.delete_task(task_id)
+
+    def test_fast_variants_share_overlay(self):
+        """快速模式生成多个视频：叠加层共用，各视频的素材直接 -c copy 拼接，不走逐片段重新编码"""
+        import subprocess
+
+        from app.services import audio
+        from app.services.video_fast import find_ffmpeg
+
+        ffmpeg_path = find_ffmpeg()
+        if not ffmpeg_path:
+            self.skipTest("ffmpeg not found")
+
+        task_id = "00000000-0000-0000-0000-0000000fast"
+        task_dir = utils.task_dir(task_id)
+        try:
+            materials = []
+            for i, color in enumerate(["red", "blue"]):
+                material = os.path.join(task_dir, f"material-{i}.mp4")
+                subprocess.run(
+                    [
+                        ffmpeg_path, "-y", "-loglevel", "error",
+                        "-f", "lavfi", "-i", f"color=c={color}:size=540x960:rate=25:duration=1",
+                        "-pix_fmt", "yuv420p", material,
+                    ],
+                    check=True,
+                )
+                materials.append(material)
+            audio_file = os.path.join(task_dir, "audio.mp3")
+            subprocess.run(
+                [
+                    ffmpeg_path, "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "sine=frequency=440:duration=3", audio_file,
+                ],
+                check=True,
+            )
+            mixed_audio_file = os.path.join(task_dir, "mixed-audio.m4a")
+            self.assertIsNotNone(audio.mix_audio_track(audio_file, mixed_audio_file))
+
+            params = VideoParams(
+                video_subject="", subtitle_enabled=False, video_count=2, enable_fast_mode=True
+            )
+            with mock.patch.object(tm.video, "combine_videos") as combine_videos:
+                result = tm.generate_variants(
+                    task_id, params, materials, audio_file, "", mixed_audio_file
+                )
+            combine_videos.assert_not_called()
+            self.assertIsNotNone(result)
+            final_video_paths, combined_video_paths = result
+            self.assertEqual(len(final_video_paths), 2)
+            for final_video_path in final_video_paths:
+                self.assertAlmostEqual(
+                    tm.media_probe.get_duration(final_video_path), 3.0, delta=0.3
+                )
+        finally:
+            shutil.rmtree(task_dir, ignore_errors=True)
+
 
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
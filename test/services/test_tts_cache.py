@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from edge_tts import SubMaker
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import tts_cache
+
+
+class TestTtsCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+        os.makedirs(self.cache_dir)
+        patcher = mock.patch.object(tts_cache, "_cache_dir", lambda: self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def _audio_file(self, name: str, size: int) -> str:
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(b"\0" * size)
+        return path
+
+    def test_make_key(self):
+        key = tts_cache.make_key("zh-CN-XiaoxiaoNeural", 1.0, 1.0, "你好， 世界")
+        self.assertEqual(
+            key, tts_cache.make_key("zh-CN-XiaoxiaoNeural", 1.0, 1.0, " 你好，\n世界 ")
+        )
+        self.assertNotEqual(
+            key, tts_cache.make_key("zh-CN-XiaoxiaoNeural", 1.2, 1.0, "你好， 世界")
+        )
+
+    def test_put_get(self):
+        sub_maker = SubMaker()
+        sub_maker.subs = ["你好"]
+        sub_maker.offset = [(0, 5000000)]
+        key = tts_cache.make_key("zh-CN-XiaoxiaoNeural", 1.0, 1.0, "你好")
+        self.assertIsNone(tts_cache.get(key, os.path.join(self.temp_dir.name, "out.mp3")))
+
+        tts_cache.put(key, self._audio_file("in.mp3", 100), sub_maker, 0.6)
+        output_file = os.path.join(self.temp_dir.name, "out.mp3")
+        cached, duration = tts_cache.get(key, output_file)
+        self.assertEqual(cached.subs, ["你好"])
+        self.assertEqual(cached.offset, [(0, 5000000)])
+        self.assertAlmostEqual(duration, 0.6)
+        self.assertEqual(os.path.getsize(output_file), 100)
+
+    def test_evict(self):
+        sub_maker = SubMaker()
+        for i in range(3):
+            key = tts_cache.make_key("voice", 1.0, 1.0, str(i))
+            tts_cache.put(key, self._audio_file(f"{i}.mp3", 400 * 1024), sub_maker, 1)
+            path = os.path.join(self.cache_dir, f"{key}.mp3")
+            os.utime(path, (i, i))
+            os.utime(path.replace(".mp3", ".json"), (i, i))
+
+        tts_cache.evict(max_mb=1)
+        keys = [tts_cache.make_key("voice", 1.0, 1.0, str(i)) for i in range(3)]
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, f"{keys[0]}.mp3")))
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir, f"{keys[2]}.mp3")))
+
+
+if __name__ == "__main__":
+    unittest.main()
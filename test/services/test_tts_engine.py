@@ -0,0 +1,126 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from edge_tts import SubMaker
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import tts_cache, tts_engine, voice
+from app.services.video_fast import find_ffmpeg
+
+
+class TestTtsEngine(unittest.TestCase):
+    def test_split_sentences(self):
+        text = "手续费为2.5%。你好吗？I am fine. Thanks!"
+        self.assertEqual(
+            tts_engine.split_sentences(text),
+            ["手续费为2.5%。", "你好吗？", "I am fine.", "Thanks!"],
+        )
+
+    def test_split_text(self):
+        text = "第一句话。第二句话。第三句话。"
+        self.assertEqual(
+            tts_engine.split_text(text, max_chars=10),
+            ["第一句话。第二句话。", "第三句话。"],
+        )
+        self.assertEqual(
+            tts_engine.split_text("One. Two. Three.", max_chars=9),
+            ["One. Two.", "Three."],
+        )
+
+    def test_merge_sub_makers(self):
+        first = SubMaker()
+        first.subs = ["你好"]
+        first.offset = [(0, 5000000)]
+        second = SubMaker()
+        second.subs = ["世界"]
+        second.offset = [(1000000, 6000000)]
+
+        merged = tts_engine.merge_sub_makers([first, second], [0.8, 0.7])
+        self.assertEqual(merged.subs, ["你好", "世界"])
+        self.assertEqual(merged.offset, [(0, 5000000), (9000000, 14000000)])
+        self.assertAlmostEqual(voice.get_audio_duration(merged), 1.4)
+
+    def test_tts_chunks_and_cache(self):
+        calls = []
+
+        def fake_tts(text, voice_name, voice_rate, voice_file, voice_volume=1.0):
+            calls.append(text)
+            subprocess.run(
+                [find_ffmpeg(), "-y", "-loglevel", "error", "-f", "lavfi",
+                 "-i", "anullsrc=r=24000:cl=mono", "-t", "1", voice_file],
+                check=True,
+            )
+            sub_maker = SubMaker()
+            sub_maker.subs = [text]
+            sub_maker.offset = [(0, 9000000)]
+            return sub_maker
+
+        with tempfile.TemporaryDirectory() as temp_dir, mock.patch.object(
+            voice, "tts", fake_tts
+        ), mock.patch.object(tts_cache, "_cache_dir", lambda: temp_dir):
+            voice_file = os.path.join(temp_dir, "audio.mp3")
+            text = "第一段第一句。\n第二段第一句。"
+            sub_maker = tts_engine.tts(text, "zh-CN-XiaoxiaoNeural", 1.0, voice_file)
+            self.assertEqual(calls, ["第一段第一句。", "第二段第一句。"])
+            self.assertEqual(sub_maker.subs, ["第一段第一句。", "第二段第一句。"])
+            self.assertGreater(sub_maker.offset[1][0], 9000000)
+            self.assertTrue(os.path.exists(voice_file))
+
+            # 只修改第二段，第一段命中缓存
+            tts_engine.tts("第一段第一句。\n第二段改了。", "zh-CN-XiaoxiaoNeural", 1.0, voice_file)
+            self.assertEqual(calls[2:], ["第二段改了。"])
+
+    def test_tts_stream(self):
+        calls = []
+
+        def fake_tts(text, voice_name, voice_rate, voice_file, voice_volume=1.0):
+            calls.append(text)
+            subprocess.run(
+                [find_ffmpeg(), "-y", "-loglevel", "error", "-f", "lavfi",
+                 "-i", "anullsrc=r=24000:cl=mono", "-t", "1", voice_file],
+                check=True,
+            )
+            sub_maker = SubMaker()
+            sub_maker.subs = [text]
+            sub_maker.offset = [(0, 9000000)]
+            return sub_maker
+
+        def paragraphs():
+            yield "第一段。"
+            # 第二段产出之前，第一段已经开始合成
+            for _ in range(100):
+                if calls:
+                    break
+                time.sleep(0.05)
+            self.assertEqual(calls, ["第一段。"])
+            yield "第二段。"
+
+        def failing_paragraphs():
+            yield "第一段。"
+            raise ValueError("stream interrupted")
+
+        with tempfile.TemporaryDirectory() as temp_dir, mock.patch.object(
+            voice, "tts", fake_tts
+        ), mock.patch.object(tts_cache, "_cache_dir", lambda: temp_dir):
+            voice_file = os.path.join(temp_dir, "audio.mp3")
+            sub_maker, text = tts_engine.tts_stream(paragraphs(), "zh-CN-XiaoxiaoNeural", 1.0, voice_file)
+            self.assertEqual(text, "第一段。\n\n第二段。")
+            self.assertEqual(sub_maker.subs, ["第一段。", "第二段。"])
+            self.assertGreater(sub_maker.offset[1][0], 9000000)
+            self.assertTrue(os.path.exists(voice_file))
+
+            self.assertIsNone(
+                tts_engine.tts_stream(failing_paragraphs(), "zh-CN-XiaoxiaoNeural", 1.0, voice_file)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
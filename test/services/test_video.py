@@ -1,8 +1,10 @@
 
 import unittest
 import os
+import shutil
 import sys
 from pathlib import Path
+from unittest import mock
 from moviepy import (
     VideoFileClip,
 )
@@ -75,5 +77,176 @@ class TestVideoService(unittest.TestCase):
         except Exception as e:
             self.fail(f"test wrap_text failed: {str(e)}")
 
+    def test_render_overlay_and_compose_video(self):
+        """shared overlay layer + mixed audio composed onto a combined video with ffmpeg"""
+        import subprocess
+        import tempfile
+
+        from app.models.schema import VideoParams
+        from app.services import audio
+        from app.services.video_fast import find_ffmpeg
+
+        ffmpeg_path = find_ffmpeg()
+        if not ffmpeg_path:
+            self.skipTest("ffmpeg not found")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_file = os.path.join(temp_dir, "combined.mp4")
+            voice_file = os.path.join(temp_dir, "voice.mp3")
+            subtitle_file = os.path.join(temp_dir, "subtitle.srt")
+            subprocess.run(
+                [
+                    ffmpeg_path, "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "testsrc2=size=1080x1920:rate=30:duration=1",
+                    "-pix_fmt", "yuv420p", video_file,
+                ],
+                check=True,
+            )
+            subprocess.run(
+                [
+                    ffmpeg_path, "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "sine=frequency=440:duration=1",
+                    voice_file,
+                ],
+                check=True,
+            )
+            with open(subtitle_file, "w", encoding="utf-8") as f:
+                f.write("1\n00:00:00,000 --> 00:00:01,000\nhello\n\n")
+
+            mixed_audio = os.path.join(temp_dir, "mixed-audio.m4a")
+            self.assertIsNotNone(audio.mix_audio_track(voice_file, mixed_audio))
+
+            params = VideoParams(video_subject="title", font_name="Charm-Regular.ttf")
+            overlay = vd.render_overlay(
+                subtitle_file, params, 1.0, os.path.join(temp_dir, "overlay.mov")
+            )
+            self.assertTrue(overlay and os.path.exists(overlay))
+
+            output_file = os.path.join(temp_dir, "final.mp4")
+            self.assertTrue(
+                vd.compose_video(video_file, overlay, mixed_audio, output_file, params)
+            )
+            clip = VideoFileClip(output_file)
+            self.assertEqual(tuple(clip.size), (1080, 1920))
+            self.assertIsNotNone(clip.audio)
+            self.assertAlmostEqual(clip.duration, 1.0, delta=0.2)
+            clip.close()
+
+            # 没有字幕和标题时不生成叠加层
+            params = VideoParams(video_subject="", subtitle_enabled=False)
+            self.assertEqual(vd.render_overlay("", params, 1.0, os.path.join(temp_dir, "x.mov")), "")
+
+            # 只替换音轨，画面直接复制
+            self.assertTrue(vd.replace_audio(output_file, voice_file))
+            clip = VideoFileClip(output_file)
+            self.assertIsNotNone(clip.audio)
+            self.assertAlmostEqual(clip.duration, 1.0, delta=0.2)
+            clip.close()
+
+    def test_overlay_layers_keep_params(self):
+        """构建叠加层不修改调用方的参数，否则 edit 保存后会被当作样式修改"""
+        import tempfile
+
+        from app.models.schema import VideoParams
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            subtitle_file = os.path.join(temp_dir, "subtitle.srt")
+            with open(subtitle_file, "w", encoding="utf-8") as f:
+                f.write("1\n00:00:00,000 --> 00:00:01,000\nhello\n\n")
+
+            # 未指定字体时使用默认字体
+            shutil.copy(
+                os.path.join(utils.font_dir(), "Charm-Regular.ttf"),
+                os.path.join(temp_dir, "LXGWWenKai-Regular.ttf"),
+            )
+            params = VideoParams(video_subject="title", font_name="", stroke_width=1.5)
+            before = params.model_dump()
+            with mock.patch.object(vd.utils, "font_dir", return_value=temp_dir):
+                self.assertTrue(vd.build_overlay_layers(subtitle_file, params, 1.0, 1.0))
+            self.assertEqual(params.model_dump(), before)
+
+    def test_preview_render_settings(self):
+        from app.models.schema import VideoParams
+
+        params = VideoParams(video_subject="title", video_aspect="9:16", font_size=60)
+        self.assertEqual(vd.render_size(params), (1080, 1920))
+        self.assertEqual(vd.render_fps(params), vd.fps)
+        self.assertEqual(vd.render_duration(params, 30.0), 30.0)
+
+        params.preview = True
+        params.preview_duration = 10
+        width, height = vd.render_size(params)
+        self.assertLess(width, 1080)
+        self.assertEqual((width % 2, height % 2), (0, 0))
+        self.assertEqual(vd.render_profile(params), "draft")
+        self.assertEqual(vd.render_duration(params, 30.0), 10.0)
+        self.assertEqual(vd.render_duration(params, 5.0), 5.0)
+
+    def test_combine_videos_clip_plan(self):
+        """the clip plan written by a preview combine is reused by the final combine"""
+        import subprocess
+        import tempfile
+
+        from app.models.schema import VideoConcatMode, VideoTransitionMode
+        from app.services.video_fast import find_ffmpeg
+
+        ffmpeg_path = find_ffmpeg()
+        if not ffmpeg_path:
+            self.skipTest("ffmpeg not found")
+
+        video_paths = [os.path.join(resources_dir, f"{i}.png.mp4") for i in range(1, 4)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            audio_file = os.path.join(temp_dir, "audio.mp3")
+            subprocess.run(
+                [
+                    ffmpeg_path, "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "sine=frequency=440:duration=6",
+                    audio_file,
+                ],
+                check=True,
+            )
+            clip_plan_file = os.path.join(temp_dir, "clip-plan-1.json")
+            options = dict(
+                video_paths=video_paths,
+                audio_file=audio_file,
+                video_aspect="9:16",
+                video_concat_mode=VideoConcatMode.random,
+                video_transition_mode=VideoTransitionMode.none,
+                max_clip_duration=3,
+                clip_plan_file=clip_plan_file,
+            )
+
+            preview_file = os.path.join(temp_dir, "preview.mp4")
+            vd.combine_videos(
+                combined_video_path=preview_file,
+                video_size=(136, 240),
+                video_fps=15,
+                max_duration=2,
+                **options,
+            )
+            plan = vd.load_clip_plan(clip_plan_file, video_paths)
+            self.assertIsNotNone(plan)
+            self.assertEqual(len(plan["clips"]), 3)
+            clip = VideoFileClip(preview_file)
+            self.assertEqual(tuple(clip.size), (136, 240))
+            self.assertEqual(clip.fps, 15)
+            clip.close()
+
+            final_file = os.path.join(temp_dir, "final.mp4")
+            vd.combine_videos(
+                combined_video_path=final_file, video_size=(270, 480), **options
+            )
+            self.assertEqual(
+                [c.file_path for c in vd.load_clip_plan(clip_plan_file)["clips"]],
+                [c.file_path for c in plan["clips"]],
+            )
+            clip = VideoFileClip(final_file)
+            self.assertEqual(tuple(clip.size), (270, 480))
+            self.assertGreaterEqual(clip.duration, 5.9)
+            clip.close()
+
+            # 素材变化时不使用旧的片段计划
+            self.assertIsNone(vd.load_clip_plan(clip_plan_file, video_paths[:2]))
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
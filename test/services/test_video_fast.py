@@ -0,0 +1,114 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import video_fast
+from app.services.media_probe import MediaInfo
+from app.services.video_fast import NormalizeAction
+
+
+def _info(**kwargs):
+    values = dict(
+        path="a.mp4",
+        duration=5.0,
+        video_codec="h264",
+        width=1080,
+        height=1920,
+        fps=30.0,
+        pix_fmt="yuv420p",
+        sar="1:1",
+        profile="High",
+        level=40,
+        stream_count=1,
+    )
+    values.update(kwargs)
+    return MediaInfo(**values)
+
+
+class TestVideoFast(unittest.TestCase):
+    def test_plan_keep(self):
+        action = video_fast._plan_action(_info(), 1080, 1920)
+        self.assertEqual(action, NormalizeAction.keep)
+
+    def test_plan_remux_when_audio(self):
+        info = _info(audio_codec="aac", stream_count=2)
+        action = video_fast._plan_action(info, 1080, 1920)
+        self.assertEqual(action, NormalizeAction.remux)
+
+    def test_plan_transcode_outliers(self):
+        # 与目标规格比较，而不是与第一个素材比较
+        for info in (
+            _info(video_codec="hevc"),
+            _info(width=720, height=1280),
+            _info(fps=25.0),
+            _info(pix_fmt="yuv444p"),
+            _info(sar="4:3"),
+            _info(profile="Main"),
+            _info(level=42),
+            None,
+        ):
+            action = video_fast._plan_action(info, 1080, 1920)
+            self.assertEqual(action, NormalizeAction.transcode)
+
+    def test_normalize_compatible_after_success(self):
+        actions = [NormalizeAction.keep, NormalizeAction.transcode, NormalizeAction.remux]
+        with mock.patch.object(video_fast, "find_ffmpeg", return_value="ffmpeg"), mock.patch.object(
+            video_fast, "plan_normalization", return_value=actions
+        ), mock.patch.object(video_fast, "_normalize_one", return_value=True):
+            paths, compatible = video_fast.normalize_video_materials(
+                ["a.mp4", "b.mp4", "c.mp4"], "out", 1080, 1920
+            )
+        self.assertTrue(compatible)
+        self.assertEqual(paths[0], "a.mp4")
+        self.assertTrue(paths[1].endswith("normalized_2.mp4"))
+
+        with mock.patch.object(video_fast, "find_ffmpeg", return_value="ffmpeg"), mock.patch.object(
+            video_fast, "plan_normalization", return_value=actions
+        ), mock.patch.object(
+            video_fast, "_normalize_one", side_effect=lambda *args: args[3] != NormalizeAction.remux
+        ):
+            paths, compatible = video_fast.normalize_video_materials(
+                ["a.mp4", "b.mp4", "c.mp4"], "out", 1080, 1920
+            )
+        self.assertFalse(compatible)
+        self.assertEqual(paths[2], "c.mp4")
+
+    def test_reencode_failure_returns_none(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "final.mp4")
+            failed = subprocess.CompletedProcess([], 1, "", "error")
+            with mock.patch.object(video_fast, "find_ffmpeg", return_value="ffmpeg"), mock.patch.object(
+                video_fast.subprocess, "run", return_value=failed
+            ):
+                self.assertIsNone(
+                    video_fast._generate_with_reencode(
+                        temp_dir, ["a.mp4"], "audio.mp3", "", output_path, "9:16"
+                    )
+                )
+
+            # 渲染失败时删除不完整的输出文件
+            with open(output_path, "wb") as f:
+                f.write(b"partial")
+            clip = mock.Mock(fps=30)
+            with mock.patch.object(video_fast.streaming, "write_clip", return_value=False):
+                self.assertFalse(video_fast._render_with_audio(clip, output_path, "audio.mp3"))
+            self.assertFalse(os.path.exists(output_path))
+
+    def test_loop_to_duration(self):
+        durations = {"a.mp4": 2.0, "b.mp4": 3.0}
+        with mock.patch.object(video_fast.media_probe, "get_duration", side_effect=durations.get):
+            self.assertEqual(video_fast.loop_to_duration(["a.mp4", "b.mp4"], 4.0), ["a.mp4", "b.mp4"])
+            self.assertEqual(
+                video_fast.loop_to_duration(["a.mp4", "b.mp4"], 6.0), ["a.mp4", "b.mp4", "a.mp4"]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,7 @@ import unittest
 import os
 import sys
 from pathlib import Path
+from unittest import mock
 
 # add project root to python path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -101,6 +102,81 @@ class TestVoiceService(unittest.TestCase):
 
         self.loop.run_until_complete(_do())
 
+    def test_edge_tts_service(self):
+        class FakeCommunicate:
+            active = 0
+            max_active = 0
+
+            def __init__(self, text, voice, rate="+0%"):
+                self.text = text
+
+            async def stream(self):
+                FakeCommunicate.active += 1
+                FakeCommunicate.max_active = max(
+                    FakeCommunicate.max_active, FakeCommunicate.active
+                )
+                await asyncio.sleep(0.05)
+                yield {"type": "audio", "data": self.text.encode("utf-8")}
+                yield {"type": "WordBoundary", "offset": 0, "duration": 1000, "text": self.text}
+                FakeCommunicate.active -= 1
+
+        service = vs.EdgeTTSService(concurrency=2)
+        with mock.patch.object(vs.edge_tts, "Communicate", FakeCommunicate):
+            futures = [service.submit(f"text-{i}", "zh-CN-XiaoxiaoNeural") for i in range(5)]
+            results = [future.result(timeout=10) for future in futures]
+
+        self.assertEqual(results[3][0], b"text-3")
+        self.assertEqual(results[3][1].subs, ["text-3"])
+        self.assertLessEqual(FakeCommunicate.max_active, 2)
+
+    def test_create_subtitle(self):
+        script = "今天天气很好，我们去公园。Hello, World! 一起出发"
+        words = [
+            ("今天", 0, 5), ("天气", 5, 10), ("很好", 10, 15),
+            ("我们", 20, 24), ("去", 24, 26), ("公园", 26, 30),
+            ("hello", 35, 40), ("world", 40, 45),
+            # 跨行的词按字符数切分时长，对不上的词不影响后面的行
+            ("一", 50, 52), ("起", 52, 54), ("出huh", 54, 60), ("发", 60, 62),
+        ]
+        sub_maker = vs.edge_tts.SubMaker()
+        for word, start, end in words:
+            sub_maker.create_sub((start * 100000, (end - start) * 100000), word)
+
+        self.assertEqual(
+            [
+                (text, start / 100000, end / 100000)
+                for text, start, end in vs.subtitle_entries(
+                    sub_maker, utils.split_string_by_punctuations(script)
+                )
+            ],
+            [
+                ("今天天气很好", 0, 15),
+                ("我们去公园", 20, 30),
+                ("Hello", 35, 40),
+                ("World", 40, 45),
+                ("一起出发", 50, 62),
+            ],
+        )
+
+        subtitle_file = os.path.join(temp_dir, "test_create_subtitle.srt")
+        vs.create_subtitle(sub_maker=sub_maker, text=script, subtitle_file=subtitle_file)
+        with open(subtitle_file, encoding="utf-8") as f:
+            content = f.read()
+        self.assertTrue(content.startswith("1\n00:00:00,000 --> 00:00:00,150\n今天天气很好\n\n"))
+        self.assertTrue(content.endswith("5\n00:00:00,500 --> 00:00:00,620\n一起出发\n\n"))
+
+        # 单词跨越两行时按字符数切分
+        sub_maker = vs.edge_tts.SubMaker()
+        sub_maker.create_sub((0, 4000000), "abcd")
+        self.assertEqual(
+            [
+                (text, start / 100000, end / 100000)
+                for text, start, end in vs.subtitle_entries(sub_maker, ["ab", "cd"])
+            ],
+            [("ab", 0, 20), ("cd", 20, 40)],
+        )
+
+
 if __name__ == "__main__":
     # python -m unittest test.services.test_voice.TestVoiceService.test_azure_tts_v1
     # python -m unittest test.services.test_voice.TestVoiceService.test_azure_tts_v2
@@ -0,0 +1,74 @@
+import sys
+import unittest
+from pathlib import Path
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import voice, voice_catalog
+
+
+class TestVoiceCatalog(unittest.TestCase):
+    def setUp(self):
+        self.catalog = voice_catalog.get_catalog()
+
+    def test_catalog_is_built_once(self):
+        self.assertIs(voice_catalog.get_catalog(), self.catalog)
+
+    def test_azure_voices_sorted_and_filtered_by_prefix(self):
+        all_voices = voice.get_all_azure_voices()
+        self.assertEqual(all_voices, sorted(all_voices))
+        self.assertIn("zh-CN-XiaoxiaoNeural-Female", all_voices)
+        self.assertIn("zh-CN-XiaoxiaoMultilingualNeural-V2-Female", all_voices)
+
+        zh_voices = voice.get_all_azure_voices(filter_locals=["zh-cn"])
+        self.assertTrue(zh_voices)
+        self.assertTrue(all(v.startswith("zh-CN-") for v in zh_voices))
+        self.assertEqual(
+            zh_voices,
+            [v for v in all_voices if v.lower().startswith("zh-cn")],
+        )
+
+    def test_filter_by_provider_locale_gender(self):
+        v2 = self.catalog.filter(provider=voice_catalog.PROVIDER_AZURE_V2)
+        self.assertTrue(v2)
+        self.assertTrue(all("-V2-" in v for v in v2))
+
+        edge_zh_male = self.catalog.filter(
+            provider=voice_catalog.PROVIDER_EDGE, locales=["zh-CN"], gender="Male"
+        )
+        self.assertIn("zh-CN-YunxiNeural-Male", edge_zh_male)
+        self.assertTrue(all(v.endswith("-Male") and "-V2-" not in v for v in edge_zh_male))
+
+        # 只传语言时匹配该语言下的所有地区
+        en = self.catalog.filter(provider=voice_catalog.PROVIDER_EDGE, locales=["en"])
+        self.assertIn("en-US-JennyNeural-Female", en)
+        self.assertIn("en-GB-SoniaNeural-Female", en)
+
+    def test_provider_of(self):
+        self.assertEqual(voice_catalog.provider_of("zh-CN-XiaoxiaoNeural-Female"), "edge")
+        self.assertEqual(
+            voice_catalog.provider_of("zh-CN-XiaoxiaoMultilingualNeural-V2-Female"),
+            "azure_v2",
+        )
+        self.assertEqual(voice_catalog.provider_of(voice.get_siliconflow_voices()[0]), "siliconflow")
+        self.assertEqual(voice_catalog.provider_of(voice.get_gtts_voices()[0]), "gtts")
+        self.assertEqual(voice_catalog.provider_of("pyttsx3:en-US-0-Male-David"), "pyttsx3")
+        # 不在目录中的名称按前缀/后缀判断
+        self.assertEqual(voice_catalog.provider_of("xx-XX-UnknownNeural-V2-Male"), "azure_v2")
+        self.assertEqual(voice_catalog.provider_of("xx-XX-UnknownNeural-Male"), "edge")
+
+    def test_parse_voice_name(self):
+        self.assertEqual(voice.parse_voice_name("zh-CN-YunxiNeural-Male"), "zh-CN-YunxiNeural")
+        self.assertEqual(
+            voice.parse_voice_name("zh-CN-XiaoxiaoMultilingualNeural-V2-Female"),
+            "zh-CN-XiaoxiaoMultilingualNeural-V2",
+        )
+        self.assertEqual(
+            voice.parse_voice_name("gtts:zh-CN-Female-Chinese (Simplified)"),
+            "gtts:zh-CN-Chinese (Simplified)",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
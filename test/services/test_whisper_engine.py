@@ -0,0 +1,86 @@
+import threading
+import time
+import unittest
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# add project root to python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import whisper_engine
+
+
+class _FakeModel:
+    loads = 0
+
+    def __init__(self, **kwargs):
+        # 模拟较慢的模型加载，放大并发加载的竞争窗口
+        time.sleep(0.05)
+        _FakeModel.loads += 1
+        self.kwargs = kwargs
+
+    def transcribe(self, audio, **kwargs):
+        info = SimpleNamespace(language="en", language_probability=1.0)
+        return iter([SimpleNamespace(text="sequential", kwargs=kwargs)]), info
+
+
+class _FakePipeline:
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, batch_size=8, **kwargs):
+        info = SimpleNamespace(language="en", language_probability=1.0)
+        return iter([SimpleNamespace(text="batched", batch_size=batch_size, kwargs=kwargs)]), info
+
+
+class TestWhisperEngine(unittest.TestCase):
+    def setUp(self):
+        _FakeModel.loads = 0
+        self.patches = [
+            mock.patch.object(
+                whisper_engine,
+                "faster_whisper",
+                SimpleNamespace(WhisperModel=_FakeModel, BatchedInferencePipeline=_FakePipeline),
+            ),
+            mock.patch.object(whisper_engine, "_models", {}),
+            mock.patch.object(whisper_engine, "_pipelines", {}),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_model_loaded_once(self):
+        models = []
+        threads = [
+            threading.Thread(target=lambda: models.append(whisper_engine.get_model()))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(_FakeModel.loads, 1)
+        self.assertTrue(all(m is models[0] for m in models))
+
+        # 不同精度各自加载一个模型
+        whisper_engine.get_model(compute_type="float32")
+        self.assertEqual(_FakeModel.loads, 2)
+
+    def test_transcribe_options(self):
+        segments, info = whisper_engine.transcribe("audio.mp3", beam_size=1, batch_size=4)
+        self.assertEqual(segments[0].text, "batched")
+        self.assertEqual(segments[0].batch_size, 4)
+        self.assertEqual(segments[0].kwargs["beam_size"], 1)
+        self.assertTrue(segments[0].kwargs["word_timestamps"])
+
+        segments, _ = whisper_engine.transcribe("audio.mp3", batch_size=1)
+        self.assertEqual(segments[0].text, "sequential")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -42,7 +42,7 @@ from app.models.schema import (
     VideoParams,
     VideoTransitionMode,
 )
-from app.services import llm, voice
+from app.services import llm, voice, voice_catalog
 from app.services import task as tm
 from app.utils import utils
 
@@ -251,6 +251,49 @@ def tr(key):
     return loc.get("Translation", {}).get(key, key)
 
 
+def run_video_task(task_id, params, render):
+    """
+    执行生成/重新渲染任务：页面上实时显示日志，完成后播放生成的视频，失败时停止页面
+
+    Args:
+        render: 执行任务的函数，返回 tm.start / tm.edit 的结果
+    """
+    log_container = st.empty()
+    log_records = []
+
+    def log_received(msg):
+        if config.ui["hide_log"]:
+            return
+        with log_container:
+            log_records.append(msg)
+            st.code("\n".join(log_records))
+
+    logger.add(log_received)
+
+    st.toast(tr("Generating Video"))
+    logger.info(tr("Start Generating Video"))
+    logger.info(utils.to_json(params))
+    scroll_to_bottom()
+
+    result = render()
+    if not result or "videos" not in result:
+        st.error(tr("Video Generation Failed"))
+        logger.error(tr("Video Generation Failed"))
+        scroll_to_bottom()
+        st.stop()
+
+    video_files = result.get("videos", [])
+    st.session_state["last_task_id"] = task_id
+    st.success(tr("Video Generation Completed"))
+    try:
+        if video_files:
+            player_cols = st.columns(len(video_files) * 2 + 1)
+            for i, url in enumerate(video_files):
+                player_cols[i * 2 + 1].video(url)
+    except Exception:
+        pass
+
+
 # 创建基础设置折叠框
 if not config.app.get("hide_config", False):
     with st.expander(tr("Basic Settings"), expanded=False):
@@ -588,9 +631,11 @@ with left_panel:
                 script = llm.generate_script(
                     video_subject=params.video_subject, 
                     language=params.video_language,
-                    video_duration=selected_video_duration
+                    video_duration=selected_video_duration,
+                    # 再次点击时重新生成，不返回缓存的结果
+                    use_cache=False,
                 )
-                terms = llm.generate_terms(params.video_subject, script)
+                terms = llm.generate_terms(params.video_subject, script, use_cache=False)
                 if "Error: " in script:
                     st.error(tr(script))
                 elif "Error: " in terms:
@@ -607,7 +652,9 @@ with left_panel:
                 st.stop()
 
             with st.spinner(tr("Generating Video Keywords")):
-                terms = llm.generate_terms(params.video_subject, params.video_script)
+                terms = llm.generate_terms(
+                    params.video_subject, params.video_script, use_cache=False
+                )
                 if "Error: " in terms:
                     st.error(tr(terms))
                 else:
@@ -838,6 +885,21 @@ with middle_panel:
             value=False,
             help=tr("Enable zoom animation effect (slower but more dynamic)"),
         )
+
+        # 预览模式：低分辨率、低帧率快速检查排版和时间轴，确认后用「仅重新渲染样式」取消预览即可生成最终视频
+        params.preview = st.checkbox(
+            tr("Preview Mode"),
+            value=False,
+            help=tr("Render at reduced resolution and frame rate to check layout, timing and theme. Untick it and use Re-render Style Only to render the final video with the same clips."),
+        )
+        if params.preview:
+            params.preview_duration = st.number_input(
+                tr("Preview Duration (seconds, 0 = full)"),
+                min_value=0,
+                max_value=600,
+                value=0,
+                step=5,
+            )
     with st.container(border=True):
         st.write(tr("Audio Settings"))
 
@@ -893,18 +955,15 @@ with middle_panel:
             else:
                 default_filter = None  # 其他语言显示全部
             
-            all_voices = voice.get_all_azure_voices(filter_locals=default_filter)
-
-            # 根据选择的TTS服务器筛选声音
-            for v in all_voices:
-                if selected_tts_server == "azure-tts-v2":
-                    # V2版本的声音名称中包含"v2"
-                    if "V2" in v:
-                        filtered_voices.append(v)
-                else:
-                    # V1版本的声音名称中不包含"v2"
-                    if "V2" not in v:
-                        filtered_voices.append(v)
+            # 根据选择的TTS服务器筛选声音，直接使用声音目录的索引
+            filtered_voices = voice_catalog.get_catalog().filter(
+                provider=(
+                    voice_catalog.PROVIDER_AZURE_V2
+                    if selected_tts_server == "azure-tts-v2"
+                    else voice_catalog.PROVIDER_EDGE
+                ),
+                prefixes=default_filter,
+            )
 
         friendly_names = {
             v: v.replace("Female", tr("Female"))
@@ -1880,7 +1939,7 @@ with mode_comparison:
         - 🎭 {tr("High-quality output requirements")}
         """)
 
-button_cols = st.columns(2)
+button_cols = st.columns(3)
 
 with button_cols[0]:
     fast_button = st.button(
@@ -1897,6 +1956,27 @@ with button_cols[1]:
         help=tr("Full MoviePy processing, supports all effects but slower.")
     )
 
+with button_cols[2]:
+    # 只修改了字幕样式、主题或背景音乐时，复用上一次任务的素材、配音和字幕，只重新叠加和封装
+    restyle_button = st.button(
+        "🎨 " + tr("Re-render Style Only"),
+        use_container_width=True,
+        disabled="last_task_id" not in st.session_state,
+        help=tr("Reuse the last task's footage, voice and subtitles. Only subtitle style, theme, background music and preview changes are applied.")
+    )
+
+if restyle_button:
+    task_id = st.session_state["last_task_id"]
+    config.save_config()
+    edit_error = tm.edit_error(task_id, params)
+    if edit_error:
+        st.error(edit_error)
+        scroll_to_bottom()
+        st.stop()
+
+    run_video_task(task_id, params, lambda: tm.edit(task_id=task_id, params=params))
+    scroll_to_bottom()
+
 # 处理按钮点击
 start_button = fast_button or standard_button
 if start_button:
@@ -1946,40 +2026,7 @@ if start_button:
                     params.video_materials = []
                 params.video_materials.append(m)
 
-    log_container = st.empty()
-    log_records = []
-
-    def log_received(msg):
-        if config.ui["hide_log"]:
-            return
-        with log_container:
-            log_records.append(msg)
-            st.code("\n".join(log_records))
-
-    logger.add(log_received)
-
-    st.toast(tr("Generating Video"))
-    logger.info(tr("Start Generating Video"))
-    logger.info(utils.to_json(params))
-    scroll_to_bottom()
-
-    result = tm.start(task_id=task_id, params=params)
-    if not result or "videos" not in result:
-        st.error(tr("Video Generation Failed"))
-        logger.error(tr("Video Generation Failed"))
-        scroll_to_bottom()
-        st.stop()
-
-    video_files = result.get("videos", [])
-    st.success(tr("Video Generation Completed"))
-    try:
-        if video_files:
-            player_cols = st.columns(len(video_files) * 2 + 1)
-            for i, url in enumerate(video_files):
-                player_cols[i * 2 + 1].video(url)
-    except Exception:
-        pass
-
+    run_video_task(task_id, params, lambda: tm.start(task_id=task_id, params=params))
     open_task_folder(task_id)
     logger.info(tr("Video Generation Completed"))
     scroll_to_bottom()